@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+目录树基准测试
+构造约2万个文件夹的目录层次，测量FolderNodeTable的填充耗时和内存，
+以及FolderTreeCtrl（DataViewCtrl）逐个展开顶层目录、滚动浏览整棵树的耗时；
+可用--legacy同时测量原来的CustomTreeCtrl实现作为对照
+
+无显示的Linux环境下自动通过xvfb-run在虚拟显示上重新运行（--no-gui只测节点表）
+
+用法: python -m benchmarks.bench_folder_tree [--top 200] [--per 100]
+          [--scroll-steps 200] [--legacy] [--no-gui]
+"""
+
+import argparse
+import time
+import tracemalloc
+from benchmarks.bench_visualizers import ensure_display, percentiles
+
+
+def make_listings(top, per):
+    """生成目录列表：top个顶层目录，每个下有per个子目录
+    
+    Args:
+        top: 顶层目录数
+        per: 每个顶层目录下的子目录数
+        
+    Returns:
+        dict: 目录路径到文件信息字典列表的映射
+    """
+    fs_id = 1
+    
+    def folder(parent, name):
+        nonlocal fs_id
+        fs_id += 1
+        path = f"{parent.rstrip('/')}/{name}"
+        return {'fs_id': fs_id, 'path': path, 'server_filename': name, 'isdir': 1,
+                'size': 0, 'server_mtime': 1700000000, 'category': 6}
+                
+    listings = {'/': [folder('/', f"专辑 {i:04d}") for i in range(top)]}
+    for parent in listings['/']:
+        listings[parent['path']] = [folder(parent['path'], f"CD {j:03d}") for j in range(per)]
+    return listings
+
+
+def bench_table(listings):
+    """测量节点表的填充耗时和内存占用"""
+    from src.gui.folder_tree import FolderNodeTable, STATE_LOADED
+    
+    tracemalloc.start()
+    start = time.perf_counter()
+    table = FolderNodeTable()
+    pending = [0]
+    while pending:
+        index = pending.pop()
+        for node in table.add_children(index, listings.get(table.paths[index], [])):
+            pending.append(node)
+        table.set_state(index, STATE_LOADED)
+    elapsed = time.perf_counter() - start
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    
+    print(f"节点表: {len(table) - 1} 个目录，填充 {elapsed * 1000:.1f} ms，"
+          f"内存 {size / 1024:.0f} KB（{size / max(len(table) - 1, 1):.0f} B/目录）")
+
+
+def bench_dataview(frame, listings, scroll_steps):
+    """测量FolderTreeCtrl展开和滚动的耗时"""
+    import wx
+    from src.gui.folder_tree import FolderTreeCtrl, STATE_LOADED
+    
+    tree = FolderTreeCtrl(frame)
+    tree.SetSize(frame.GetClientSize())
+    tree.add_children(0, listings['/'])
+    tree.set_state(0, STATE_LOADED)
+    wx.GetApp().Yield()
+    
+    expand = []
+    for index in list(tree.table.children[0]):
+        start = time.perf_counter()
+        tree.add_children(index, listings[tree.table.paths[index]])
+        tree.set_state(index, STATE_LOADED)
+        tree.Expand(tree.model.item_of(index))
+        tree.Update()
+        expand.append(time.perf_counter() - start)
+        
+    total = len(tree.table)
+    step = max(1, total // scroll_steps)
+    scroll = []
+    for index in range(1, total, step):
+        start = time.perf_counter()
+        tree.EnsureVisible(tree.model.item_of(index))
+        tree.Update()
+        scroll.append(time.perf_counter() - start)
+        
+    tree.Destroy()
+    return expand, scroll
+
+
+def bench_legacy(frame, listings, scroll_steps):
+    """测量原CustomTreeCtrl实现（完整字典作为项数据、占位子项）展开和滚动的耗时"""
+    import wx
+    import wx.lib.agw.customtreectrl as CT
+    
+    tree = CT.CustomTreeCtrl(
+        frame, agwStyle=CT.TR_DEFAULT_STYLE | CT.TR_HIDE_ROOT | CT.TR_HAS_BUTTONS)
+    tree.SetSize(frame.GetClientSize())
+    root = tree.AddRoot("百度云盘")
+    items = []
+    
+    def append(parent, files):
+        for file in files:
+            child = tree.AppendItem(parent, file['server_filename'])
+            tree.SetItemData(child, file)
+            tree.AppendItem(child, "")
+            items.append(child)
+            
+    append(root, listings['/'])
+    wx.GetApp().Yield()
+    
+    expand = []
+    for item in list(items):
+        start = time.perf_counter()
+        tree.DeleteChildren(item)
+        append(item, listings[tree.GetItemData(item)['path']])
+        tree.Expand(item)
+        tree.Update()
+        expand.append(time.perf_counter() - start)
+        
+    step = max(1, len(items) // scroll_steps)
+    scroll = []
+    for item in items[::step]:
+        start = time.perf_counter()
+        tree.EnsureVisible(item)
+        tree.Update()
+        scroll.append(time.perf_counter() - start)
+        
+    tree.Destroy()
+    return expand, scroll
+
+
+def report(name, expand, scroll):
+    """打印展开和滚动耗时的百分位数"""
+    for label, samples in (("展开", expand), ("滚动", scroll)):
+        p = percentiles(samples)
+        print(f"{name:<16} {label} p50/p95/p99: {p['p50']:7.2f}/{p['p95']:7.2f}/{p['p99']:7.2f} ms  "
+              f"合计 {sum(samples):6.2f} s（{len(samples)} 次）")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="目录树基准测试")
+    parser.add_argument('--top', type=int, default=200, help="顶层目录数")
+    parser.add_argument('--per', type=int, default=100, help="每个顶层目录下的子目录数")
+    parser.add_argument('--scroll-steps', type=int, default=200, help="滚动采样次数")
+    parser.add_argument('--legacy', action='store_true', help="同时测量原CustomTreeCtrl实现")
+    parser.add_argument('--no-gui', action='store_true', help="只测量节点表，不创建窗口")
+    args = parser.parse_args()
+    
+    listings = make_listings(args.top, args.per)
+    bench_table(listings)
+    if args.no_gui:
+        return
+        
+    ensure_display('benchmarks.bench_folder_tree')
+    
+    import wx
+    app = wx.App(False)
+    frame = wx.Frame(None, size=(400, 800))
+    frame.Show()
+    
+    report("FolderTreeCtrl", *bench_dataview(frame, listings, args.scroll_steps))
+    if args.legacy:
+        report("CustomTreeCtrl", *bench_legacy(frame, listings, args.scroll_steps))
+        
+    frame.Destroy()
+    app.Destroy()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+播放列表批量添加与修改基准测试
+对比旧的逐个添加（每个文件重建去重集合并重写整个JSON文件）与
+PlaylistManager.add_files()一次批量添加的耗时和写入次数，
+并测量在大播放列表中删除、移动单首曲目以及连续记录最近播放的耗时。
+新方式的耗时是调用方（UI线程）的耗时，写入在后台线程合并进行，
+写入次数是后台线程实际提交的事务数或写文件次数
+
+用法: python -m benchmarks.bench_playlist [--tracks 10000] [--legacy-tracks 1000] [--edits 200]
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+from src.playlist import PlaylistManager
+
+
+def make_files(count, start=0):
+    """生成合成的音频文件信息"""
+    return [{'fs_id': i, 'path': f"/音乐/专辑 {i // 12}/{i % 12 + 1:02d} 曲目 {i}.mp3",
+             'server_filename': f"{i % 12 + 1:02d} 曲目 {i}.mp3", 'isdir': 0,
+             'size': 5 << 20, 'server_mtime': 1700000000 + i, 'category': 2}
+            for i in range(start, start + count)]
+
+
+def legacy_add_to_playlist(playlists, playlist_file, playlist_name, files):
+    """旧版PlaylistManager.add_to_playlist的实现（每次扫描整个播放列表去重并重写JSON文件）
+    
+    Returns:
+        写文件次数
+    """
+    existing_paths = {f['path'] for f in playlists[playlist_name]}
+    new_files = [f for f in files if f['path'] not in existing_paths]
+    if not new_files:
+        return 0
+    playlists[playlist_name].extend(new_files)
+    with open(playlist_file, 'w', encoding='utf-8') as f:
+        json.dump(playlists, f, ensure_ascii=False, indent=2)
+    return 1
+
+
+def new_manager(data_dir):
+    """创建带一个空播放列表的播放列表管理器"""
+    manager = PlaylistManager(None, data_dir=data_dir)
+    manager.create_playlist("基准")
+    return manager
+
+
+def timed(store, action):
+    """执行action，返回(调用耗时, 等待后台写完后新增的事务数)"""
+    commits = store.commits
+    start = time.perf_counter()
+    action()
+    elapsed = time.perf_counter() - start
+    store.flush()
+    return elapsed, store.commits - commits
+
+
+def report(name, count, elapsed, writes, unit="首"):
+    """打印耗时和写入次数"""
+    print(f"{name:<28} {count:>6} {unit}  {elapsed * 1000:>10.1f} ms  "
+          f"({elapsed / max(count, 1) * 1e6:>8.1f} µs/{unit})  写入 {writes} 次")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="播放列表批量添加基准测试")
+    parser.add_argument('--tracks', type=int, default=10000, help="批量添加的文件数")
+    parser.add_argument('--legacy-tracks', type=int, default=1000,
+                        help="逐个添加的文件数（耗时随数量平方增长）")
+    parser.add_argument('--edits', type=int, default=200, help="在大播放列表中删除、移动的次数")
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as data_dir:
+        # 旧方式：每个文件单独添加，每次重写整个JSON文件
+        playlists = {"基准": []}
+        playlist_file = os.path.join(data_dir, "playlists.json")
+        files = make_files(args.legacy_tracks)
+        writes = 0
+        start = time.perf_counter()
+        for file in files:
+            writes += legacy_add_to_playlist(playlists, playlist_file, "基准", [file])
+        report("逐个添加（旧）", len(files), time.perf_counter() - start, writes)
+        
+    with tempfile.TemporaryDirectory() as data_dir:
+        manager = new_manager(data_dir)
+        files = make_files(args.tracks)
+        
+        # 新方式：一次批量添加
+        elapsed, commits = timed(manager.store, lambda: manager.add_files("基准", files))
+        report("批量添加", len(files), elapsed, commits)
+        
+        # 再次添加：一半已存在，只需查路径索引
+        again = make_files(args.tracks, start=args.tracks // 2)
+        added = []
+        elapsed, commits = timed(manager.store, lambda: added.extend(manager.add_files("基准", again)))
+        report(f"批量添加（{len(added)} 首为新）", len(again), elapsed, commits)
+        
+        # 全部已存在：不写入
+        elapsed, commits = timed(manager.store, lambda: manager.add_files("基准", files))
+        report("批量添加（全部已存在）", len(files), elapsed, commits)
+        
+        # 在大播放列表中逐次移动、删除单首曲目：每次只写变化的行，连续的修改合并提交
+        size = len(manager.get_playlist("基准"))
+        
+        def move():
+            for i in range(args.edits):
+                manager.reorder_playlist("基准", (i * 7919) % size, (i * 104729) % size)
+                
+        elapsed, commits = timed(manager.store, move)
+        report(f"移动单首（{size} 首的列表）", args.edits, elapsed, commits, unit="次")
+        
+        def remove():
+            for i in range(args.edits):
+                manager.remove_from_playlist("基准", [(i * 7919) % (size - i)])
+                
+        elapsed, commits = timed(manager.store, remove)
+        report(f"删除单首（{size} 首的列表）", args.edits, elapsed, commits, unit="次")
+        
+        # 连续播放：每次都记录最近播放，recent.json合并写入
+        start = time.perf_counter()
+        for file in files[:args.edits]:
+            manager.add_to_recent(file)
+        elapsed = time.perf_counter() - start
+        manager.persister.flush()
+        report("记录最近播放", args.edits, elapsed, manager.persister.writes, unit="次")
+        
+        # 重新打开：只读取名称，打开播放列表时才加载
+        manager.close()
+        start = time.perf_counter()
+        manager = PlaylistManager(None, data_dir=data_dir)
+        names = manager.get_playlist_names()
+        opened = time.perf_counter() - start
+        start = time.perf_counter()
+        playlist = manager.get_playlist("基准")
+        print(f"重新打开 {len(names)} 个播放列表: {opened * 1000:.1f} ms  "
+              f"加载 {len(playlist)} 首: {(time.perf_counter() - start) * 1000:.1f} ms")
+        manager.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+播放列表视图基准测试
+测量PlaylistModel在大播放列表上的各项操作耗时：显示整个播放列表、生成一屏显示文本、
+按列排序、移动和删除曲目、替换曲目信息以及定位当前播放的曲目；
+这些操作都不创建或删除列表行，虚拟列表只需更新行数后重绘可见的一屏
+
+用法: python -m benchmarks.bench_playlist_view [--tracks 50000] [--edits 200] [--page 40]
+"""
+
+import argparse
+import random
+import time
+from benchmarks.bench_playlist import make_files
+from benchmarks.bench_visualizers import percentiles
+from src.gui.playlist_view import PlaylistModel, PLAYLIST_COLUMNS
+
+
+def timed(action, count):
+    """重复执行count次，返回每次的耗时（秒）"""
+    samples = []
+    for _ in range(count):
+        start = time.perf_counter()
+        action()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def report(name, samples):
+    """打印耗时的百分位数"""
+    p = percentiles(samples)
+    print(f"{name:<12} p50/p95/p99: {p['p50']:8.3f}/{p['p95']:8.3f}/{p['p99']:8.3f} ms"
+          f"（{len(samples)} 次）")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="播放列表视图基准测试")
+    parser.add_argument('--tracks', type=int, default=50000, help="播放列表中的曲目数")
+    parser.add_argument('--edits', type=int, default=200, help="移动、删除、替换等操作的次数")
+    parser.add_argument('--page', type=int, default=40, help="一屏显示的行数")
+    args = parser.parse_args()
+    
+    random.seed(0)
+    files = make_files(args.tracks)
+    model = PlaylistModel()
+    model.sort(None, True)
+    
+    report("显示列表", timed(lambda: model.set_files(files), 5))
+    model.current = args.tracks // 2
+    
+    def page():
+        # 随机滚动到一屏，生成其中各列的文本（第一次生成后缓存）
+        first = random.randrange(max(1, len(model) - args.page))
+        for row in range(first, min(first + args.page, len(model))):
+            for column in range(len(PLAYLIST_COLUMNS)):
+                model.get_text(row, column)
+                
+    report("滚动一屏", timed(page, args.edits))
+    
+    # 依次按歌曲名称、大小、修改时间和序号（播放列表顺序）排序
+    columns = iter([1, 2, 3, 0] * 5)
+    report("排序", timed(lambda: model.sort(next(columns), True), 20))
+    model.sort(None, True)
+    
+    def move():
+        count = len(model.files)
+        model.move(random.randrange(count), random.randrange(count))
+        
+    def remove():
+        model.remove([random.randrange(len(model.files) - 1)])
+        
+    def update():
+        index = random.randrange(len(model.files))
+        model.update([index], [dict(model.files[index], server_filename="重命名后的曲目.mp3")])
+        
+    report("移动", timed(move, args.edits))
+    report("删除", timed(remove, args.edits))
+    report("替换", timed(update, args.edits))
+    report("定位当前", timed(lambda: model.row_of(model.current), args.edits))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+曲库搜索基准测试
+在临时目录中用合成的目录列表建立约20万首曲目的索引，
+模拟边输入边搜索（逐字输入每个查询的每个前缀），测量每次搜索耗时的百分位数
+
+用法: python -m benchmarks.bench_search [--tracks 200000] [--per-album 12]
+          [--queries 周杰伦 晴天 "love song" qlx ...] [--plays 2000]
+"""
+
+import argparse
+import random
+import tempfile
+import time
+from benchmarks.bench_visualizers import percentiles
+from src.library_index import LibraryIndex
+
+WORDS = ("love night rain summer moon star heart dream fire city blue song "
+         "夜曲 七里香 晴天 稻香 告白气球 青花瓷 后来 红豆 十年 雨 风 花 雪 月").split()
+ARTISTS = ["周杰伦", "陈奕迅", "Taylor Swift", "Adele", "林俊杰", "王菲", "Coldplay", "Beyond"]
+QUERIES = ["周杰伦", "晴天", "七里香", "love song", "qlx", "taylor", "album 12", "e", "zzz"]
+
+
+def make_listings(tracks, per_album, seed=0):
+    """生成合成目录列表：/音乐/歌手/专辑/曲目
+    
+    Args:
+        tracks: 曲目总数
+        per_album: 每张专辑的曲目数
+        
+    Returns:
+        list: (目录路径, 文件信息字典列表)的列表
+    """
+    rng = random.Random(seed)
+    artists = ARTISTS + [f"artist {i}" for i in range(500)]
+    listings = []
+    fs_id = 0
+    for album in range(0, tracks, per_album):
+        artist = rng.choice(artists)
+        dir_path = f"/音乐/{artist}/album {album // per_album}"
+        files = []
+        for number in range(min(per_album, tracks - album)):
+            fs_id += 1
+            title = " ".join(rng.sample(WORDS, 3))
+            name = f"{number + 1:02d} {title}.mp3"
+            files.append({'fs_id': fs_id, 'path': f"{dir_path}/{name}", 'server_filename': name,
+                          'isdir': 0, 'size': rng.randint(3, 12) << 20,
+                          'server_mtime': 1700000000 + fs_id, 'category': 2})
+        listings.append((dir_path, files))
+    return listings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="曲库搜索基准测试")
+    parser.add_argument('--tracks', type=int, default=200000, help="曲目总数")
+    parser.add_argument('--per-album', type=int, default=12, help="每张专辑的曲目数")
+    parser.add_argument('--queries', nargs='+', default=QUERIES, help="搜索文本")
+    parser.add_argument('--plays', type=int, default=2000, help="模拟的播放记录数")
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as data_dir:
+        index = LibraryIndex(data_dir)
+        
+        listings = make_listings(args.tracks, args.per_album)
+        start = time.perf_counter()
+        for path, files in listings:
+            index.index_listing(path, files)
+        index.flush()
+        print(f"索引 {len(index)} 首曲目（{len(listings)} 个目录）: "
+              f"{time.perf_counter() - start:.1f} s")
+              
+        rng = random.Random(1)
+        for _ in range(args.plays):
+            index.record_play({'fs_id': rng.randint(1, args.tracks)})
+        index.flush()
+        
+        # 逐字输入：每个查询的每个前缀都搜索一次
+        samples = []
+        for query in args.queries:
+            for end in range(1, len(query) + 1):
+                start = time.perf_counter()
+                results = index.search(query[:end])
+                samples.append(time.perf_counter() - start)
+            print(f"{query!r:<14} {len(results):>4} 个结果  "
+                  f"首个: {results[0]['server_filename'] if results else '-'}")
+                  
+        p = percentiles(samples)
+        print(f"每次搜索 p50/p95/p99: {p['p50']:.2f}/{p['p95']:.2f}/{p['p99']:.2f} ms  "
+              f"最大 {max(samples) * 1000:.2f} ms（{len(samples)} 次）")
+        index.close()
+
+
+if __name__ == "__main__":
+    main()
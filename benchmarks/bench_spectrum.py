@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+频谱分析微基准测试
+对比旧版可视化器中逐帧计算的频谱与共享分析器的每秒帧数
+
+用法: python -m benchmarks.bench_spectrum [--frames N] [--consumers N]
+"""
+
+import argparse
+import time
+import numpy as np
+from src.analyzer import SpectrumAnalyzer
+
+
+def legacy_process_audio_data(data, min_db=-70, max_db=0):
+    """旧版SpectrumVisualizer/CircularVisualizer.process_audio_data的实现"""
+    windowed_data = data * np.hanning(len(data))
+    fft = np.fft.fft(windowed_data)[:len(data)//2]
+    with np.errstate(divide='ignore'):
+        magnitude = 20 * np.log10(np.abs(fft))
+    magnitude = np.clip(magnitude, min_db, max_db)
+    return (magnitude - min_db) / (max_db - min_db)
+
+
+def bench(name, func, frames):
+    """运行基准并打印每秒帧数"""
+    start = time.perf_counter()
+    for i in range(frames):
+        func(i)
+    elapsed = time.perf_counter() - start
+    print(f"{name:<40} {frames / elapsed:>12.0f} 帧/秒  ({elapsed / frames * 1e6:.1f} µs/帧)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="频谱分析微基准测试")
+    parser.add_argument('--frames', type=int, default=5000, help="每项测试的帧数")
+    parser.add_argument('--consumers', type=int, default=3, help="同时运行的可视化器数量")
+    parser.add_argument('--fft-size', type=int, default=1024, help="FFT大小")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    blocks = rng.standard_normal((64, args.fft_size)) * 0.3
+    levels = np.zeros(args.fft_size // 2)
+
+    analyzer = SpectrumAnalyzer(fft_size=args.fft_size)
+
+    print(f"FFT大小: {args.fft_size}, 可视化器数量: {args.consumers}\n")
+
+    bench("旧版: 单个可视化器",
+          lambda i: legacy_process_audio_data(blocks[i % 64]), args.frames)
+    bench("共享分析器: analyze + normalize",
+          lambda i: SpectrumAnalyzer.normalize(
+              analyzer.analyze(blocks[i % 64], key=i), -70, 0, out=levels),
+          args.frames)
+
+    def legacy_many(i):
+        for _ in range(args.consumers):
+            legacy_process_audio_data(blocks[i % 64])
+
+    def shared_many(i):
+        # 同一音频位置只计算一次，其余可视化器命中缓存
+        for _ in range(args.consumers):
+            SpectrumAnalyzer.normalize(
+                analyzer.analyze(blocks[i % 64], key=i), -70, 0, out=levels)
+
+    bench(f"旧版: {args.consumers}个可视化器", legacy_many, args.frames)
+    bench(f"共享分析器: {args.consumers}个可视化器", shared_many, args.frames)
+
+    # STFT推流：50%重叠，每次推入一个跳步
+    hop = analyzer.hop_size
+    stream = rng.standard_normal(hop * 64) * 0.3
+    bench("共享分析器: push (50%重叠STFT)",
+          lambda i: analyzer.push(stream[(i % 64) * hop:(i % 64 + 1) * hop]),
+          args.frames)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,383 @@
+#!/usr/bin/env python3
+"""
+可视化器基准测试
+对src/gui/visualizer/中的每个VisualizerBase子类，用合成信号（正弦扫频、噪声、
+静音、瞬态）驱动替身播放器，在离屏wx.MemoryDC上分别测量direct模式
+（GraphicsContext绘制）和threaded模式（render_frame + paint_frame）的
+每帧分析耗时、绘制耗时的百分位数以及每帧内存分配
+
+无显示的Linux环境下自动通过xvfb-run在虚拟显示上重新运行
+
+用法: python -m benchmarks.bench_visualizers [--sizes 320x120 800x200 1920x300]
+          [--signals sweep noise silence transients] [--modes direct threaded]
+          [--visualizer spectrum ...] [--frames N] [--json 结果文件]
+          [--baseline 基线文件] [--tolerance 0.2]
+"""
+
+import argparse
+import importlib
+import json
+import os
+import pkgutil
+import shutil
+import sys
+import time
+import tracemalloc
+import numpy as np
+
+SAMPLE_RATE = 44100
+SIGNAL_SECONDS = 10
+SIGNALS = ('sweep', 'noise', 'silence', 'transients')
+MODES = ('direct', 'threaded')
+
+# 与基线比较时忽略小于该值（毫秒）的差异，避免计时噪声误报
+NOISE_FLOOR_MS = 0.05
+
+
+def ensure_display(module='benchmarks.bench_visualizers'):
+    """Linux下没有DISPLAY时通过xvfb-run在虚拟显示上重新执行自身
+    
+    Args:
+        module: 重新执行的基准测试模块名
+    """
+    if not sys.platform.startswith('linux'):
+        return
+    if os.environ.get('DISPLAY') or os.environ.get('WAYLAND_DISPLAY'):
+        return
+    if os.environ.get('BENCH_UNDER_XVFB'):
+        sys.exit("xvfb-run未能提供虚拟显示")
+        
+    xvfb = shutil.which('xvfb-run')
+    if not xvfb:
+        sys.exit("没有可用的显示：请设置DISPLAY或安装xvfb（xvfb-run）")
+        
+    os.environ['BENCH_UNDER_XVFB'] = '1'
+    os.execv(xvfb, [xvfb, '-a', '-s', '-screen 0 1920x1080x24',
+                    sys.executable, '-m', module, *sys.argv[1:]])
+
+
+def make_signal(name, seconds=SIGNAL_SECONDS, sample_rate=SAMPLE_RATE):
+    """生成合成测试信号
+    
+    Args:
+        name: 信号类型（sweep、noise、silence、transients）
+        seconds: 时长（秒）
+        sample_rate: 采样率
+        
+    Returns:
+        numpy.ndarray: 单声道浮点信号
+    """
+    count = int(seconds * sample_rate)
+    t = np.arange(count) / sample_rate
+    rng = np.random.default_rng(0)
+    
+    if name == 'sweep':
+        # 每5秒从20Hz到20kHz的对数扫频
+        period = 5.0
+        f0, f1 = 20.0, 20000.0
+        k = np.log(f1 / f0)
+        phase = 2 * np.pi * f0 * period / k * (np.exp((t % period) * k / period) - 1)
+        return 0.5 * np.sin(phase)
+    if name == 'noise':
+        return rng.standard_normal(count) * 0.3
+    if name == 'silence':
+        return np.zeros(count)
+    if name == 'transients':
+        # 每0.5秒一次鼓点：衰减的低频正弦加噪声起音
+        signal = rng.standard_normal(count) * 0.01
+        length = int(0.25 * sample_rate)
+        hit_t = np.arange(length) / sample_rate
+        hit = np.sin(2 * np.pi * 60 * hit_t) * np.exp(-hit_t * 20)
+        hit[:256] += rng.standard_normal(256) * np.linspace(0.8, 0, 256)
+        for start in range(0, count - length, int(0.5 * sample_rate)):
+            signal[start:start + length] += hit
+        return signal
+    raise ValueError(f"未知信号类型: {name}")
+
+
+class FakePlayer:
+    """只提供可视化器所需接口的播放器替身，按STFT跳步循环推入合成信号"""
+
+    def __init__(self, signal):
+        from src.analyzer import SpectrumAnalyzer
+        self.analyzer = SpectrumAnalyzer(fft_size=1024, sample_rate=SAMPLE_RATE)
+        self.signal = signal
+        self.position = 0
+
+    def is_playing(self):
+        return True
+
+    def has_audio_data(self):
+        return True
+
+    def advance(self):
+        """推进一个STFT跳步"""
+        hop = self.analyzer.hop_size
+        if self.position + hop > len(self.signal):
+            self.position = 0
+        self.analyzer.push(self.signal[self.position:self.position + hop])
+        self.position += hop
+
+    def get_audio_data(self, out=None):
+        return self.analyzer.get_samples(out=out)
+
+    def get_spectrum_data(self):
+        return self.analyzer.spectrum
+
+
+def discover_visualizers():
+    """导入可视化器包中的所有模块并收集VisualizerBase的子类
+    
+    Returns:
+        dict: 名称（类名去掉Visualizer后缀，小写）到类的映射
+    """
+    import src.gui.visualizer as package
+    from src.gui.visualizer.visualizer_base import VisualizerBase
+    
+    for module_info in pkgutil.iter_modules(package.__path__):
+        importlib.import_module(f"{package.__name__}.{module_info.name}")
+        
+    found = {}
+    pending = list(VisualizerBase.__subclasses__())
+    while pending:
+        cls = pending.pop()
+        pending.extend(cls.__subclasses__())
+        name = cls.__name__
+        if name.endswith('Visualizer'):
+            name = name[:-len('Visualizer')]
+        found[name.lower()] = cls
+    return dict(sorted(found.items()))
+
+
+class FrameRunner:
+    """在离屏位图上按指定模式逐帧驱动一个可视化器"""
+    
+    def __init__(self, visualizer, player, mode, width, height):
+        import wx
+        self.visualizer = visualizer
+        self.player = player
+        self.mode = mode
+        self.width = width
+        self.height = height
+        
+        self.bitmap = wx.Bitmap(width, height, 32)
+        self.dc = wx.MemoryDC(self.bitmap)
+        self.gc = wx.GraphicsContext.Create(self.dc) if mode == 'direct' else None
+        self.background = wx.Brush(visualizer.config['background'])
+        visualizer.ensure_layout(width, height)
+        
+    def analyze(self):
+        """推进音频并计算一帧（update_frame）"""
+        self.player.advance()
+        self.visualizer.update_frame(self.width, self.height)
+        
+    def render(self):
+        """绘制一帧：direct模式为GraphicsContext绘制，threaded模式为生成帧并复制到DC"""
+        if self.mode == 'direct':
+            self.gc.SetBrush(self.background)
+            self.gc.DrawRectangle(0, 0, self.width, self.height)
+            self.visualizer.draw(self.gc, self.width, self.height)
+            self.gc.Flush()
+        else:
+            self.visualizer.render_frame(self.width, self.height)
+            self.visualizer.paint_frame(self.dc, self.width, self.height)
+            
+    def close(self):
+        import wx
+        self.gc = None
+        self.dc.SelectObject(wx.NullBitmap)
+
+
+def percentiles(samples):
+    """计算p50/p95/p99（毫秒）"""
+    p50, p95, p99 = np.percentile(np.asarray(samples) * 1000, [50, 95, 99])
+    return {'p50': float(p50), 'p95': float(p95), 'p99': float(p99)}
+
+
+def measure_allocations(runner, frames):
+    """用tracemalloc测量每帧的内存分配
+
+    Args:
+        runner: FrameRunner实例
+        frames: 测量帧数
+
+    Returns:
+        dict: 每帧临时分配峰值的中位数和每帧净增长（KB）
+    """
+    tracemalloc.start()
+    try:
+        peaks = []
+        start_current = tracemalloc.get_traced_memory()[0]
+        for _ in range(frames):
+            before = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            runner.analyze()
+            runner.render()
+            peaks.append(tracemalloc.get_traced_memory()[1] - before)
+        growth = tracemalloc.get_traced_memory()[0] - start_current
+    finally:
+        tracemalloc.stop()
+    return {
+        'alloc_kb': float(np.median(peaks)) / 1024,
+        'growth_kb': growth / 1024 / frames,
+    }
+
+
+def run_case(cls, parent, signal, mode, width, height, frames, warmup, alloc_frames):
+    """测量一个可视化器在一种模式、信号和尺寸下的每帧开销
+    
+    Returns:
+        dict: 分析与绘制耗时百分位数和内存分配
+    """
+    player = FakePlayer(signal)
+    visualizer = cls(parent, player)
+    visualizer.stop()
+    visualizer.config['render_mode'] = mode
+    visualizer.SetSize((width, height))
+    runner = FrameRunner(visualizer, player, mode, width, height)
+    
+    try:
+        for _ in range(warmup):
+            runner.analyze()
+            runner.render()
+            
+        analysis_times = []
+        draw_times = []
+        for _ in range(frames):
+            start = time.perf_counter()
+            runner.analyze()
+            middle = time.perf_counter()
+            runner.render()
+            end = time.perf_counter()
+            analysis_times.append(middle - start)
+            draw_times.append(end - middle)
+            
+        result = {
+            'analysis': percentiles(analysis_times),
+            'draw': percentiles(draw_times),
+        }
+        if alloc_frames:
+            result.update(measure_allocations(runner, alloc_frames))
+        return result
+    finally:
+        runner.close()
+        visualizer.Destroy()
+
+
+def case_key(record):
+    """结果记录在基线中的键"""
+    return (record['visualizer'], record['mode'], record['signal'], record['size'])
+
+
+def compare_baseline(results, baseline, tolerance):
+    """与基线比较p95耗时
+    
+    Args:
+        results: 本次结果记录列表
+        baseline: 基线结果记录列表
+        tolerance: 允许的相对增长（如0.2表示20%）
+        
+    Returns:
+        list: 退化项描述
+    """
+    previous = {case_key(record): record for record in baseline}
+    regressions = []
+    for record in results:
+        old = previous.get(case_key(record))
+        if old is None:
+            continue
+        for phase in ('analysis', 'draw'):
+            new_p95 = record[phase]['p95']
+            old_p95 = old[phase]['p95']
+            if new_p95 > old_p95 * (1 + tolerance) and new_p95 - old_p95 > NOISE_FLOOR_MS:
+                regressions.append(
+                    f"{'/'.join(case_key(record))} {phase} p95: "
+                    f"{old_p95:.3f} ms -> {new_p95:.3f} ms")
+    return regressions
+
+
+def parse_size(value):
+    """解析WxH格式的尺寸"""
+    try:
+        width, height = value.lower().split('x')
+        return int(width), int(height)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"尺寸格式应为WxH: {value}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="可视化器基准测试")
+    parser.add_argument('--sizes', type=parse_size, nargs='+',
+                        default=[(320, 120), (800, 200), (1920, 300)], help="绘制尺寸，格式WxH")
+    parser.add_argument('--signals', choices=SIGNALS, nargs='+', default=list(SIGNALS))
+    parser.add_argument('--modes', choices=MODES, nargs='+', default=list(MODES))
+    parser.add_argument('--visualizer', nargs='+', help="只测试指定的可视化器")
+    parser.add_argument('--frames', type=int, default=200, help="每项计时帧数")
+    parser.add_argument('--warmup', type=int, default=20, help="每项预热帧数")
+    parser.add_argument('--alloc-frames', type=int, default=30, help="测量内存分配的帧数，0为不测量")
+    parser.add_argument('--json', help="将结果写入JSON文件")
+    parser.add_argument('--baseline', help="与之前--json输出的基线比较，退化时以非零状态退出")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="基线比较允许的相对增长")
+    args = parser.parse_args()
+
+    ensure_display()
+    
+    import wx
+    app = wx.App(False)
+    frame = wx.Frame(None)
+
+    visualizers = discover_visualizers()
+    if args.visualizer:
+        unknown = set(args.visualizer) - set(visualizers)
+        if unknown:
+            parser.error(f"未知可视化器: {', '.join(sorted(unknown))}（可选: {', '.join(visualizers)}）")
+        visualizers = {name: visualizers[name] for name in args.visualizer}
+
+    signals = {name: make_signal(name) for name in args.signals}
+    
+    print(f"{'可视化器':<12} {'模式':<9} {'信号':<11} {'尺寸':<10} "
+          f"{'分析 p50/p95/p99 (ms)':<24} {'绘制 p50/p95/p99 (ms)':<24} 分配KB/帧")
+    results = []
+    for name, cls in visualizers.items():
+        for mode in args.modes:
+            for signal_name, signal in signals.items():
+                for width, height in args.sizes:
+                    result = run_case(cls, frame, signal, mode, width, height,
+                                      args.frames, args.warmup, args.alloc_frames)
+                    record = {
+                        'visualizer': name,
+                        'mode': mode,
+                        'signal': signal_name,
+                        'size': f"{width}x{height}",
+                    }
+                    record.update(result)
+                    results.append(record)
+                    
+                    analysis = result['analysis']
+                    draw = result['draw']
+                    alloc = f"{result['alloc_kb']:8.1f}" if 'alloc_kb' in result else '       -'
+                    print(f"{name:<12} {mode:<9} {signal_name:<11} {record['size']:<10} "
+                          f"{analysis['p50']:6.3f}/{analysis['p95']:6.3f}/{analysis['p99']:6.3f}    "
+                          f"{draw['p50']:6.3f}/{draw['p95']:6.3f}/{draw['p99']:6.3f}    {alloc}")
+                          
+    frame.Destroy()
+    app.Destroy()
+    
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+            
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare_baseline(results, baseline, args.tolerance)
+        if regressions:
+            print("\n性能退化:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print("\n未发现性能退化")
+
+
+if __name__ == "__main__":
+    main()
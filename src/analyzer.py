@@ -0,0 +1,332 @@
+"""
+音频频谱分析模块
+为播放器和所有可视化器提供共享的频谱分析服务
+"""
+
+import threading
+import numpy as np
+from functools import lru_cache
+from typing import Callable, Dict, Hashable, List, Optional
+
+# numpy>=2.0 的 rfft 支持 out 参数，可直接写入预分配的复数缓冲区
+try:
+    np.fft.rfft(np.zeros(4), out=np.zeros(3, dtype=np.complex128))
+    _RFFT_HAS_OUT = True
+except TypeError:
+    _RFFT_HAS_OUT = False
+
+
+def _hz_to_mel(freq):
+    """赫兹转换为梅尔刻度"""
+    return 2595.0 * np.log10(1.0 + np.asarray(freq) / 700.0)
+
+
+def _mel_to_hz(mel):
+    """梅尔刻度转换为赫兹"""
+    return 700.0 * (10.0 ** (np.asarray(mel) / 2595.0) - 1.0)
+
+
+@lru_cache(maxsize=32)
+def get_band_starts(fft_size: int, bar_count: int, sample_rate: int,
+                    scale: str = 'log', f_min: float = 30.0) -> np.ndarray:
+    """计算频谱柱到FFT频点的映射（带缓存）
+
+    每根频谱柱覆盖[starts[i], starts[i+1])内的频点，可直接用于
+    ufunc.reduceat做一次向量化聚合。低频处频点不足时，相邻的柱会
+    共享同一个频点，而不是像线性插值那样在高频处跳过频点。
+
+    Args:
+        fft_size: FFT大小
+        bar_count: 频谱柱数量
+        sample_rate: 采样率
+        scale: 频率刻度，'log'（对数）或'mel'（梅尔）
+        f_min: 最低显示频率（赫兹）
+
+    Returns:
+        每根频谱柱的起始频点索引（只读）
+    """
+    num_bins = fft_size // 2
+    nyquist = sample_rate / 2.0
+    f_min = min(f_min, nyquist / 2)
+
+    if scale == 'mel':
+        edges = _mel_to_hz(np.linspace(_hz_to_mel(f_min), _hz_to_mel(nyquist), bar_count + 1))
+    else:
+        edges = np.geomspace(f_min, nyquist, bar_count + 1)
+
+    # 跳过直流分量所在的第0个频点
+    starts = np.floor(edges[:-1] * fft_size / sample_rate).astype(np.intp)
+    np.clip(starts, 1, num_bins - 1, out=starts)
+    starts.flags.writeable = False
+    return starts
+
+
+def map_bands(spectrum: np.ndarray, starts: np.ndarray,
+              out: Optional[np.ndarray] = None) -> np.ndarray:
+    """按预计算的映射将频谱聚合为频谱柱（取每段的峰值）
+
+    Args:
+        spectrum: 归一化频谱
+        starts: get_band_starts()返回的起始索引
+        out: 输出缓冲区，长度与starts相同
+
+    Returns:
+        每根频谱柱的值
+    """
+    return np.maximum.reduceat(spectrum, starts, out=out)
+
+
+class SpectrumAnalyzer:
+    """共享频谱分析器
+
+    缓存窗函数，使用实数FFT并复用预分配的输出缓冲区。
+    PCM数据通过push()按STFT跳步（可重叠）推入，每一帧只计算一次，
+    播放器和所有可视化器读取同一份结果。
+    """
+
+    def __init__(self, fft_size: int = 1024, hop_size: Optional[int] = None,
+                 sample_rate: int = 44100, floor_db: float = -120.0):
+        """初始化频谱分析器
+
+        Args:
+            fft_size: FFT大小（帧长）
+            hop_size: STFT跳步大小，默认为帧长的一半（50%重叠）
+            sample_rate: 采样率
+            floor_db: 幅度为零时使用的最小分贝值，避免log10(0)
+        """
+        self.fft_size = fft_size
+        self.hop_size = hop_size or fft_size // 2
+        self.sample_rate = sample_rate
+        self.floor_db = floor_db
+        self.num_bins = fft_size // 2
+
+        # 窗函数缓存（按长度）
+        self._windows: Dict[int, np.ndarray] = {}
+
+        # 预分配的计算缓冲区
+        self._frame = np.zeros(fft_size)
+        self._complex = np.zeros(fft_size // 2 + 1, dtype=np.complex128)
+        self._floor = 10.0 ** (floor_db / 20.0)
+
+        # 双缓冲的输出频谱（分贝），读者拿到的引用在下一帧计算时不会被改写
+        self._spectra = [np.full(self.num_bins, floor_db) for _ in range(2)]
+        self._front = 0
+        self.frame_index = 0
+
+        # analyze()的结果缓存
+        self._cache_key: Optional[Hashable] = None
+
+        # STFT环形缓冲区
+        self._ring = np.zeros(fft_size)
+        self._ring_pos = 0
+        self._pending = 0
+
+        self._lock = threading.Lock()
+
+        # 每帧计算完成后调用的监听器（见add_listener）
+        self._listeners: List[Callable[[np.ndarray], None]] = []
+
+    @property
+    def spectrum(self) -> np.ndarray:
+        """最新一帧频谱（分贝），调用方不应修改返回的数组"""
+        return self._spectra[self._front]
+
+    def add_listener(self, callback: Callable[[np.ndarray], None]) -> None:
+        """添加帧监听器，push()每计算出一帧频谱就调用一次
+
+        监听器在push()的调用线程中、持有分析器锁时被调用，应尽快返回，
+        且不能再调用本分析器的方法
+
+        Args:
+            callback: 回调函数，参数为该帧频谱（分贝，只读）
+        """
+        if callback not in self._listeners:
+            self._listeners = self._listeners + [callback]
+
+    def remove_listener(self, callback: Callable[[np.ndarray], None]) -> None:
+        """移除帧监听器
+
+        Args:
+            callback: add_listener()添加的回调函数
+        """
+        self._listeners = [listener for listener in self._listeners if listener != callback]
+
+    def get_window(self, size: int) -> np.ndarray:
+        """获取指定长度的汉宁窗（带缓存）
+
+        Args:
+            size: 窗口长度
+
+        Returns:
+            汉宁窗数组
+        """
+        window = self._windows.get(size)
+        if window is None:
+            window = np.hanning(size)
+            window.flags.writeable = False
+            self._windows[size] = window
+        return window
+
+    def analyze(self, data: np.ndarray, key: Optional[Hashable] = None) -> np.ndarray:
+        """分析一帧音频数据
+
+        Args:
+            data: 原始音频数据，超过帧长时取最后fft_size个采样，不足时补零
+            key: 帧标识（如音频位置），与上一次相同时直接返回缓存结果
+
+        Returns:
+            频谱数组（分贝），长度为fft_size // 2
+        """
+        with self._lock:
+            if key is not None and key == self._cache_key:
+                return self.spectrum
+
+            data = np.asarray(data, dtype=np.float64).ravel()
+            if len(data) > self.fft_size:
+                data = data[-self.fft_size:]
+            n = len(data)
+
+            # 加窗，写入预分配的帧缓冲区
+            if n:
+                np.multiply(data, self.get_window(n), out=self._frame[:n])
+            self._frame[n:] = 0
+
+            self._compute()
+            self._cache_key = key
+            return self.spectrum
+
+    def push(self, samples: np.ndarray) -> int:
+        """推入PCM数据，每累积hop_size个采样计算一帧
+
+        Args:
+            samples: 单声道PCM采样
+
+        Returns:
+            本次新计算的帧数
+        """
+        samples = np.asarray(samples, dtype=np.float64).ravel()
+        produced = 0
+
+        with self._lock:
+            offset = 0
+            total = len(samples)
+            while offset < total:
+                take = min(self.hop_size - self._pending, total - offset)
+                self._write_ring(samples[offset:offset + take])
+                offset += take
+                self._pending += take
+
+                if self._pending >= self.hop_size:
+                    self._pending = 0
+                    # 将环形缓冲区按时间顺序展开到帧缓冲区并加窗
+                    tail = self.fft_size - self._ring_pos
+                    self._frame[:tail] = self._ring[self._ring_pos:]
+                    self._frame[tail:] = self._ring[:self._ring_pos]
+                    self._frame *= self.get_window(self.fft_size)
+                    self._compute()
+                    self._cache_key = None
+                    produced += 1
+
+                    for listener in self._listeners:
+                        try:
+                            listener(self.spectrum)
+                        except Exception as e:
+                            print(f"频谱帧监听器出错: {e}")
+
+        return produced
+
+    def get_samples(self, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """获取最近fft_size个采样（按时间顺序）
+
+        Args:
+            out: 输出缓冲区，长度为fft_size；为None时分配新数组
+
+        Returns:
+            采样数组
+        """
+        if out is None:
+            out = np.empty(self.fft_size)
+        with self._lock:
+            tail = self.fft_size - self._ring_pos
+            out[:tail] = self._ring[self._ring_pos:]
+            out[tail:] = self._ring[:self._ring_pos]
+        return out
+
+    def reset(self) -> None:
+        """清空缓冲区和频谱（切换曲目时调用）"""
+        with self._lock:
+            self._ring[:] = 0
+            self._ring_pos = 0
+            self._pending = 0
+            for spectrum in self._spectra:
+                spectrum[:] = self.floor_db
+            self._cache_key = None
+
+    def stft(self, signal: np.ndarray) -> np.ndarray:
+        """批量计算整段信号的STFT频谱（离线分析用）
+
+        Args:
+            signal: 单声道PCM采样
+
+        Returns:
+            二维数组(帧数, fft_size // 2)，单位为分贝
+        """
+        signal = np.asarray(signal, dtype=np.float64).ravel()
+        if len(signal) < self.fft_size:
+            signal = np.pad(signal, (0, self.fft_size - len(signal)))
+
+        frames = np.lib.stride_tricks.sliding_window_view(signal, self.fft_size)[::self.hop_size]
+        magnitude = np.abs(np.fft.rfft(frames * self.get_window(self.fft_size), axis=1))
+        magnitude = magnitude[:, :self.num_bins]
+        np.maximum(magnitude, self._floor, out=magnitude)
+        np.log10(magnitude, out=magnitude)
+        magnitude *= 20
+        return magnitude
+
+    @staticmethod
+    def normalize(spectrum: np.ndarray, min_db: float, max_db: float,
+                  gain_db: float = 0.0, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """将分贝频谱归一化到0-1范围
+
+        Args:
+            spectrum: 分贝频谱
+            min_db: 最小分贝值
+            max_db: 最大分贝值
+            gain_db: 附加增益（分贝）
+            out: 输出缓冲区
+
+        Returns:
+            归一化后的频谱
+        """
+        out = np.add(spectrum, gain_db - min_db, out=out)
+        np.clip(out, 0, max_db - min_db, out=out)
+        out *= 1.0 / (max_db - min_db)
+        return out
+
+    def _write_ring(self, chunk: np.ndarray) -> None:
+        """写入环形缓冲区（chunk长度不超过fft_size）"""
+        n = len(chunk)
+        end = self._ring_pos + n
+        if end <= self.fft_size:
+            self._ring[self._ring_pos:end] = chunk
+        else:
+            split = self.fft_size - self._ring_pos
+            self._ring[self._ring_pos:] = chunk[:split]
+            self._ring[:n - split] = chunk[split:]
+        self._ring_pos = end % self.fft_size
+
+    def _compute(self) -> None:
+        """对帧缓冲区执行FFT，结果写入后台频谱缓冲区后交换"""
+        if _RFFT_HAS_OUT:
+            np.fft.rfft(self._frame, out=self._complex)
+        else:
+            self._complex[:] = np.fft.rfft(self._frame)
+
+        back = self._spectra[1 - self._front]
+        np.abs(self._complex[:self.num_bins], out=back)
+        np.maximum(back, self._floor, out=back)
+        np.log10(back, out=back)
+        back *= 20
+
+        self._front = 1 - self._front
+        self.frame_index += 1
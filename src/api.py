@@ -1,11 +1,79 @@
 import os
 import json
 import time
+import threading
 import requests
 from typing import Dict, List, Optional, Any
 from urllib.parse import urlencode
+from src.listing_cache import ListingCache
+
+class RateLimitedError(Exception):
+    """后台请求因速率预算不足而被跳过"""
+    pass
+
+class RateBudget:
+    """令牌桶形式的接口请求速率预算（线程安全）"""
+    
+    def __init__(self, rate: float = 5.0, burst: int = 10):
+        """初始化速率预算
+        
+        Args:
+            rate: 每秒补充的请求数
+            burst: 最多可累积的请求数
+        """
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        
+    def _refill(self) -> None:
+        """按流逝的时间补充令牌（调用方持有锁）"""
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        
+    @property
+    def available(self) -> float:
+        """当前可用的请求数"""
+        with self._lock:
+            self._refill()
+            return self._tokens
+            
+    def try_acquire(self, reserve: float = 0.0) -> bool:
+        """在剩余令牌多于保留量时取一个令牌，不等待
+        
+        Args:
+            reserve: 为前台请求保留的令牌数
+            
+        Returns:
+            是否取得
+        """
+        with self._lock:
+            self._refill()
+            if self._tokens - 1 < reserve:
+                return False
+            self._tokens -= 1
+            return True
+            
+    def acquire(self) -> None:
+        """取一个令牌，不足时等待"""
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
 
 class BaiduPanAPI:
+    # 后台请求（如预取）必须为前台请求留下的令牌数
+    BACKGROUND_RESERVE = 5
+    
+    # filemetas每次最多查询的fs_id数
+    FILEMETAS_LIMIT = 100
+    
     def __init__(self, auth_manager):
         """初始化百度网盘API客户端
         
@@ -17,7 +85,14 @@ class BaiduPanAPI:
         self.cache_dir = os.path.join(os.path.expanduser("~"), ".dupan", "cache")
         os.makedirs(self.cache_dir, exist_ok=True)
         
-    def _make_request(self, method: str, endpoint: str, params: Dict = None, data: Dict = None) -> Dict:
+        # 所有请求共享的速率预算
+        self.rate_budget = RateBudget()
+        
+        # 目录列表缓存
+        self.listing_cache = ListingCache()
+        
+    def _make_request(self, method: str, endpoint: str, params: Dict = None, data: Dict = None,
+                      background: bool = False) -> Dict:
         """发送API请求
         
         Args:
@@ -25,13 +100,22 @@ class BaiduPanAPI:
             endpoint: API端点
             params: URL参数
             data: POST数据
-            
+            background: 是否为后台请求，后台请求只使用保留量以外的预算，
+                        不足时抛出RateLimitedError而不是等待
+                        
         Returns:
             API响应数据
         """
         if params is None:
             params = {}
-        
+            
+        # 速率预算
+        if background:
+            if not self.rate_budget.try_acquire(self.BACKGROUND_RESERVE):
+                raise RateLimitedError("请求速率预算不足")
+        else:
+            self.rate_budget.acquire()
+            
         # 添加access_token到参数中
         params['access_token'] = self.auth_manager.get_access_token()
         
@@ -59,6 +143,47 @@ class BaiduPanAPI:
         Returns:
             文件列表
         """
+        all_files = []
+        for files in self.iter_file_pages(dir_path):
+            for file in files:
+                # 如果指定了文件类型过滤，则只返回匹配的文件
+                if file_types and file['isdir'] == 0:
+                    ext = os.path.splitext(file['server_filename'])[1].lower()
+                    if ext not in file_types:
+                        continue
+                        
+                all_files.append(file)
+                
+                # 如果是目录且需要递归，则获取子目录内容
+                if recursive and file['isdir'] == 1:
+                    sub_files = self.list_files(file['path'], recursive, file_types)
+                    all_files.extend(sub_files)
+                    
+        return all_files
+        
+    def iter_file_pages(self, dir_path: str = "/", page_size: int = 1000,
+                        use_cache: bool = True, background: bool = False):
+        """逐页获取目录下的文件列表（不递归）
+        
+        每页单独请求，调用方可在两页之间停止迭代，后续页不会再请求。
+        完整获取的列表写入目录列表缓存，缓存有效时直接作为一页返回
+        
+        Args:
+            dir_path: 目录路径
+            page_size: 每页文件数（接口上限为1000）
+            use_cache: 是否使用缓存（刷新时为False）
+            background: 是否为后台请求（见_make_request）
+            
+        Yields:
+            每页的文件列表
+        """
+        if use_cache:
+            cached = self.listing_cache.get(dir_path)
+            if cached is not None:
+                if cached:
+                    yield cached
+                return
+                
         params = {
             'method': 'list',
             'dir': dir_path,
@@ -66,65 +191,86 @@ class BaiduPanAPI:
             'order': 'name',
             'desc': 0,
             'start': 0,
-            'limit': 1000,
+            'limit': page_size,
             'folder': 0,
             'showempty': 1
         }
         
-        all_files = []
+        listing = []
         while True:
-            result = self._make_request('GET', 'xpan/file', params=params)
+            result = self._make_request('GET', 'xpan/file', params=params, background=background)
             
-            if 'list' not in result:
-                break
-                
-            files = result['list']
+            files = result.get('list')
             if not files:
                 break
                 
-            for file in files:
-                # 如果指定了文件类型过滤，则只返回匹配的文件
-                if file_types and file['isdir'] == 0:
-                    ext = os.path.splitext(file['server_filename'])[1].lower()
-                    if ext not in file_types:
-                        continue
-                        
-                all_files.append(file)
-                
-                # 如果是目录且需要递归，则获取子目录内容
-                if recursive and file['isdir'] == 1:
-                    sub_files = self.list_files(file['path'], recursive, file_types)
-                    all_files.extend(sub_files)
-            
-            params['start'] += len(files)
+            listing.extend(files)
+            yield files
             
             # 如果返回的文件数小于limit，说明已经获取完所有文件
             if len(files) < params['limit']:
                 break
-                
-        return all_files
+            params['start'] += len(files)
+            
+        self.listing_cache.put(dir_path, listing)
         
-    def get_file_download_url(self, fs_id: int) -> str:
-        """获取文件的下载链接
+    def prefetch_listing(self, dir_path: str) -> bool:
+        """以后台优先级把目录列表预取到缓存
         
         Args:
-            fs_id: 文件的fs_id
+            dir_path: 目录路径
             
         Returns:
-            文件下载链接
+            缓存中是否已有该目录的列表，速率预算不足时返回False
+        """
+        if self.listing_cache.contains(dir_path):
+            return True
+        try:
+            for _ in self.iter_file_pages(dir_path, use_cache=False, background=True):
+                pass
+        except RateLimitedError:
+            return False
+        return True
+        
+    def get_file_metas(self, fs_ids: List[int], dlink: bool = False,
+                       background: bool = False) -> List[Dict]:
+        """批量获取文件信息
+        
+        Args:
+            fs_ids: 文件的fs_id列表，最多FILEMETAS_LIMIT个
+            dlink: 是否同时获取下载链接
+            background: 是否为后台请求（见_make_request）
+            
+        Returns:
+            仍然存在的文件的信息列表，已删除的文件不在其中
         """
+        if len(fs_ids) > self.FILEMETAS_LIMIT:
+            raise ValueError(f"filemetas每次最多查询{self.FILEMETAS_LIMIT}个文件")
+            
         params = {
             'method': 'filemetas',
-            'dlink': 1,
-            'fsids': f"[{fs_id}]"
+            'fsids': json.dumps([int(fs_id) for fs_id in fs_ids])
         }
+        if dlink:
+            params['dlink'] = 1
+            
+        result = self._make_request('GET', 'xpan/multimedia', params=params, background=background)
+        return result.get('list') or []
         
-        result = self._make_request('GET', 'xpan/multimedia', params=params)
+    def get_file_download_url(self, fs_id: int) -> str:
+        """获取文件的下载链接
         
-        if not result.get('list') or len(result['list']) == 0:
+        Args:
+            fs_id: 文件的fs_id
+            
+        Returns:
+            文件下载链接
+        """
+        metas = self.get_file_metas([fs_id], dlink=True)
+        if not metas:
             raise Exception(f"无法获取文件下载链接，fs_id: {fs_id}")
             
-        dlink = result['list'][0]['dlink']
+        dlink = metas[0]['dlink']
         
         # 为下载链接添加access_token
         return f"{dlink}&access_token={self.auth_manager.get_access_token()}"
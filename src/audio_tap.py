@@ -0,0 +1,144 @@
+"""
+音频采集模块
+通过VLC的音频回调取得解码后的PCM数据：用PyAudio播放，同时混为单声道交给分析器
+"""
+
+import ctypes
+import threading
+import numpy as np
+import vlc
+from typing import Callable, Optional
+
+try:
+    import pyaudio
+except ImportError:
+    pyaudio = None
+
+
+class AudioTap:
+    """VLC解码音频的采集与输出
+    
+    设置音频回调后VLC自身不再输出声音，由本类播放解码后的PCM；
+    音量仍由VLC在软件中处理，播放器的audio_set_volume()照常生效
+    """
+    
+    # VLC输出的采样格式：本机字节序的16位有符号整数
+    FORMAT = "S16N"
+    
+    def __init__(self, sink: Callable[[np.ndarray], None],
+                 sample_rate: int = 44100, channels: int = 2):
+        """初始化音频采集并打开PyAudio输出流
+        
+        Args:
+            sink: 接收单声道PCM采样（-1到1）的回调，在VLC的音频线程中调用；
+                采样数组在回调返回后会被复用
+            sample_rate: 采样率
+            channels: 声道数
+        """
+        self.sink = sink
+        self.sample_rate = sample_rate
+        self.channels = channels
+        
+        self._audio = pyaudio.PyAudio()
+        try:
+            self._stream = self._audio.open(format=pyaudio.paInt16, channels=channels,
+                                            rate=sample_rate, output=True)
+        except Exception:
+            self._audio.terminate()
+            raise
+        self._lock = threading.Lock()
+        
+        # 混音缓冲区，按最大块长度增长后复用
+        self._mono = np.empty(0)
+        
+        # ctypes回调对象必须保持引用，否则会被回收
+        self._callbacks = (
+            vlc.CallbackDecorators.AudioPlayCb(self._play),
+            vlc.CallbackDecorators.AudioPauseCb(self._pause),
+            vlc.CallbackDecorators.AudioResumeCb(self._resume),
+            vlc.CallbackDecorators.AudioFlushCb(self._flush),
+            vlc.CallbackDecorators.AudioDrainCb(self._drain),
+        )
+        
+    @classmethod
+    def attach(cls, media_player, sink: Callable[[np.ndarray], None],
+               sample_rate: int = 44100, channels: int = 2) -> Optional['AudioTap']:
+        """创建音频采集并安装到VLC播放器
+        
+        Args:
+            media_player: VLC MediaPlayer
+            sink: 接收单声道PCM采样的回调
+            sample_rate: 采样率
+            channels: 声道数
+            
+        Returns:
+            音频采集对象；PyAudio不可用或无法打开输出设备时返回None，
+            此时不安装回调，由VLC照常输出声音
+        """
+        if pyaudio is None:
+            return None
+            
+        try:
+            tap = cls(sink, sample_rate, channels)
+        except Exception as e:
+            print(f"打开音频输出失败: {str(e)}")
+            return None
+            
+        media_player.audio_set_callbacks(*tap._callbacks, None)
+        media_player.audio_set_format(cls.FORMAT, sample_rate, channels)
+        return tap
+        
+    def close(self) -> None:
+        """关闭输出流（应先停止VLC播放）"""
+        with self._lock:
+            if self._stream is None:
+                return
+            try:
+                self._stream.stop_stream()
+                self._stream.close()
+            except Exception as e:
+                print(f"关闭音频输出失败: {str(e)}")
+            self._stream = None
+            self._audio.terminate()
+            
+    def _play(self, opaque, samples, count, pts) -> None:
+        """VLC音频回调：播放一块PCM数据并交给分析器
+        
+        阻塞写入输出流，VLC据此控制解码速度
+        """
+        try:
+            data = ctypes.string_at(samples, count * self.channels * 2)
+            with self._lock:
+                if self._stream is None:
+                    return
+                if self._stream.is_stopped():
+                    self._stream.start_stream()
+                self._stream.write(data, count)
+                
+            if len(self._mono) < count:
+                self._mono = np.empty(count)
+            mono = self._mono[:count]
+            pcm = np.frombuffer(data, dtype=np.int16).reshape(count, self.channels)
+            np.mean(pcm, axis=1, out=mono)
+            mono *= 1.0 / 32768
+            self.sink(mono)
+        except Exception as e:
+            print(f"音频回调出错: {str(e)}")
+            
+    def _pause(self, opaque, pts) -> None:
+        """VLC音频回调：暂停输出"""
+        with self._lock:
+            if self._stream is not None and self._stream.is_active():
+                self._stream.stop_stream()
+                
+    def _resume(self, opaque, pts) -> None:
+        """VLC音频回调：恢复输出"""
+        with self._lock:
+            if self._stream is not None and self._stream.is_stopped():
+                self._stream.start_stream()
+                
+    def _flush(self, opaque, pts) -> None:
+        """VLC音频回调：丢弃缓冲的数据（阻塞写入时缓冲区很小，无需处理）"""
+        
+    def _drain(self, opaque) -> None:
+        """VLC音频回调：播放完缓冲的数据（阻塞写入时已在输出流中，无需处理）"""
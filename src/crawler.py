@@ -0,0 +1,123 @@
+"""
+目录遍历模块
+在后台线程中递归遍历网盘目录，找到的音频文件边遍历边分批交给调用方，
+不必等整个目录树遍历完成
+"""
+
+import time
+import threading
+from typing import Callable, Dict, List, Optional
+from src.library_index import is_audio_file
+from src.scheduler import get_scheduler
+
+
+class DirectoryCrawler:
+    """目录递归遍历器
+    
+    按名称顺序深度优先遍历（目录自己的文件在其子目录之前），与目录树中的顺序一致。
+    找到的第一首立即回调，之后每凑满BATCH_SIZE首或每隔BATCH_INTERVAL秒回调一次；
+    所有回调都通过刷新调度器在主线程中执行，取消后不再回调
+    """
+    
+    # 每批最多的文件数
+    BATCH_SIZE = 100
+    
+    # 两批之间的最长间隔（秒）
+    BATCH_INTERVAL = 0.5
+    
+    def __init__(self, api,
+                 on_batch: Callable[[List[Dict]], None],
+                 on_progress: Optional[Callable[[int, int, int], None]] = None,
+                 on_done: Optional[Callable[[], None]] = None):
+        """初始化目录遍历器
+        
+        Args:
+            api: BaiduPanAPI实例（目录列表经过其缓存，也会写入曲库索引）
+            on_batch: 每批音频文件的回调
+            on_progress: 每遍历完一个目录的回调，参数为(已遍历目录数, 待遍历目录数, 已找到文件数)
+            on_done: 遍历完成的回调（取消时不调用）
+        """
+        self.api = api
+        self.on_batch = on_batch
+        self.on_progress = on_progress
+        self.on_done = on_done
+        
+        self._cancelled = False
+        self._thread = None
+        
+        # 统计：已遍历的目录数、已找到的音频文件数、列表获取失败的目录数
+        self.folders = 0
+        self.tracks = 0
+        self.failed = 0
+        
+    @property
+    def running(self) -> bool:
+        """是否正在遍历"""
+        return self._thread is not None and self._thread.is_alive() and not self._cancelled
+        
+    def start(self, path: str) -> None:
+        """开始在后台遍历目录
+        
+        Args:
+            path: 目录路径
+        """
+        self._thread = threading.Thread(target=self._run, args=(path,), daemon=True)
+        self._thread.start()
+        
+    def cancel(self) -> None:
+        """取消遍历，已排队的回调也不再执行"""
+        self._cancelled = True
+        
+    def _post(self, callback: Optional[Callable], *args) -> None:
+        """在主线程中回调（取消后丢弃）"""
+        if callback is None:
+            return
+            
+        def deliver():
+            if not self._cancelled:
+                callback(*args)
+                
+        get_scheduler().post(deliver)
+        
+    def _run(self, path: str) -> None:
+        """遍历线程"""
+        stack = [path]
+        batch = []
+        last_batch = time.monotonic()
+        
+        while stack and not self._cancelled:
+            folder = stack.pop()
+            subfolders = []
+            try:
+                for files in self.api.iter_file_pages(folder):
+                    if self._cancelled:
+                        return
+                    for file in files:
+                        if file['isdir'] == 1:
+                            subfolders.append(file['path'])
+                        elif is_audio_file(file):
+                            batch.append(file)
+                            
+                    # 第一首立即交出，以便尽快开始播放
+                    now = time.monotonic()
+                    if batch and (self.tracks == 0 or len(batch) >= self.BATCH_SIZE
+                                  or now - last_batch >= self.BATCH_INTERVAL):
+                        self.tracks += len(batch)
+                        self._post(self.on_batch, batch)
+                        batch = []
+                        last_batch = now
+            except Exception as e:
+                print(f"遍历目录 {folder} 失败: {e}")
+                self.failed += 1
+                
+            # 子目录按名称顺序遍历
+            stack.extend(reversed(subfolders))
+            self.folders += 1
+            self._post(self.on_progress, self.folders, len(stack), self.tracks + len(batch))
+            
+        if self._cancelled:
+            return
+        if batch:
+            self.tracks += len(batch)
+            self._post(self.on_batch, batch)
+        self._post(self.on_done)
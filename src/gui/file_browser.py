@@ -1,6 +1,22 @@
+import time
 import wx
-import wx.lib.agw.customtreectrl as CT
+import wx.dataview as dv
+from concurrent.futures import ThreadPoolExecutor
 from src.api import BaiduPanAPI
+from src.prefetch import DirectoryPrefetcher
+from src.scheduler import get_scheduler
+from src.gui.file_list import VirtualFileList, format_size
+from src.gui.folder_tree import FolderTreeCtrl, STATE_UNLOADED, STATE_LOADING, STATE_LOADED
+from src.gui.playlist_view import PlaylistView
+
+# 过滤输入停止多久后才执行过滤（毫秒）
+FILTER_DELAY_MS = 150
+
+# 搜索输入停止多久后才搜索整个曲库（毫秒）
+SEARCH_DELAY_MS = 100
+
+# 添加文件夹到播放列表事件的ID（事件的客户数据为目录路径）
+ID_ADD_DIRECTORY = wx.NewId()
 
 class FileBrowser(wx.Panel):
     def __init__(self, parent, api_client):
@@ -9,8 +25,30 @@ class FileBrowser(wx.Panel):
         # 使用传入的API客户端
         self.api = api_client
         
-        # 存储文件数据的列表
-        self.file_data = []
+        # 目录加载在后台线程中进行，结果通过调度器回到主线程。
+        # 每次加载都记录发起时的代数，代数变化后旧结果被丢弃，后续页也不再请求
+        self._executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="file-browser")
+        self._list_generation = 0  # 文件列表：选择其他目录、刷新时递增
+        self._tree_generation = 0  # 目录树：重新加载根目录时递增
+        self._list_path = None
+        self._list_loaded = 0
+        self._list_loading = False
+        self._list_files = []
+        
+        # show_files()显示的内容的来源（如('playlist', 名称)），显示目录时为None
+        self.shown_source = None
+        
+        # 过滤输入防抖
+        self._filter_call = None
+        
+        # 曲库搜索索引（由主窗口设置）和搜索输入防抖；_searching表示列表中是搜索结果
+        self.library_index = None
+        self._search_call = None
+        self._searching = False
+        
+        # 预取展开或选中目录下的子目录列表；面板隐藏时放弃预取
+        self.prefetcher = DirectoryPrefetcher(self.api)
+        get_scheduler().add_visibility_listener(self, self._on_visibility)
         
         # 创建界面
         self._init_ui()
@@ -38,29 +76,27 @@ class FileBrowser(wx.Panel):
         self.filter_text.SetHint("输入过滤条件")
         toolbar_sizer.Add(self.filter_text, 1, wx.ALL | wx.EXPAND, 5)
         
+        # 曲库搜索框（在所有浏览过的目录中搜索）
+        self.search_text = wx.SearchCtrl(toolbar)
+        self.search_text.SetDescriptiveText("搜索全部音乐")
+        self.search_text.ShowCancelButton(True)
+        toolbar_sizer.Add(self.search_text, 1, wx.ALL | wx.EXPAND, 5)
+        
         toolbar.SetSizer(toolbar_sizer)
         main_sizer.Add(toolbar, 0, wx.EXPAND)
         
         # 创建分割窗口
         self.splitter = wx.SplitterWindow(self)
         
-        # 创建目录树
-        self.tree = CT.CustomTreeCtrl(
-            self.splitter,
-            agwStyle=CT.TR_DEFAULT_STYLE | CT.TR_HIDE_ROOT | CT.TR_HAS_BUTTONS
-        )
-        self.root = self.tree.AddRoot("百度云盘")
+        # 创建目录树（虚拟树，目录层次保存在节点表中，展开时才加载子目录）
+        self.tree = FolderTreeCtrl(self.splitter)
         
-        # 创建文件列表
-        self.list = wx.ListCtrl(
-            self.splitter,
-            style=wx.LC_REPORT | wx.BORDER_SUNKEN | wx.LC_SORT_ASCENDING
-        )
+        # 创建文件列表（虚拟列表，文件保存在数组模型中，点击列标题排序）
+        self.list = VirtualFileList(self.splitter)
         
-        # 设置列
-        self.list.InsertColumn(0, "文件名", width=200)
-        self.list.InsertColumn(1, "大小", width=100)
-        self.list.InsertColumn(2, "修改时间", width=150)
+        # 播放列表视图（显示播放列表时替换文件列表，事件由播放列表面板处理）
+        self.playlist_view = PlaylistView(self.splitter)
+        self.playlist_view.Hide()
         
         # 设置分割窗口
         self.splitter.SplitVertically(self.tree, self.list)
@@ -80,8 +116,8 @@ class FileBrowser(wx.Panel):
     def _bind_events(self):
         """绑定事件处理"""
         # 目录树事件
-        self.tree.Bind(wx.EVT_TREE_ITEM_EXPANDING, self.on_item_expanding)
-        self.tree.Bind(wx.EVT_TREE_SEL_CHANGED, self.on_sel_changed)
+        self.tree.Bind(dv.EVT_DATAVIEW_ITEM_EXPANDING, self.on_item_expanding)
+        self.tree.Bind(dv.EVT_DATAVIEW_SELECTION_CHANGED, self.on_sel_changed)
         
         # 文件列表事件
         self.list.Bind(wx.EVT_LIST_ITEM_ACTIVATED, self.on_item_activated)
@@ -90,108 +126,264 @@ class FileBrowser(wx.Panel):
         # 工具栏事件
         self.refresh_btn.Bind(wx.EVT_BUTTON, self.on_refresh)
         self.filter_text.Bind(wx.EVT_TEXT, self.on_filter)
+        self.search_text.Bind(wx.EVT_TEXT, self.on_search)
+        self.search_text.Bind(wx.EVT_SEARCH, self.on_search)
+        self.search_text.Bind(wx.EVT_SEARCH_CANCEL, self.on_search_cancel)
+        
+        # 销毁时取消后台加载
+        self.Bind(wx.EVT_WINDOW_DESTROY, self.on_destroy)
+        
+    def _run_in_background(self, pages, is_current, on_page, on_done, on_error):
+        """在后台线程中逐页加载，每页完成后在主线程中回调
+        
+        is_current()返回False后，已完成的页不再回调，剩余的页也不再请求
+        
+        Args:
+            pages: 返回分页迭代器的无参数函数（在后台线程中调用）
+            is_current: 检查这次加载是否仍然有效
+            on_page: 每页的回调，参数为该页文件列表
+            on_done: 全部加载完成后的回调
+            on_error: 出错时的回调，参数为异常
+        """
+        scheduler = get_scheduler()
+        
+        def deliver(callback, *args):
+            # 回到主线程时窗口可能已销毁或加载已过期
+            if self and is_current():
+                callback(*args)
+                
+        def work():
+            try:
+                for files in pages():
+                    if not is_current():
+                        return
+                    scheduler.post(deliver, on_page, files)
+                scheduler.post(deliver, on_done)
+            except Exception as e:
+                scheduler.post(deliver, on_error, e)
+                
+        self._executor.submit(work)
         
     def load_root_directory(self):
         """加载根目录"""
-        try:
-            # 显示加载状态
+        # 清空目录树，之前的加载结果不再添加
+        self._tree_generation += 1
+        self.tree.reset()
+        self._load_folder(0)
+        
+    def _load_folder(self, index):
+        """在后台加载目录节点的子目录，逐页添加到目录树
+        
+        Args:
+            index: 目录节点下标（0为根目录）
+        """
+        generation = self._tree_generation
+        path = self.tree.table.paths[index]
+        is_root = index == 0
+        loaded = [0]
+        
+        # 显示加载状态
+        self.tree.set_state(index, STATE_LOADING)
+        if is_root:
             self.status_bar.SetStatusText("正在加载根目录...", 0)
-            wx.BeginBusyCursor()
-            
-            # 获取根目录文件列表
-            files = self.api.list_files("/")
             
-            # 恢复光标
-            wx.EndBusyCursor()
-            
-            # 清空目录树
-            self.tree.DeleteChildren(self.root)
-            
-            # 添加文件夹到目录树
-            for file in files:
-                if file['isdir'] == 1:
-                    child = self.tree.AppendItem(self.root, file['server_filename'])
-                    self.tree.SetItemData(child, file)
-                    # 添加临时子项以显示展开按钮
-                    self.tree.AppendItem(child, "")
-                    
-            self.status_bar.SetStatusText(f"加载了 {len(files)} 个项目")
-            
-        except Exception as e:
-            wx.MessageBox(f"加载目录失败: {str(e)}", "错误", wx.OK | wx.ICON_ERROR)
+        def on_page(files):
+            loaded[0] += len(files)
+            self.tree.add_children(index, files)
+            if is_root:
+                self.status_bar.SetStatusText(f"正在加载根目录... 已加载 {loaded[0]} 个项目", 0)
+                
+        def on_done():
+            self.tree.set_state(index, STATE_LOADED)
+            if is_root:
+                self.status_bar.SetStatusText(f"加载了 {loaded[0]} 个项目", 0)
+            self._prefetch_children(index)
             
+        def on_error(e):
+            if self.tree.table.children[index]:
+                # 已加载部分子目录
+                self.tree.set_state(index, STATE_LOADED)
+            else:
+                # 恢复为未加载状态，下次展开时重试
+                self.tree.set_state(index, STATE_UNLOADED)
+                if not is_root:
+                    self.tree.Collapse(self.tree.model.item_of(index))
+            if is_root:
+                self.status_bar.SetStatusText("加载根目录失败", 0)
+                wx.MessageBox(f"加载目录失败: {str(e)}", "错误", wx.OK | wx.ICON_ERROR)
+            else:
+                wx.MessageBox(f"加载子目录失败: {str(e)}", "错误", 
+                            wx.OK | wx.ICON_ERROR)
+                            
+        self._run_in_background(
+            lambda: self.api.iter_file_pages(path),
+            lambda: self._tree_generation == generation,
+            on_page, on_done, on_error
+        )
+        
     def on_item_expanding(self, event):
         """处理目录展开事件"""
-        item = event.GetItem()
-        
-        # 如果只有一个空的子项，则加载子目录
-        if self.tree.GetChildrenCount(item) == 1:
-            first_child = self.tree.GetFirstChild(item)[0]
-            if not self.tree.GetItemText(first_child):
-                # 获取当前项的数据
-                data = self.tree.GetItemData(item)
-                if data:
-                    try:
-                        # 获取子目录文件列表
-                        files = self.api.list_files(data['path'])
-                        
-                        # 删除临时子项
-                        self.tree.DeleteChildren(item)
-                        
-                        # 添加文件夹到目录树
-                        for file in files:
-                            if file['isdir'] == 1:
-                                child = self.tree.AppendItem(item, file['server_filename'])
-                                self.tree.SetItemData(child, file)
-                                # 添加临时子项以显示展开按钮
-                                self.tree.AppendItem(child, "")
-                                
-                    except Exception as e:
-                        wx.MessageBox(f"加载子目录失败: {str(e)}", "错误", 
-                                    wx.OK | wx.ICON_ERROR)
-                        
+        index = self.tree.node_of(event.GetItem())
+        
+        # 子目录未加载时在后台加载；正在加载时不重复请求
+        if index > 0 and self.tree.table.states[index] == STATE_UNLOADED:
+            self.prefetcher.record_visit(self.tree.table.paths[index])
+            self._load_folder(index)
+            
     def on_sel_changed(self, event):
         """处理目录选择变更事件"""
-        item = event.GetItem()
-        data = self.tree.GetItemData(item)
+        path = self.tree.get_selected_path()
+        if path:
+            self.prefetcher.record_visit(path)
+            self.search_text.ChangeValue("")
+            self.load_file_list(path)
+            
+    def _prefetch_children(self, index):
+        """预取目录节点下可见的子目录
+        
+        Args:
+            index: 已加载子目录的节点下标
+        """
+        self.prefetcher.prefetch(self.tree.table.child_paths(index))
+        
+    def _on_visibility(self, visible):
+        """面板隐藏（如切换到播放列表或最小化到托盘）时放弃预取"""
+        if not visible:
+            self.prefetcher.cancel()
+            
+    def load_file_list(self, path, use_cache=True):
+        """在后台加载目录的文件列表，逐页显示
+        
+        之前未完成的加载被取消，其结果不会再显示
+        
+        Args:
+            path: 目录路径
+            use_cache: 是否使用目录列表缓存（刷新时为False）
+        """
+        self._list_generation += 1
+        generation = self._list_generation
+        self._list_path = path
+        self._list_loaded = 0
+        self._list_loading = True
+        self._searching = False
+        self.shown_source = None
+        self._show_view(self.list)
         
-        if data:
-            try:
-                # 显示加载状态
-                self.status_bar.SetStatusText(f"正在加载 {data['path']}...", 0)
-                wx.BeginBusyCursor()
-                
-                # 获取当前目录的文件列表
-                files = self.api.list_files(data['path'])
-                
-                # 恢复光标
-                wx.EndBusyCursor()
-                
-                # 更新文件列表
-                self.update_file_list(files)
+        # 显示加载状态
+        self._clear_file_list()
+        self.status_bar.SetStatusText(f"正在加载 {path}...", 0)
+        self.status_bar.SetStatusText("", 1)
+        
+        def on_page(files):
+            self._list_loaded += len(files)
+            self._append_files(files)
+            self.status_bar.SetStatusText(
+                f"正在加载 {path}... 已加载 {self._list_loaded} 个项目", 0)
                 
-            except Exception as e:
-                wx.MessageBox(f"加载文件列表失败: {str(e)}", "错误", 
-                            wx.OK | wx.ICON_ERROR)
+        def on_done():
+            self._list_loading = False
+            self._update_list_status()
+            
+            # 选中目录的子目录很可能接下来被打开
+            self.prefetcher.prefetch(
+                [file['path'] for file in self._list_files if file['isdir'] == 1])
                 
+        def on_error(e):
+            self._list_loading = False
+            self.status_bar.SetStatusText(f"加载 {path} 失败", 0)
+            wx.MessageBox(f"加载文件列表失败: {str(e)}", "错误", 
+                        wx.OK | wx.ICON_ERROR)
+                        
+        self._run_in_background(
+            lambda: self.api.iter_file_pages(path, use_cache=use_cache),
+            lambda: self._list_generation == generation,
+            on_page, on_done, on_error
+        )
+        
     def update_file_list(self, files):
         """更新文件列表"""
-        # 显示加载状态
-        self.status_bar.SetStatusText("正在更新文件列表...", 0)
-        wx.BeginBusyCursor()
+        self._clear_file_list()
+        self._append_files(files)
+        self._update_list_status()
+        
+    def show_files(self, files, source=None):
+        """取消正在进行的加载，直接显示给定的文件（如播放列表内容）
+        
+        Args:
+            files: 文件信息字典列表
+            source: 内容的来源，用于之后判断是否仍在显示该内容
+        """
+        self._list_generation += 1
+        self._list_loading = False
+        self._list_files = list(files)
+        self.shown_source = source
+        self._show_view(self.list)
+        self.list.set_files(self._list_files)
+        
+    def show_playlist(self, name, files, current=None):
+        """取消正在进行的加载，在播放列表视图中显示播放列表
+        
+        Args:
+            name: 播放列表名称
+            files: 播放列表内容
+            current: 当前播放的曲目
+        """
+        self._list_generation += 1
+        self._list_loading = False
+        self._list_files = []
+        self.shown_source = ('playlist', name)
+        self._show_view(self.playlist_view)
+        self.playlist_view.set_playlist(name, files, current)
+        self.playlist_view.set_filter(self.filter_text.GetValue())
+        
+    def rename_playlist(self, old_name, new_name):
+        """播放列表被重命名：正在显示时更新显示来源
+        
+        Returns:
+            bool: 是否正在显示该播放列表
+        """
+        if self.shown_source != ('playlist', old_name):
+            return False
+        self.shown_source = ('playlist', new_name)
+        self.playlist_view.playlist_name = new_name
+        return True
+        
+    def close_playlist(self, name):
+        """播放列表被删除：正在显示时清空播放列表视图和状态栏"""
+        if self.shown_source != ('playlist', name):
+            return
+        self.shown_source = None
+        self.playlist_view.playlist_name = None
+        self.playlist_view.clear()
+        self.status_bar.SetStatusText("", 0)
+        self.status_bar.SetStatusText("", 1)
+        
+    def _show_view(self, view):
+        """在分割窗口右侧显示文件列表或播放列表视图"""
+        shown = self.splitter.GetWindow2()
+        if shown is not view:
+            self.splitter.ReplaceWindow(shown, view)
+            view.Show()
+            shown.Hide()
+            
+    def _clear_file_list(self):
+        """清空列表和数据"""
+        self.list.clear()
+        self._list_files = []
         
-        # 清空列表和数据
-        self.list.DeleteAllItems()
-        self.file_data = []
+    def _append_files(self, files):
+        """将一批文件中的音频文件追加到列表
         
-        # 获取过滤文本
-        filter_text = self.filter_text.GetValue().lower()
+        Args:
+            files: 文件列表
+        """
+        self._list_files.extend(files)
         
         # 音频文件扩展名
         audio_exts = {'.mp3', '.wav', '.flac', '.m4a', '.ogg', '.wma'}
         
-        # 添加文件到列表
-        count = 0
+        # 筛选出音频文件，一次性加入模型（过滤条件由模型应用）
+        matched = []
         for file in files:
             # 跳过目录
             if file['isdir'] == 1:
@@ -202,67 +394,24 @@ class FileBrowser(wx.Panel):
             if ext not in audio_exts:
                 continue
                 
-            # 应用过滤
-            if filter_text and filter_text not in file['server_filename'].lower():
-                continue
-                
-            # 添加到列表
-            index = self.list.GetItemCount()
-            self.list.InsertItem(index, file['server_filename'])
-            self.list.SetItem(index, 1, str(self._format_size(file['size'])))
-            self.list.SetItem(index, 2, str(file['server_mtime']))
-            
-            # 存储文件数据并设置索引
-            self.file_data.append(file)
-            self.list.SetItemData(index, len(self.file_data) - 1)
-            count += 1
+            matched.append(file)
             
-        # 更新状态栏
-        total_size = sum(file['size'] for file in files if file['isdir'] == 0)
-        self.status_bar.SetStatusText(f"显示 {count} 个音频文件", 0)
-        self.status_bar.SetStatusText(f"总大小: {self._format_size(total_size)}", 1)
+        self.list.append_files(matched)
         
-        # 恢复光标
-        wx.EndBusyCursor()
+    def _update_list_status(self):
+        """更新状态栏"""
+        total_size = sum(file['size'] for file in self._list_files if file['isdir'] == 0)
+        self.status_bar.SetStatusText(f"显示 {len(self.list.model)} 个音频文件", 0)
+        self.status_bar.SetStatusText(f"总大小: {self._format_size(total_size)}", 1)
         
     def _format_size(self, size):
         """格式化文件大小显示"""
-        for unit in ['B', 'KB', 'MB', 'GB']:
-            if size < 1024:
-                return f"{size:.1f} {unit}"
-            size /= 1024
-        return f"{size:.1f} TB"
+        return format_size(size)
         
     def get_selected_files(self):
         """获取选中的文件列表"""
-        selected_files = []
-        item = -1
-        while True:
-            item = self.list.GetNextItem(item, wx.LIST_NEXT_ALL, wx.LIST_STATE_SELECTED)
-            if item == -1:
-                break
-            data_index = self.list.GetItemData(item)
-            selected_files.append(self.file_data[data_index])
-        return selected_files
-
-    def get_directory_files(self, path):
-        """递归获取目录下的所有音频文件"""
-        audio_files = []
-        try:
-            files = self.api.list_files(path)
-            for file in files:
-                if file['isdir'] == 1:
-                    # 递归获取子目录的文件
-                    audio_files.extend(self.get_directory_files(file['path']))
-                else:
-                    # 检查是否为音频文件
-                    ext = '.' + file['server_filename'].split('.')[-1].lower()
-                    if ext in {'.mp3', '.wav', '.flac', '.m4a', '.ogg', '.wma'}:
-                        audio_files.append(file)
-        except Exception as e:
-            wx.MessageBox(f"获取目录 {path} 的文件失败: {str(e)}", "错误", wx.OK | wx.ICON_ERROR)
-        return audio_files
-
+        return self.list.get_selected_files()
+        
     def on_item_activated(self, event):
         """处理文件双击事件"""
         selected_files = self.get_selected_files()
@@ -304,46 +453,102 @@ class FileBrowser(wx.Panel):
             
     def on_add_directory_to_playlist(self, event):
         """处理添加文件夹到播放列表事件"""
-        item = self.tree.GetSelection()
-        if item.IsOk():
-            data = self.tree.GetItemData(item)
-            if data:
-                # 获取目录下所有音频文件
-                audio_files = self.get_directory_files(data['path'])
-                if audio_files:
-                    # 发送添加到播放列表的事件
-                    evt = wx.CommandEvent(wx.wxEVT_COMMAND_BUTTON_CLICKED)
-                    evt.SetEventObject(self)
-                    evt.SetId(wx.ID_ADD)
-                    evt.SetClientData(audio_files)
-                    wx.PostEvent(self, evt)
-                else:
-                    wx.MessageBox("未在该目录下找到音频文件", "提示", wx.OK | wx.ICON_INFORMATION)
+        path = self.tree.get_selected_path()
+        if path:
+            # 发送添加文件夹的事件，由播放列表面板边遍历边添加
+            evt = wx.CommandEvent(wx.wxEVT_COMMAND_BUTTON_CLICKED)
+            evt.SetEventObject(self)
+            evt.SetId(ID_ADD_DIRECTORY)
+            evt.SetClientData(path)
+            wx.PostEvent(self, evt)
             
     def on_refresh(self, event):
         """处理刷新按钮事件"""
         # 重新加载当前选中的目录
-        item = self.tree.GetSelection()
-        if item.IsOk():
-            data = self.tree.GetItemData(item)
-            if data:
-                try:
-                    files = self.api.list_files(data['path'])
-                    self.update_file_list(files)
-                except Exception as e:
-                    wx.MessageBox(f"刷新文件列表失败: {str(e)}", "错误", 
-                                wx.OK | wx.ICON_ERROR)
-                                
+        path = self.tree.get_selected_path()
+        if path:
+            self.load_file_list(path, use_cache=False)
+            
     def on_filter(self, event):
-        """处理过滤文本变更事件"""
-        # 重新加载当前文件列表
-        item = self.tree.GetSelection()
-        if item.IsOk():
-            data = self.tree.GetItemData(item)
-            if data:
-                try:
-                    files = self.api.list_files(data['path'])
-                    self.update_file_list(files)
-                except Exception as e:
-                    wx.MessageBox(f"更新文件列表失败: {str(e)}", "错误", 
-                                wx.OK | wx.ICON_ERROR)
+        """处理过滤文本变更事件：输入停顿后再过滤"""
+        if self._filter_call is not None and self._filter_call.IsRunning():
+            self._filter_call.Restart(FILTER_DELAY_MS)
+        else:
+            self._filter_call = wx.CallLater(FILTER_DELAY_MS, self._apply_filter)
+            
+    def _apply_filter(self):
+        """在已加载的文件中过滤，不再请求接口；仍在加载的页到达时按同一条件过滤"""
+        if not self:
+            return
+        if self.shown_source and self.shown_source[0] == 'playlist':
+            self.playlist_view.set_filter(self.filter_text.GetValue())
+            return
+        self.list.set_filter(self.filter_text.GetValue())
+        if self._list_generation and not self._list_loading:
+            self._update_list_status()
+            
+    def set_library_index(self, library_index):
+        """设置曲库搜索索引
+        
+        Args:
+            library_index: LibraryIndex实例
+        """
+        self.library_index = library_index
+        
+    def on_search(self, event):
+        """处理搜索文本变更事件：输入停顿后搜索，按回车立即搜索"""
+        if event.GetEventType() == wx.wxEVT_SEARCH:
+            if self._search_call is not None:
+                self._search_call.Stop()
+            self._apply_search()
+        elif self._search_call is not None and self._search_call.IsRunning():
+            self._search_call.Restart(SEARCH_DELAY_MS)
+        else:
+            self._search_call = wx.CallLater(SEARCH_DELAY_MS, self._apply_search)
+            
+    def on_search_cancel(self, event):
+        """清除搜索，回到当前目录"""
+        self.search_text.ChangeValue("")
+        self._apply_search()
+        
+    def _apply_search(self):
+        """在整个曲库中搜索，结果显示在文件列表中；搜索文本为空时回到当前目录"""
+        if not self or self.library_index is None:
+            return
+        query = self.search_text.GetValue().strip()
+        if not query:
+            if self._searching:
+                self._searching = False
+                if self._list_path:
+                    self.load_file_list(self._list_path)
+                else:
+                    self._clear_file_list()
+            return
+            
+        start = time.perf_counter()
+        try:
+            results = self.library_index.search(query)
+        except Exception as e:
+            print(f"搜索曲库失败: {e}")
+            return
+        elapsed = time.perf_counter() - start
+        
+        self.show_files(results)
+        self._searching = True
+        self._update_list_status()
+        self.status_bar.SetStatusText(
+            f"搜索“{query}”: 找到 {len(self.list.model)} 个音频文件 ({elapsed * 1000:.0f} ms)", 0)
+            
+    def on_destroy(self, event):
+        """窗口销毁时取消所有加载"""
+        if event.GetEventObject() is self:
+            self._list_generation += 1
+            self._tree_generation += 1
+            self._executor.shutdown(wait=False)
+            self.prefetcher.stop()
+            get_scheduler().remove_visibility_listener(self, self._on_visibility)
+            if self._filter_call is not None:
+                self._filter_call.Stop()
+            if self._search_call is not None:
+                self._search_call.Stop()
+        event.Skip()
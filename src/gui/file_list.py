@@ -0,0 +1,355 @@
+"""
+虚拟文件列表模块
+以数组为基础的文件列表模型和LC_VIRTUAL列表控件：
+控件只保存行数，显示文本按需生成并缓存，排序使用预先计算的numpy排序键
+"""
+
+import time
+import wx
+import numpy as np
+from typing import Dict, List, Optional
+
+# 列定义：(标题, 宽度)
+COLUMNS = [("文件名", 200), ("大小", 100), ("修改时间", 150)]
+
+# 列索引
+COLUMN_NAME = 0
+COLUMN_SIZE = 1
+COLUMN_MTIME = 2
+
+
+def format_size(size) -> str:
+    """格式化文件大小显示"""
+    for unit in ['B', 'KB', 'MB', 'GB']:
+        if size < 1024:
+            return f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} TB"
+
+
+def format_time(timestamp) -> str:
+    """格式化时间戳为易读格式"""
+    try:
+        return time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(timestamp))
+    except (TypeError, ValueError, OverflowError, OSError):
+        return str(timestamp)
+
+
+class FileListModel:
+    """文件列表模型
+    
+    文件按加入顺序保存，显示顺序由order数组（行号到文件下标）决定。
+    排序键在文件加入时一次算好，排序只需一次numpy argsort；
+    过滤结果保存为布尔掩码，与排序结果组合得到显示顺序；
+    显示文本在控件请求某一行时才格式化，并按文件缓存
+    """
+    
+    # 文本缓存的最大条目数，超过后整体清空（可见行很快会重新生成）
+    CACHE_LIMIT = 4096
+    
+    def __init__(self):
+        self.files: List[Dict] = []
+        self.order = np.zeros(0, dtype=np.intp)
+        
+        # 排序键：名称按小写比较，大小和修改时间为整数
+        self._names = np.zeros(0, dtype=str)
+        self._sizes = np.zeros(0, dtype=np.int64)
+        self._mtimes = np.zeros(0, dtype=np.int64)
+        
+        # 当前排序列和方向，None为保持加入顺序；_sorted为全部文件的排序结果
+        self.sort_column: Optional[int] = None
+        self.ascending = True
+        self._sorted = np.zeros(0, dtype=np.intp)
+        
+        # 过滤条件（小写）和每个文件是否匹配
+        self.query = ""
+        self._mask = np.zeros(0, dtype=bool)
+        
+        # 文件下标到显示文本的缓存
+        self._text_cache: Dict[int, tuple] = {}
+        
+    def __len__(self) -> int:
+        return len(self.order)
+        
+    def clear(self) -> None:
+        """清空模型"""
+        self.files = []
+        self.order = np.zeros(0, dtype=np.intp)
+        self._names = np.zeros(0, dtype=str)
+        self._sizes = np.zeros(0, dtype=np.int64)
+        self._mtimes = np.zeros(0, dtype=np.int64)
+        self._sorted = np.zeros(0, dtype=np.intp)
+        self._mask = np.zeros(0, dtype=bool)
+        self._text_cache.clear()
+        
+    def set_files(self, files: List[Dict]) -> None:
+        """替换全部文件
+        
+        Args:
+            files: 文件信息字典列表
+        """
+        self.clear()
+        self.append(files)
+        
+    def append(self, files: List[Dict]) -> None:
+        """追加文件（如分页加载的下一页），保持当前排序
+        
+        Args:
+            files: 文件信息字典列表
+        """
+        if not files:
+            return
+        start = len(self.files)
+        self.files.extend(files)
+        names = np.array([file['server_filename'].lower() for file in files])
+        self._names = np.concatenate((self._names, names))
+        self._mask = np.concatenate((self._mask, self._match(names)))
+        self._sizes = np.concatenate(
+            (self._sizes, np.fromiter((file.get('size', 0) for file in files),
+                                      dtype=np.int64, count=len(files))))
+        self._mtimes = np.concatenate(
+            (self._mtimes, np.fromiter((file.get('server_mtime', 0) for file in files),
+                                       dtype=np.int64, count=len(files))))
+        self._merge_order(start)
+        
+    def sort(self, column: Optional[int], ascending: bool = True) -> None:
+        """按列排序
+        
+        Args:
+            column: 列索引，None为恢复加入顺序
+            ascending: 是否升序
+        """
+        self.sort_column = column
+        self.ascending = ascending
+        self._update_order()
+        
+    def set_filter(self, query: str) -> None:
+        """按文件名（不区分大小写的子串）过滤
+        
+        新条件包含上一次的条件时（如继续输入），只在上一次的结果中查找
+        
+        Args:
+            query: 过滤文本，空字符串为显示全部
+        """
+        query = query.strip().lower()
+        if query == self.query:
+            return
+            
+        # 新条件包含旧条件时结果只会更少：只检查上一次匹配的文件
+        narrowing = bool(self.query) and self.query in query
+        self.query = query
+        if narrowing:
+            candidates = np.flatnonzero(self._mask)
+            self._mask = np.zeros(len(self.files), dtype=bool)
+            self._mask[candidates[self._match(self._names[candidates])]] = True
+        else:
+            self._mask = self._match(self._names)
+        self._apply_mask()
+        
+    def _match(self, names: np.ndarray) -> np.ndarray:
+        """按当前过滤条件匹配一组小写文件名
+        
+        Args:
+            names: 小写文件名数组
+            
+        Returns:
+            布尔数组
+        """
+        if not self.query:
+            return np.ones(len(names), dtype=bool)
+        return np.char.find(names, self.query) >= 0
+        
+    def _sort_keys(self) -> Optional[np.ndarray]:
+        """当前排序列的排序键，None为保持加入顺序"""
+        if self.sort_column is None:
+            return None
+        return (self._names, self._sizes, self._mtimes)[self.sort_column]
+        
+    def _update_order(self) -> None:
+        """根据排序键重新计算全部文件的排序结果"""
+        keys = self._sort_keys()
+        if keys is None:
+            order = np.arange(len(self.files), dtype=np.intp)
+        else:
+            order = np.argsort(keys, kind='stable')
+        self._sorted = order if self.ascending else order[::-1].copy()
+        self._apply_mask()
+        
+    def _merge_order(self, start: int) -> None:
+        """把下标从start开始的新文件合并到排序结果中，不重新排序已有的文件
+        
+        只对新文件排序，再用二分查找插入，结果与对全部文件做稳定排序相同
+        （键相同的文件按加入顺序排列，降序时相反）
+        
+        Args:
+            start: 第一个新文件的下标
+        """
+        added = np.arange(start, len(self.files), dtype=np.intp)
+        keys = self._sort_keys()
+        existing = self._sorted if self.ascending else self._sorted[::-1]
+        if keys is None:
+            merged = np.concatenate((existing, added))
+        else:
+            added = added[np.argsort(keys[start:], kind='stable')]
+            positions = np.searchsorted(keys[existing], keys[added], side='right')
+            merged = np.insert(existing, positions, added)
+        self._sorted = merged if self.ascending else merged[::-1].copy()
+        self._apply_mask()
+        
+    def _apply_mask(self) -> None:
+        """从排序结果中取出匹配过滤条件的文件作为显示顺序"""
+        self.order = self._sorted[self._mask[self._sorted]]
+        
+    def get_file(self, row: int) -> Dict:
+        """获取指定行的文件信息
+        
+        Args:
+            row: 显示行号
+            
+        Returns:
+            文件信息字典
+        """
+        return self.files[self.order[row]]
+        
+    def get_text(self, row: int, column: int) -> str:
+        """获取指定行和列的显示文本
+        
+        Args:
+            row: 显示行号
+            column: 列索引
+            
+        Returns:
+            显示文本
+        """
+        if not 0 <= row < len(self.order):
+            return ""
+        index = int(self.order[row])
+        texts = self._text_cache.get(index)
+        if texts is None:
+            if len(self._text_cache) >= self.CACHE_LIMIT:
+                self._text_cache.clear()
+            file = self.files[index]
+            texts = (
+                file['server_filename'],
+                format_size(file.get('size', 0)),
+                format_time(file.get('server_mtime', 0)),
+            )
+            self._text_cache[index] = texts
+        return texts[column]
+        
+    def total_size(self) -> int:
+        """当前显示的文件的总大小"""
+        return int(self._sizes[self.order].sum())
+
+
+class VirtualFileList(wx.ListCtrl):
+    """基于FileListModel的虚拟列表控件，点击列标题排序"""
+    
+    # 列定义和默认排序列（None为保持加入顺序），子类可覆盖
+    columns = COLUMNS
+    default_sort: Optional[int] = COLUMN_NAME
+    
+    def __init__(self, parent, model: Optional[FileListModel] = None):
+        """初始化虚拟文件列表
+        
+        Args:
+            parent: 父窗口
+            model: 文件列表模型，默认新建
+        """
+        super().__init__(
+            parent,
+            style=wx.LC_REPORT | wx.LC_VIRTUAL | wx.BORDER_SUNKEN
+        )
+        self.model = model or FileListModel()
+        
+        # 设置列
+        for column, (title, width) in enumerate(self.columns):
+            self.InsertColumn(column, title, width=width)
+            
+        # 默认按文件名升序
+        self.model.sort(self.default_sort, True)
+        self._show_sort_indicator()
+        
+        self.Bind(wx.EVT_LIST_COL_CLICK, self.on_col_click)
+        
+    def OnGetItemText(self, item, column):
+        """虚拟列表回调：返回指定行和列的文本"""
+        return self.model.get_text(item, column)
+        
+    def refresh(self) -> None:
+        """模型变化后更新行数并重绘（与文件数量无关的常数时间操作）"""
+        self.SetItemCount(len(self.model))
+        self.Refresh()
+        
+    def set_files(self, files: List[Dict]) -> None:
+        """替换全部文件并清除选择"""
+        self._clear_selection()
+        self.model.set_files(files)
+        self.refresh()
+        
+    def append_files(self, files: List[Dict]) -> None:
+        """追加文件"""
+        if files:
+            if self.model.sort_column is not None:
+                # 排序后已有行的位置会变化，旧的选择不再对应原文件
+                self._clear_selection()
+            self.model.append(files)
+            self.refresh()
+            
+    def set_filter(self, query: str) -> None:
+        """按文件名过滤，只更新显示顺序和行数，不重新插入行
+        
+        Args:
+            query: 过滤文本
+        """
+        self._clear_selection()
+        self.model.set_filter(query)
+        self.refresh()
+        
+    def clear(self) -> None:
+        """清空列表"""
+        self._clear_selection()
+        self.model.clear()
+        self.refresh()
+        
+    def get_file(self, row: int) -> Dict:
+        """获取指定行的文件信息"""
+        return self.model.get_file(row)
+        
+    def get_selected_files(self) -> List[Dict]:
+        """获取选中的文件列表"""
+        selected_files = []
+        item = -1
+        while True:
+            item = self.GetNextItem(item, wx.LIST_NEXT_ALL, wx.LIST_STATE_SELECTED)
+            if item == -1:
+                break
+            selected_files.append(self.model.get_file(item))
+        return selected_files
+        
+    def on_col_click(self, event):
+        """点击列标题：同一列切换升降序，其他列按升序排序"""
+        column = event.GetColumn()
+        if column < 0:
+            return
+        ascending = not self.model.ascending if column == self.model.sort_column else True
+        self._clear_selection()
+        self.model.sort(column, ascending)
+        self._show_sort_indicator()
+        self.refresh()
+        
+    def _show_sort_indicator(self):
+        """在列标题上显示排序方向"""
+        if self.model.sort_column is None:
+            self.RemoveSortIndicator()
+        else:
+            self.ShowSortIndicator(self.model.sort_column, self.model.ascending)
+            
+    def _clear_selection(self):
+        """清除选择（行号在模型变化后会指向其他文件）"""
+        item = -1
+        while True:
+            item = self.GetNextItem(item, wx.LIST_NEXT_ALL, wx.LIST_STATE_SELECTED)
+            if item == -1:
+                break
+            self.SetItemState(item, 0, wx.LIST_STATE_SELECTED)
@@ -0,0 +1,221 @@
+"""
+虚拟目录树模块
+用紧凑的节点表保存目录层次（父节点下标、子节点下标数组），子目录在展开时才加载，
+由wx.dataview.DataViewCtrl通过模型按需读取，界面项只保存节点下标
+"""
+
+import wx
+import wx.dataview as dv
+from array import array
+from typing import Dict, List, Optional
+
+# 子目录加载状态
+STATE_UNLOADED = 0
+STATE_LOADING = 1
+STATE_LOADED = 2
+
+# 正在加载的目录名后显示的提示
+LOADING_SUFFIX = " (正在加载...)"
+
+
+class FolderNodeTable:
+    """目录节点表
+    
+    节点0为根目录（不显示）。每个节点只保存名称、路径、fs_id、父节点下标、
+    加载状态和子节点下标数组；子节点数组在加载前为None
+    """
+    
+    def __init__(self):
+        self.reset()
+        
+    def reset(self) -> None:
+        """清空节点表，只保留根目录"""
+        self.names: List[str] = [""]
+        self.paths: List[str] = ["/"]
+        self.fs_ids = array('q', [0])
+        self.parents = array('l', [-1])
+        self.states = bytearray([STATE_UNLOADED])
+        self.children: List[Optional[array]] = [None]
+        self._index_by_path: Dict[str, int] = {"/": 0}
+        
+    def __len__(self) -> int:
+        return len(self.names)
+        
+    def find(self, path: str) -> Optional[int]:
+        """按路径查找节点下标"""
+        return self._index_by_path.get(path)
+        
+    def add_children(self, index: int, files: List[Dict]) -> List[int]:
+        """添加一批子目录（只添加其中的文件夹）
+        
+        Args:
+            index: 父节点下标
+            files: 文件信息字典列表
+            
+        Returns:
+            新节点的下标列表
+        """
+        children = self.children[index]
+        if children is None:
+            children = self.children[index] = array('l')
+            
+        added = []
+        for file in files:
+            if file['isdir'] != 1 or file['path'] in self._index_by_path:
+                continue
+            node = len(self.names)
+            self.names.append(file['server_filename'])
+            self.paths.append(file['path'])
+            self.fs_ids.append(int(file.get('fs_id', 0)))
+            self.parents.append(index)
+            self.states.append(STATE_UNLOADED)
+            self.children.append(None)
+            self._index_by_path[file['path']] = node
+            children.append(node)
+            added.append(node)
+        return added
+        
+    def set_state(self, index: int, state: int) -> None:
+        """设置子目录加载状态；标记为已加载时确保子节点数组存在"""
+        self.states[index] = state
+        if state == STATE_LOADED and self.children[index] is None:
+            self.children[index] = array('l')
+        elif state == STATE_UNLOADED:
+            self.children[index] = None
+            
+    def child_paths(self, index: int) -> List[str]:
+        """获取已加载的子目录路径"""
+        return [self.paths[child] for child in self.children[index] or ()]
+        
+    def has_children(self, index: int) -> bool:
+        """是否可能有子目录（未加载时视为可能有）"""
+        if self.states[index] != STATE_LOADED:
+            return True
+        return len(self.children[index]) > 0
+
+
+class FolderTreeModel(dv.PyDataViewModel):
+    """基于FolderNodeTable的目录树模型
+    
+    界面项的ID就是节点下标，根目录（下标0）对应无效项
+    """
+    
+    def __init__(self, table: FolderNodeTable):
+        """初始化目录树模型
+        
+        Args:
+            table: 目录节点表
+        """
+        super().__init__()
+        self.table = table
+        
+    def item_of(self, index: int) -> dv.DataViewItem:
+        """节点下标对应的界面项"""
+        return dv.DataViewItem(index) if index > 0 else dv.NullDataViewItem
+        
+    def node_of(self, item: dv.DataViewItem) -> int:
+        """界面项对应的节点下标"""
+        return int(item.GetID()) if item and item.IsOk() else 0
+        
+    def GetColumnCount(self):
+        return 1
+        
+    def GetColumnType(self, col):
+        return "string"
+        
+    def GetChildren(self, parent, children):
+        for child in self.table.children[self.node_of(parent)] or ():
+            children.append(dv.DataViewItem(child))
+        return len(children)
+        
+    def IsContainer(self, item):
+        return self.table.has_children(self.node_of(item))
+        
+    def HasContainerColumns(self, item):
+        return True
+        
+    def GetParent(self, item):
+        index = self.node_of(item)
+        return self.item_of(self.table.parents[index]) if index > 0 else dv.NullDataViewItem
+        
+    def GetValue(self, item, col):
+        index = self.node_of(item)
+        if self.table.states[index] == STATE_LOADING:
+            return self.table.names[index] + LOADING_SUFFIX
+        return self.table.names[index]
+        
+    def SetValue(self, value, item, col):
+        return False
+        
+    def notify_children_added(self, index: int, nodes: List[int]) -> None:
+        """通知控件新增了子节点
+        
+        Args:
+            index: 父节点下标
+            nodes: 新节点下标列表
+        """
+        if not nodes:
+            return
+        items = dv.DataViewItemArray()
+        for node in nodes:
+            items.append(dv.DataViewItem(node))
+        self.ItemsAdded(self.item_of(index), items)
+
+
+class FolderTreeCtrl(dv.DataViewCtrl):
+    """虚拟目录树控件"""
+    
+    def __init__(self, parent):
+        """初始化虚拟目录树
+        
+        Args:
+            parent: 父窗口
+        """
+        super().__init__(parent, style=dv.DV_NO_HEADER | dv.DV_SINGLE | wx.BORDER_SUNKEN)
+        self.table = FolderNodeTable()
+        self.model = FolderTreeModel(self.table)
+        self.AssociateModel(self.model)
+        # 控件持有模型的引用
+        self.model.DecRef()
+        self.AppendTextColumn("目录", 0, width=-1)
+        
+    def reset(self) -> None:
+        """清空目录树"""
+        self.table.reset()
+        self.model.Cleared()
+        
+    def add_children(self, index: int, files: List[Dict]) -> List[int]:
+        """添加一批子目录并通知控件
+        
+        Args:
+            index: 父节点下标
+            files: 文件信息字典列表
+            
+        Returns:
+            新节点的下标列表
+        """
+        nodes = self.table.add_children(index, files)
+        self.model.notify_children_added(index, nodes)
+        return nodes
+        
+    def set_state(self, index: int, state: int) -> None:
+        """设置节点加载状态并刷新显示"""
+        self.table.set_state(index, state)
+        if index > 0:
+            self.model.ItemChanged(self.model.item_of(index))
+            
+    def node_of(self, item: dv.DataViewItem) -> int:
+        """界面项对应的节点下标"""
+        return self.model.node_of(item)
+        
+    def get_selected_node(self) -> Optional[int]:
+        """获取选中目录的节点下标，没有选择时返回None"""
+        item = self.GetSelection()
+        if not item or not item.IsOk():
+            return None
+        return self.model.node_of(item)
+        
+    def get_selected_path(self) -> Optional[str]:
+        """获取选中目录的路径，没有选择时返回None"""
+        index = self.get_selected_node()
+        return self.table.paths[index] if index is not None else None
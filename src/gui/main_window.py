@@ -7,13 +7,15 @@ from PIL import Image, ImageDraw
 from src.auth import AuthManager
 from src.api import BaiduPanAPI
 from src.player import AudioPlayer
+from src.library import LibraryMetadata
+from src.library_index import LibraryIndex
+from src.scheduler import get_scheduler, TOPIC_PLAYER_TRACK
 from src.gui.login_window import LoginWindow
 from src.gui.playlist_panel import PlaylistPanel
 from src.gui.player_panel import PlayerPanel
-from src.gui.file_browser import FileBrowser
+from src.gui.file_browser import FileBrowser, ID_ADD_DIRECTORY
 
 # 定义ID
-REFRESH_TOKEN_TIMER_ID = wx.NewId()
 ID_PLAY = wx.NewId()
 ID_PREVIOUS = wx.NewId()
 ID_NEXT = wx.NewId()
@@ -37,7 +39,8 @@ class MainWindow(wx.Frame):
         # 初始化认证管理器、API客户端和播放器
         self.auth = AuthManager()
         self.api_client = BaiduPanAPI(self.auth)
-        self.player = AudioPlayer(self.api_client)
+        self.library = LibraryMetadata()
+        self.player = AudioPlayer(self.api_client, self.library)
         
         # 检查登录状态
         if not self.auth.is_logged_in():
@@ -52,7 +55,13 @@ class MainWindow(wx.Frame):
         except Exception as e:
             wx.MessageBox(f"获取用户信息失败: {str(e)}", "错误", wx.OK | wx.ICON_ERROR)
             self.user_info = None
-        
+            
+        # 曲库搜索索引：加载过的目录列表都写入索引，播放的曲目记录播放次数
+        self.library_index = LibraryIndex()
+        self.api_client.listing_cache.add_listener(self.library_index.index_listing)
+        self.track_subscription = get_scheduler().subscribe(
+            TOPIC_PLAYER_TRACK, self.library_index.record_play)
+            
         # 创建AUI管理器
         self._mgr = aui.AuiManager()
         self._mgr.SetManagedWindow(self)
@@ -60,11 +69,8 @@ class MainWindow(wx.Frame):
         # 创建主面板
         self._setup_ui()
         
-        # 创建定时器用于刷新token
-        self.refresh_timer = wx.Timer(self, REFRESH_TOKEN_TIMER_ID)
-        self.Bind(wx.EVT_TIMER, self.check_token, self.refresh_timer)
-        # 每5分钟检查一次token状态
-        self.refresh_timer.Start(5 * 60 * 1000)
+        # 每5分钟检查一次token状态（由全局刷新调度器执行）
+        self.token_task = get_scheduler().add_task(self.check_token, 5 * 60)
         
         # 绑定事件
         self.Bind(wx.EVT_CLOSE, self.on_close)
@@ -142,6 +148,7 @@ class MainWindow(wx.Frame):
         # 创建左侧播放列表面板
         self.playlist_panel = PlaylistPanel(self, self.api_client)
         self.playlist_panel.set_player(self.player)
+        self.playlist_panel.set_library_index(self.library_index)
         self._mgr.AddPane(
             self.playlist_panel,
             aui.AuiPaneInfo().Name("playlist").Caption("播放列表")
@@ -151,6 +158,8 @@ class MainWindow(wx.Frame):
         
         # 创建中央内容面板
         self.content_panel = FileBrowser(self, self.api_client)
+        self.content_panel.set_library_index(self.library_index)
+        self.playlist_panel.set_playlist_view(self.content_panel.playlist_view)
         self._mgr.AddPane(
             self.content_panel,
             aui.AuiPaneInfo().Name("content").Caption("文件浏览器")
@@ -173,7 +182,7 @@ class MainWindow(wx.Frame):
         # 绑定文件浏览器的添加到播放列表事件
         self.content_panel.Bind(wx.EVT_BUTTON, self.on_add_to_playlist)
         
-    def check_token(self, event):
+    def check_token(self):
         """检查token状态并在需要时刷新"""
         if not self.auth.is_logged_in():
             if not self.auth.refresh_token():
@@ -189,7 +198,7 @@ class MainWindow(wx.Frame):
     def handle_logout(self):
         """处理登出逻辑"""
         self.auth.clear_token()
-        self.refresh_timer.Stop()
+        get_scheduler().remove_task(self.token_task)
         self.Hide()
         login_window = LoginWindow()
         login_window.Show()
@@ -200,10 +209,12 @@ class MainWindow(wx.Frame):
         if event.GetId() == wx.ID_ADD:
             files = event.GetClientData()
             if files:
-                # 将文件添加到播放列表
-                for file in files:
-                    self.playlist_panel.add_file(file)
-                
+                # 一次添加全部选中的文件
+                self.playlist_panel.add_files(files)
+        elif event.GetId() == ID_ADD_DIRECTORY:
+            # 边遍历文件夹边添加
+            self.playlist_panel.add_directory(event.GetClientData())
+            
     def setup_accelerators(self):
         """设置键盘快捷键"""
         # 创建快捷键表
@@ -342,7 +353,11 @@ class MainWindow(wx.Frame):
             
     def on_close(self, event):
         """关闭窗口事件处理"""
-        self.refresh_timer.Stop()
+        get_scheduler().remove_task(self.token_task)
+        get_scheduler().unsubscribe(self.track_subscription)
+        self.api_client.listing_cache.remove_listener(self.library_index.index_listing)
+        self.library_index.close()
+        self.player.close()
         self._mgr.UnInit()
         del self._mgr
         self.tray_icon.Destroy()
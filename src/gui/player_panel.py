@@ -1,8 +1,10 @@
 import wx
-from src.player import AudioPlayer, PlayMode
+from src.player import AudioPlayer, PlayMode, PlayState
+from src.scheduler import get_scheduler, TOPIC_PLAYER_POSITION, TOPIC_PLAYER_STATE
 from .visualizer.waveform_visualizer import WaveformVisualizer
 from .visualizer.spectrum_visualizer import SpectrumVisualizer
 from .visualizer.circular_visualizer import CircularVisualizer
+from .visualizer.spectrogram_visualizer import SpectrogramVisualizer
 
 class PlayerPanel(wx.Panel):
     def __init__(self, parent):
@@ -16,7 +18,8 @@ class PlayerPanel(wx.Panel):
         self.visualizer_types = {
             "波形": WaveformVisualizer,
             "频谱": SpectrumVisualizer,
-            "环形": CircularVisualizer
+            "环形": CircularVisualizer,
+            "频谱图": SpectrogramVisualizer
         }
         
         # 创建界面
@@ -25,10 +28,9 @@ class PlayerPanel(wx.Panel):
         # 绑定事件
         self._bind_events()
         
-        # 初始化定时器用于更新进度条
-        self.timer = wx.Timer(self)
-        self.Bind(wx.EVT_TIMER, self.on_timer)
-        self.timer.Start(1000)  # 每秒更新一次
+        # 播放进度和状态由调度器推送（在set_player中订阅）
+        self._subscriptions = []
+        self.Bind(wx.EVT_WINDOW_DESTROY, self.on_destroy)
         
     def _init_ui(self):
         """初始化界面"""
@@ -137,21 +139,42 @@ class PlayerPanel(wx.Panel):
         # 音量控制事件
         self.volume_slider.Bind(wx.EVT_SLIDER, self.on_volume_change)
         
-    def on_timer(self, event):
-        """定时器事件处理，用于更新进度条"""
-        if self.player and self.player.is_playing():
-            current_time = self.player.get_position()
-            total_time = self.player.get_length()
+    def on_position(self, position):
+        """播放位置更新，用于更新进度条（每秒最多一次，面板不可见时不推送）
+        
+        Args:
+            position: 播放位置(0-1)
+        """
+        if not self.player:
+            return
+            
+        total_time = self.player.get_length() / 1000.0
+        if total_time > 0:
+            # 更新进度条
+            self.progress_slider.SetValue(int(position * 100))
+            
+            # 更新时间显示
+            self.time_current.SetLabel(self._format_time(position * total_time))
+            self.time_total.SetLabel(self._format_time(total_time))
             
-            if total_time > 0:
-                # 更新进度条
-                progress = (current_time / total_time) * 100
-                self.progress_slider.SetValue(int(progress))
-                
-                # 更新时间显示
-                self.time_current.SetLabel(self._format_time(current_time))
-                self.time_total.SetLabel(self._format_time(total_time))
-                
+    def on_state_changed(self, state):
+        """播放状态变化，同步播放/暂停按钮图标
+        
+        Args:
+            state: 播放状态
+        """
+        art = wx.ART_MEDIA_PAUSE if state == PlayState.PLAYING else wx.ART_PLAY
+        self.play_btn.SetBitmap(wx.ArtProvider.GetBitmap(art, size=(16, 16)))
+        
+    def on_destroy(self, event):
+        """面板销毁时取消订阅"""
+        if event.GetEventObject() is self:
+            scheduler = get_scheduler()
+            for subscription in self._subscriptions:
+                scheduler.unsubscribe(subscription)
+            self._subscriptions = []
+        event.Skip()
+        
     def on_play_pause(self, event):
         """播放/暂停按钮事件处理"""
         if self.player:
@@ -217,6 +240,17 @@ class PlayerPanel(wx.Panel):
         """设置播放器实例"""
         self.player = player
         
+        # 订阅播放进度和状态
+        scheduler = get_scheduler()
+        for subscription in self._subscriptions:
+            scheduler.unsubscribe(subscription)
+        self._subscriptions = []
+        if self.player:
+            self._subscriptions = [
+                scheduler.subscribe(TOPIC_PLAYER_POSITION, self.on_position, rate=1, window=self),
+                scheduler.subscribe(TOPIC_PLAYER_STATE, self.on_state_changed, window=self),
+            ]
+            
         # 初始化默认可视化器
         if self.player:
             self.init_visualizer()
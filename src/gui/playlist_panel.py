@@ -1,14 +1,32 @@
 import wx
 import wx.dataview as dv
-from src.playlist import PlaylistManager
+from src.playlist import (PlaylistManager, PLAYLIST_CREATED, PLAYLIST_DELETED,
+                          PLAYLIST_RENAMED, TRACKS_ADDED, TRACKS_REMOVED, TRACK_MOVED,
+                          TRACKS_UPDATED, RECENT_PLAYED, WRITE_FAILED)
+from src.crawler import DirectoryCrawler
+from src.scheduler import get_scheduler, TOPIC_PLAYER_TRACK
 
 class PlaylistPanel(wx.Panel):
     def __init__(self, parent, api_client):
         super().__init__(parent)
         
         # 初始化播放列表管理器和播放器
+        self.api = api_client
         self.playlist_manager = PlaylistManager(api_client)
         self.player = None
+        self.library_index = None
+        
+        # 内容面板中的播放列表视图及其当前曲目订阅
+        self.playlist_view = None
+        self._track_subscription = None
+        
+        # 树中的项目：播放列表名称到项目，最近播放按顺序排列的项目
+        self._playlist_items = {}
+        self._recent_items = []
+        
+        # 正在进行的添加文件夹（目录遍历器和进度对话框）
+        self._crawler = None
+        self._crawl_dialog = None
         
         # 创建界面
         self._init_ui()
@@ -16,10 +34,34 @@ class PlaylistPanel(wx.Panel):
         # 绑定事件
         self._bind_events()
         
+        # 有效性检查结果更新状态栏中的失效曲目数
+        self.playlist_manager.validator.add_listener(self._on_validity_checked)
+        
+        # 播放列表的变化逐项更新到树中
+        self.playlist_manager.add_listener(self._on_playlists_changed)
+        
     def set_player(self, player):
         """设置播放器实例"""
         self.player = player
         
+    def set_library_index(self, library_index):
+        """设置曲库索引（用于修复移动过的曲目）"""
+        self.library_index = library_index
+        
+    def set_playlist_view(self, view):
+        """设置内容面板中的播放列表视图，处理其中的播放、移动和删除操作
+        
+        Args:
+            view: PlaylistView实例
+        """
+        self.playlist_view = view
+        view.Bind(wx.EVT_LIST_ITEM_ACTIVATED, self.on_list_item_activated)
+        view.Bind(wx.EVT_LIST_ITEM_RIGHT_CLICK, self.on_list_right_click)
+        view.Bind(wx.EVT_KEY_DOWN, self.on_list_key_down)
+        
+        # 当前播放的曲目在视图中加粗标记
+        self._track_subscription = get_scheduler().subscribe(TOPIC_PLAYER_TRACK, view.set_current)
+        
     def _init_ui(self):
         """初始化界面"""
         main_sizer = wx.BoxSizer(wx.VERTICAL)
@@ -32,6 +74,9 @@ class PlaylistPanel(wx.Panel):
             wx.ArtProvider.GetBitmap(wx.ART_DELETE, wx.ART_TOOLBAR))
         rename_list_tool = toolbar.AddTool(wx.ID_ANY, "重命名",
             wx.ArtProvider.GetBitmap(wx.ART_EDIT, wx.ART_TOOLBAR))
+        self.relink_tool = toolbar.AddTool(wx.ID_ANY, "修复曲目",
+            wx.ArtProvider.GetBitmap(wx.ART_FIND_AND_REPLACE, wx.ART_TOOLBAR),
+            "在曲库中查找被移动或重命名的曲目并更新播放列表")
         toolbar.Realize()
         main_sizer.Add(toolbar, 0, wx.EXPAND)
         
@@ -54,6 +99,7 @@ class PlaylistPanel(wx.Panel):
         self.Bind(wx.EVT_TOOL, self.on_new_playlist, id=wx.ID_ANY)
         self.Bind(wx.EVT_TOOL, self.on_delete_playlist, id=wx.ID_ANY)
         self.Bind(wx.EVT_TOOL, self.on_rename_playlist, id=wx.ID_ANY)
+        self.Bind(wx.EVT_TOOL, self.on_relink_playlist, id=self.relink_tool.GetId())
         
         # 树控件事件
         self.playlist_tree.Bind(dv.EVT_DATAVIEW_ITEM_START_EDITING, 
@@ -64,23 +110,91 @@ class PlaylistPanel(wx.Panel):
                               self.on_begin_drag)
         self.playlist_tree.Bind(dv.EVT_DATAVIEW_ITEM_DROP,
                               self.on_drop)
+                              
+        # 销毁时取消添加文件夹
+        self.Bind(wx.EVT_WINDOW_DESTROY, self.on_destroy)
         
     def _load_playlists(self):
-        """加载所有播放列表"""
+        """加载所有播放列表（重建整个树，之后的变化由_on_playlists_changed逐项更新）"""
         # 清空现有列表
         self.playlist_tree.DeleteChildren(self.root)
         self.playlist_tree.DeleteChildren(self.recent_root)
         
         # 加载用户播放列表
-        playlists = self.playlist_manager.get_all_playlists()
-        for playlist_name in playlists.keys():
-            self.playlist_tree.AppendItem(self.root, playlist_name)
-            
+        self._playlist_items = {
+            playlist_name: self.playlist_tree.AppendItem(self.root, playlist_name)
+            for playlist_name in self.playlist_manager.get_playlist_names()
+        }
+        
         # 加载最近播放列表
         recent_tracks = self.playlist_manager.get_recent_played()
-        for track in recent_tracks:
-            self.playlist_tree.AppendItem(self.recent_root, track['server_filename'])
+        self._recent_items = [self.playlist_tree.AppendItem(self.recent_root, track['server_filename'])
+                              for track in recent_tracks]
+                              
+    def _on_playlists_changed(self, event, *args):
+        """播放列表变化通知：只插入、删除或修改受影响的项目，其他项目（及选择）保持不变"""
+        if event == WRITE_FAILED:
+            # 在数据库写入线程中通知，转到主线程处理
+            get_scheduler().post(self._on_write_failed, *args)
+            return
+            
+        tree = self.playlist_tree
+        if event == PLAYLIST_CREATED:
+            name, = args
+            self._playlist_items[name] = tree.AppendItem(self.root, name)
+        elif event == PLAYLIST_DELETED:
+            name, = args
+            item = self._playlist_items.pop(name, None)
+            if item is not None:
+                tree.DeleteItem(item)
+            self.GetTopLevelParent().content_panel.close_playlist(name)
+        elif event == PLAYLIST_RENAMED:
+            old_name, new_name = args
+            item = self._playlist_items.pop(old_name, None)
+            if item is not None:
+                tree.SetItemText(item, new_name)
+                self._playlist_items[new_name] = item
+            content_panel = self.GetTopLevelParent().content_panel
+            if content_panel.rename_playlist(old_name, new_name):
+                self._show_playlist_status(new_name)
+        elif event in (TRACKS_ADDED, TRACKS_REMOVED, TRACK_MOVED, TRACKS_UPDATED):
+            self._sync_player(event, *args)
+            self._on_tracks_changed(event, *args)
+        elif event == RECENT_PLAYED:
+            track, old_index, dropped = args
+            # 已在最前面时不需要改动
+            if old_index == 0:
+                return
+            if old_index is not None:
+                tree.DeleteItem(self._recent_items.pop(old_index))
+            elif dropped and self._recent_items:
+                tree.DeleteItem(self._recent_items.pop())
+            self._recent_items.insert(0, tree.PrependItem(self.recent_root, track['server_filename']))
             
+    def _on_write_failed(self, names, error):
+        """播放列表修改未能写入数据库：重新读取受影响的播放列表并更新显示
+        
+        Args:
+            names: 涉及的播放列表名称列表
+            error: 写入时的异常
+        """
+        if not self:
+            return
+        self.playlist_manager.reload_playlists(names)
+        self._load_playlists()
+        
+        # 正在显示的播放列表受影响时重新显示数据库中的内容（已不存在时清空）
+        content_panel = self.GetTopLevelParent().content_panel
+        source = content_panel.shown_source
+        if source and source[0] == 'playlist' and source[1] in names:
+            if self.playlist_manager.get_playlist(source[1]) is None:
+                content_panel.close_playlist(source[1])
+            else:
+                self.load_playlist_content(source[1])
+                
+        wx.MessageBox(f"播放列表 {', '.join(names)} 的修改未能保存: {error}\n已恢复为保存的内容",
+                      "保存播放列表失败", wx.OK | wx.ICON_WARNING)
+                      
     def on_new_playlist(self, event):
         """创建新播放列表"""
         dialog = wx.TextEntryDialog(self, "请输入播放列表名称：", "新建播放列表")
@@ -88,7 +202,6 @@ class PlaylistPanel(wx.Panel):
             name = dialog.GetValue().strip()
             if name:
                 self.playlist_manager.create_playlist(name)
-                self._load_playlists()
         dialog.Destroy()
         
     def on_delete_playlist(self, event):
@@ -107,7 +220,6 @@ class PlaylistPanel(wx.Panel):
                         "确认删除",
                         wx.YES_NO | wx.NO_DEFAULT | wx.ICON_QUESTION) == wx.YES:
             self.playlist_manager.delete_playlist(name)
-            self._load_playlists()
             
     def on_rename_playlist(self, event):
         """重命名播放列表"""
@@ -129,9 +241,32 @@ class PlaylistPanel(wx.Panel):
             new_name = dialog.GetValue().strip()
             if new_name and new_name != old_name:
                 self.playlist_manager.rename_playlist(old_name, new_name)
-                self._load_playlists()
         dialog.Destroy()
         
+    def on_relink_playlist(self, event):
+        """修复选中播放列表中被移动或重命名的曲目，并显示结果"""
+        item = self.playlist_tree.GetSelection()
+        if not item.IsOk() or self.playlist_tree.GetItemParent(item) != self.root:
+            wx.MessageBox("请先选择一个播放列表", "修复曲目", wx.OK | wx.ICON_INFORMATION)
+            return
+        if self.library_index is None:
+            return
+            
+        # 修复和去重的结果通过变化通知逐项更新到播放列表视图
+        name = self.playlist_tree.GetItemText(item)
+        report = self.playlist_manager.relink_playlist(name, self.library_index)
+        if report is None:
+            return
+            
+        lines = [f"已修复 {len(report['relinked'])} 首，移除重复 {len(report['removed'])} 首，"
+                 f"{len(report['unresolved'])} 首未能找到"]
+        # 对话框中最多列出前20首未找到的曲目
+        for file, reason in report['unresolved'][:20]:
+            lines.append(f"{file['path']}（{reason}）")
+        if len(report['unresolved']) > 20:
+            lines.append(f"……另有 {len(report['unresolved']) - 20} 首")
+        wx.MessageBox("\n".join(lines), f"修复播放列表 '{name}'", wx.OK | wx.ICON_INFORMATION)
+        
     def on_start_editing(self, event):
         """开始编辑项目时的处理"""
         item = event.GetItem()
@@ -172,64 +307,162 @@ class PlaylistPanel(wx.Panel):
                 pane.Show()
             main_window._mgr.Update()
             
-            # 清空列表和数据
-            content_panel.list.DeleteAllItems()
-            content_panel.file_data = []
-            
-            # 更新列表标题
-            for col, title in enumerate(["歌曲名称", "大小", "修改时间"]):
-                item = wx.ListItem()
-                item.SetText(title)
-                content_panel.list.SetColumn(col, item)
-            
-            for track in playlist:
-                index = content_panel.list.GetItemCount()
-                content_panel.list.InsertItem(index, track['server_filename'])
-                content_panel.list.SetItem(index, 1, content_panel._format_size(track['size']))
-                # 格式化时间戳为易读格式
-                timestamp = track['server_mtime']
-                time_str = wx.DateTime.FromTimeT(timestamp).Format('%Y-%m-%d %H:%M:%S')
-                content_panel.list.SetItem(index, 2, time_str)
-                # 存储文件数据并设置索引
-                content_panel.file_data.append(track)
-                content_panel.list.SetItemData(index, len(content_panel.file_data) - 1)
-                
-            # 更新状态栏
-            total_size = sum(track['size'] for track in playlist)
-            content_panel.status_bar.SetStatusText(f"播放列表 '{playlist_name}' - {len(playlist)} 个音频文件", 0)
-            content_panel.status_bar.SetStatusText(f"总大小: {content_panel._format_size(total_size)}", 1)
+            # 在播放列表视图中显示，显示文本按需生成，当前曲目加粗标记
+            current = self.player.current_file if self.player else None
+            content_panel.show_playlist(playlist_name, playlist, current)
             
-            # 解绑原有的双击事件（如果存在）
-            if hasattr(content_panel.list, 'play_handler_bound'):
-                content_panel.list.Unbind(wx.EVT_LIST_ITEM_ACTIVATED)
+            # 在后台检查曲目是否仍然存在，并更新状态栏
+            self.playlist_manager.check_playlist(playlist_name)
+            self._show_playlist_status(playlist_name)
             
-            # 绑定双击播放事件
-            content_panel.list.Bind(wx.EVT_LIST_ITEM_ACTIVATED, self.on_list_item_activated)
-            content_panel.list.play_handler_bound = True
+    def _show_playlist_status(self, playlist_name):
+        """在内容面板的状态栏显示播放列表的文件数、有效性检查进度和总大小"""
+        playlist = self.playlist_manager.get_playlist(playlist_name) or []
+        content_panel = self.GetTopLevelParent().content_panel
+        total_size = sum(track['size'] for track in playlist)
+        summary = self.playlist_manager.validator.summarize(playlist)
+        status = f"播放列表 '{playlist_name}' - {len(playlist)} 个音频文件"
+        if summary['checked'] < summary['total']:
+            status += f"，已检查 {summary['checked']}/{summary['total']}"
+        if summary['invalid']:
+            status += f"，{summary['invalid']} 个已失效"
+        content_panel.status_bar.SetStatusText(status, 0)
+        content_panel.status_bar.SetStatusText(f"总大小: {content_panel._format_size(total_size)}", 1)
+        
+    def _on_validity_checked(self, results):
+        """有效性检查线程的结果回调：转到主线程更新状态栏"""
+        get_scheduler().post(self._refresh_validity_status)
+        
+    def _refresh_validity_status(self):
+        """正在显示播放列表时更新其检查进度"""
+        if not self:
+            return
+        source = self.GetTopLevelParent().content_panel.shown_source
+        if source and source[0] == 'playlist':
+            self._show_playlist_status(source[1])
+            
+    def _sync_player(self, event, playlist_name, *args):
+        """播放器正在播放该播放列表对象时，移动或移除曲目后调整其当前索引"""
+        if not self.player or self.player.playlist is not self.playlist_manager.playlists.get(playlist_name):
+            return
+        if event == TRACK_MOVED:
+            self.player.playlist_track_moved(*args)
+        elif event == TRACKS_REMOVED:
+            self.player.playlist_tracks_removed(*args)
+            
+    def _on_tracks_changed(self, event, playlist_name, *args):
+        """播放列表内容变化：正在显示该播放列表时逐项更新视图和状态栏"""
+        view = self.playlist_view
+        content_panel = self.GetTopLevelParent().content_panel
+        if view is None or content_panel.shown_source != ('playlist', playlist_name):
+            return
+            
+        if event == TRACKS_ADDED:
+            files, = args
+            view.append_files(files)
+        elif event == TRACKS_REMOVED:
+            indices, = args
+            view.remove_tracks(indices)
+        elif event == TRACK_MOVED:
+            from_index, to_index = args
+            view.move_track(from_index, to_index)
+        elif event == TRACKS_UPDATED:
+            indices, = args
+            playlist = self.playlist_manager.get_playlist(playlist_name)
+            view.update_tracks(indices, [playlist[index] for index in indices])
+        self._show_playlist_status(playlist_name)
         
     def on_list_item_activated(self, event):
-        """处理列表项目双击事件"""
-        if self.player:
-            index = event.GetIndex()
-            main_window = self.GetTopLevelParent()
-            content_panel = main_window.content_panel
-            if 0 <= index < len(content_panel.file_data):
-                track = content_panel.file_data[index]
-                # 先停止当前播放
-                self.player.stop()
-                # 加载并播放新文件
-                if self.player.load_file(track):
-                    self.player.play()
-                    # 更新播放器面板显示
-                    main_window.control_panel.update_track_info({
-                        'name': track['server_filename'],
-                        'artist': '未知艺术家',
-                        'album': '未知专辑'
-                    })
-                    # 添加到最近播放列表
-                    self.playlist_manager.add_to_recent(track)
-                    self.refresh()
-
+        """双击播放列表视图中的曲目：从该曲目开始按播放列表顺序播放"""
+        view = self.playlist_view
+        row = event.GetIndex()
+        if not self.player or not 0 <= row < len(view.model):
+            return
+            
+        playlist = self.playlist_manager.get_playlist(view.playlist_name)
+        if playlist is None:
+            return
+        index = view.playlist_index(row)
+        
+        # 优先检查接下来要播放的曲目
+        self.playlist_manager.check_upcoming(playlist, index)
+        
+        # 播放器直接使用播放列表对象，之后的修改也会反映到播放顺序中
+        # （移动、移除曲目时由_sync_player调整播放器的当前索引）
+        if self.player.set_playlist(playlist, index):
+            self._on_track_started(playlist[index])
+            
+    def on_list_right_click(self, event):
+        """播放列表视图的右键菜单：移动、删除曲目和定位当前播放"""
+        view = self.playlist_view
+        indices = view.get_selected_indices()
+        menu = wx.Menu()
+        
+        # 只有按播放列表顺序完整显示时才能移动（否则上下相邻的行不是相邻的曲目）
+        movable = len(indices) == 1 and view.model.in_playlist_order
+        up_item = menu.Append(wx.ID_ANY, "上移\tAlt+Up")
+        up_item.Enable(movable and indices[0] > 0)
+        down_item = menu.Append(wx.ID_ANY, "下移\tAlt+Down")
+        down_item.Enable(movable and indices[0] < len(view.model.files) - 1)
+        remove_item = menu.Append(wx.ID_ANY, "从播放列表移除\tDelete")
+        remove_item.Enable(bool(indices))
+        menu.AppendSeparator()
+        current_item = menu.Append(wx.ID_ANY, "定位当前播放\tCtrl+L")
+        current_item.Enable(view.model.current is not None)
+        
+        self.Bind(wx.EVT_MENU, lambda e: self._move_selected(-1), up_item)
+        self.Bind(wx.EVT_MENU, lambda e: self._move_selected(1), down_item)
+        self.Bind(wx.EVT_MENU, lambda e: self._remove_selected(), remove_item)
+        self.Bind(wx.EVT_MENU, lambda e: view.scroll_to_current(), current_item)
+        
+        view.PopupMenu(menu)
+        menu.Destroy()
+        
+    def on_list_key_down(self, event):
+        """播放列表视图的快捷键"""
+        key = event.GetKeyCode()
+        if event.AltDown() and key == wx.WXK_UP:
+            self._move_selected(-1)
+        elif event.AltDown() and key == wx.WXK_DOWN:
+            self._move_selected(1)
+        elif key == wx.WXK_DELETE:
+            self._remove_selected()
+        elif event.ControlDown() and key == ord('L'):
+            self.playlist_view.scroll_to_current()
+        else:
+            event.Skip()
+            
+    def _move_selected(self, offset):
+        """把选中的一首曲目上移或下移一位，视图通过变化通知更新
+        
+        Args:
+            offset: -1为上移，1为下移
+        """
+        view = self.playlist_view
+        indices = view.get_selected_indices()
+        if len(indices) != 1 or not view.model.in_playlist_order:
+            return
+        to_index = indices[0] + offset
+        if 0 <= to_index < len(view.model.files):
+            self.playlist_manager.reorder_playlist(view.playlist_name, indices[0], to_index)
+            
+    def _remove_selected(self):
+        """从播放列表中移除选中的曲目"""
+        view = self.playlist_view
+        indices = view.get_selected_indices()
+        if indices:
+            self.playlist_manager.remove_from_playlist(view.playlist_name, indices)
+            
+    def _on_track_started(self, track):
+        """开始播放曲目后更新播放器面板显示并记录到最近播放"""
+        main_window = self.GetTopLevelParent()
+        main_window.control_panel.update_track_info({
+            'name': track['server_filename'],
+            'artist': '未知艺术家',
+            'album': '未知专辑'
+        })
+        self.playlist_manager.add_to_recent(track)
+        
     def play_track(self, track_name):
         """播放指定曲目"""
         if self.player:
@@ -244,15 +477,15 @@ class PlaylistPanel(wx.Panel):
                         main_window = self.GetTopLevelParent()
                         main_window.control_panel.update_track_info(track)
                     break
+                    
+    def _choose_playlist(self):
+        """让用户选择（没有播放列表时先创建）要添加到的播放列表
         
-    def add_file(self, file_info_list):
-        """添加文件到播放列表
-        
-        Args:
-            file_info_list: 文件信息字典列表
+        Returns:
+            播放列表名称，取消时返回None
         """
         # 获取所有播放列表名称
-        playlists = list(self.playlist_manager.get_all_playlists().keys())
+        playlists = self.playlist_manager.get_playlist_names()
         
         if not playlists:
             # 如果没有播放列表，先创建一个
@@ -260,34 +493,124 @@ class PlaylistPanel(wx.Panel):
                            "添加到播放列表",
                            wx.YES_NO | wx.YES_DEFAULT | wx.ICON_QUESTION) == wx.YES:
                 dialog = wx.TextEntryDialog(self, "请输入播放列表名称：", "新建播放列表")
-                if dialog.ShowModal() == wx.ID_OK:
-                    name = dialog.GetValue().strip()
-                    if name:
-                        self.playlist_manager.create_playlist(name)
-                        playlists = [name]
-                    else:
-                        return
+                name = dialog.GetValue().strip() if dialog.ShowModal() == wx.ID_OK else ""
                 dialog.Destroy()
+                if not name:
+                    return None
+                self.playlist_manager.create_playlist(name)
+                playlists = [name]
             else:
-                return
-        
+                return None
+                
         # 让用户选择播放列表
         dialog = wx.SingleChoiceDialog(self,
                                      "请选择要添加到的播放列表：",
                                      "添加到播放列表",
                                      playlists)
+        playlist_name = dialog.GetStringSelection() if dialog.ShowModal() == wx.ID_OK else None
+        dialog.Destroy()
+        return playlist_name
         
-        if dialog.ShowModal() == wx.ID_OK:
-            playlist_name = dialog.GetStringSelection()
-            # 添加文件到播放列表
-            if isinstance(file_info_list, list):
-                self.playlist_manager.add_to_playlist(playlist_name, file_info_list)
-            else:
-                self.playlist_manager.add_to_playlist(playlist_name, [file_info_list])
-            # 刷新显示
-            self._load_playlists()
+    def add_file(self, file_info_list):
+        """添加文件到播放列表
+        
+        Args:
+            file_info_list: 文件信息字典或其列表
+        """
+        if isinstance(file_info_list, list):
+            self.add_files(file_info_list)
+        else:
+            self.add_files([file_info_list])
             
-        dialog.Destroy()
+    def add_files(self, files):
+        """把多个文件一次添加到播放列表
+        
+        只弹出一次选择对话框，去重和保存各一次，然后增量更新显示
+        
+        Args:
+            files: 文件信息字典列表
+        """
+        if not files:
+            return
+        playlist_name = self._choose_playlist()
+        if playlist_name:
+            self.playlist_manager.add_files(playlist_name, files)
+            
+    def add_directory(self, path):
+        """把文件夹下的全部音频文件添加到播放列表
+        
+        在后台遍历文件夹，找到的文件分批加入播放列表并显示进度，可随时取消；
+        没有正在播放的曲目时，找到第一首就开始播放，其余文件继续在后台添加
+        
+        Args:
+            path: 目录路径
+        """
+        if self._crawler is not None and self._crawler.running:
+            wx.MessageBox("正在添加其他文件夹，请等待完成或取消后再试", "提示",
+                        wx.OK | wx.ICON_INFORMATION)
+            return
+            
+        playlist_name = self._choose_playlist()
+        if not playlist_name:
+            return
+            
+        play_first = [self.player is not None and not self.player.is_playing()]
+        
+        def on_batch(files):
+            playlist = self.playlist_manager.get_playlist(playlist_name)
+            if playlist is None:
+                # 播放列表已被删除
+                self._finish_crawl()
+                return
+            self.playlist_manager.add_files(playlist_name, files)
+            if play_first[0]:
+                play_first[0] = False
+                first_path = files[0]['path']
+                index = next(i for i, track in enumerate(playlist) if track['path'] == first_path)
+                # 播放器直接使用播放列表对象，之后加入的文件也会按顺序播放
+                if self.player.set_playlist(playlist, index):
+                    self._on_track_started(playlist[index])
+                    
+        def on_progress(folders, pending, tracks):
+            if self._crawl_dialog:
+                message = f"已查找 {folders} 个文件夹（剩余 {pending} 个），找到 {tracks} 首音乐"
+                keep_going, _ = self._crawl_dialog.Pulse(message)
+                if not keep_going:
+                    self._finish_crawl()
+                    
+        def on_done():
+            tracks = self._crawler.tracks
+            self._finish_crawl()
+            if tracks == 0:
+                wx.MessageBox("未在该目录下找到音频文件", "提示", wx.OK | wx.ICON_INFORMATION)
+                
+        self._crawl_dialog = wx.ProgressDialog(
+            "添加文件夹",
+            f"正在查找 {path} 中的音乐...",
+            parent=self.GetTopLevelParent(),
+            style=wx.PD_CAN_ABORT | wx.PD_ELAPSED_TIME | wx.PD_SMOOTH
+        )
+        self._crawler = DirectoryCrawler(self.api, on_batch, on_progress, on_done)
+        self._crawler.start(path)
+        
+    def _finish_crawl(self):
+        """结束添加文件夹：停止遍历并关闭进度对话框"""
+        if self._crawler is not None:
+            self._crawler.cancel()
+        if self._crawl_dialog:
+            self._crawl_dialog.Destroy()
+        self._crawl_dialog = None
+        
+    def on_destroy(self, event):
+        """面板销毁时取消添加文件夹，并写入尚未保存的播放列表修改"""
+        if event.GetEventObject() is self:
+            if self._crawler is not None:
+                self._crawler.cancel()
+            self.playlist_manager.validator.remove_listener(self._on_validity_checked)
+            self.playlist_manager.remove_listener(self._on_playlists_changed)
+            get_scheduler().unsubscribe(self._track_subscription)
+            self.playlist_manager.close()
+        event.Skip()
         
     def refresh(self):
         """刷新播放列表显示"""
@@ -337,14 +660,12 @@ class PlaylistPanel(wx.Panel):
         target_index = -1
         playlist = self.playlist_manager.get_playlist(source_text)
         if playlist:
-            source_index = list(self.playlist_manager.playlists.keys()).index(source_text)
-            target_index = list(self.playlist_manager.playlists.keys()).index(target_text)
+            source_index = self.playlist_manager.get_playlist_names().index(source_text)
+            target_index = self.playlist_manager.get_playlist_names().index(target_text)
             
             # 调整播放列表顺序
             if source_index != -1 and target_index != -1:
                 # 使用playlist_manager的reorder_playlist方法
                 self.playlist_manager.reorder_playlist(source_text, source_index, target_index)
-                # 刷新显示
-                self._load_playlists()
                 
         event.Allow()
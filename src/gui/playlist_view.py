@@ -0,0 +1,247 @@
+"""
+播放列表视图模块
+播放列表内容专用的虚拟列表：默认按播放列表顺序显示，显示文本按需生成并缓存，
+播放列表的修改（追加、删除、移动、替换）逐项应用到模型，不重新设置整个列表，
+当前播放的曲目加粗显示并可以快速定位
+"""
+
+import wx
+import numpy as np
+from typing import Dict, List, Optional
+from src.gui.file_list import FileListModel, VirtualFileList
+
+# 列定义：(标题, 宽度)
+PLAYLIST_COLUMNS = [("#", 50), ("歌曲名称", 250), ("大小", 100), ("修改时间", 150)]
+
+# 序号列（按序号排序即播放列表顺序）
+COLUMN_INDEX = 0
+
+# 当前曲目在序号列中的标记
+CURRENT_MARK = "▶"
+
+
+class PlaylistModel(FileListModel):
+    """播放列表模型
+    
+    文件下标即曲目在播放列表中的索引；第0列为序号，其余各列与FileListModel相同
+    """
+    
+    def __init__(self):
+        super().__init__()
+        # 当前播放曲目在播放列表中的索引
+        self.current: Optional[int] = None
+        
+    def clear(self) -> None:
+        """清空模型"""
+        super().clear()
+        self.current = None
+        
+    @property
+    def in_playlist_order(self) -> bool:
+        """是否按播放列表顺序完整显示（此时行号即播放列表索引，可以移动曲目）"""
+        return self.sort_column in (None, COLUMN_INDEX) and self.ascending and not self.query
+        
+    def get_text(self, row: int, column: int) -> str:
+        """获取指定行和列的显示文本（序号不缓存，其他列见FileListModel）"""
+        if column != COLUMN_INDEX:
+            return super().get_text(row, column - 1)
+        if not 0 <= row < len(self.order):
+            return ""
+        index = int(self.order[row])
+        return CURRENT_MARK if index == self.current else str(index + 1)
+        
+    def _sort_keys(self) -> Optional[np.ndarray]:
+        """当前排序列的排序键，按序号排序即播放列表顺序（返回None）"""
+        if self.sort_column in (None, COLUMN_INDEX):
+            return None
+        return (self._names, self._sizes, self._mtimes)[self.sort_column - 1]
+        
+    def move(self, from_index: int, to_index: int) -> None:
+        """移动一首曲目（与PlaylistManager.reorder_playlist一致）
+        
+        Args:
+            from_index: 原索引
+            to_index: 新索引
+        """
+        self.files.insert(to_index, self.files.pop(from_index))
+        for name in ('_names', '_sizes', '_mtimes', '_mask'):
+            keys = getattr(self, name)
+            setattr(self, name, np.insert(np.delete(keys, from_index), to_index, keys[from_index]))
+            
+        current = self.current
+        if current == from_index:
+            self.current = to_index
+        elif current is not None and from_index < current <= to_index:
+            self.current = current - 1
+        elif current is not None and to_index <= current < from_index:
+            self.current = current + 1
+            
+        # 缓存按文件下标保存，移动后下标变化
+        self._text_cache.clear()
+        self._update_order()
+        
+    def remove(self, indices: List[int]) -> None:
+        """删除曲目
+        
+        Args:
+            indices: 播放列表索引列表
+        """
+        keep = np.ones(len(self.files), dtype=bool)
+        keep[indices] = False
+        self.files = [file for file, kept in zip(self.files, keep) if kept]
+        for name in ('_names', '_sizes', '_mtimes', '_mask'):
+            setattr(self, name, getattr(self, name)[keep])
+            
+        if self.current is not None:
+            self.current = int(keep[:self.current].sum()) if keep[self.current] else None
+        self._text_cache.clear()
+        self._update_order()
+        
+    def update(self, indices: List[int], files: List[Dict]) -> None:
+        """替换曲目信息（如修复移动过的曲目后）
+        
+        Args:
+            indices: 播放列表索引列表
+            files: 对应的新文件信息
+        """
+        if not indices:
+            return
+        names = np.array([file['server_filename'].lower() for file in files])
+        if names.itemsize > self._names.itemsize:
+            # 新文件名比原数组的定长字符串更长，扩大数组的字符串长度
+            self._names = self._names.astype(names.dtype)
+            
+        for index, file in zip(indices, files):
+            self.files[index] = file
+            self._text_cache.pop(index, None)
+        self._names[indices] = names
+        self._sizes[indices] = [file.get('size', 0) for file in files]
+        self._mtimes[indices] = [file.get('server_mtime', 0) for file in files]
+        self._mask[indices] = self._match(names)
+        self._update_order()
+        
+    def index_of(self, path: str) -> Optional[int]:
+        """按路径查找曲目在播放列表中的索引"""
+        for index, file in enumerate(self.files):
+            if file['path'] == path:
+                return index
+        return None
+        
+    def row_of(self, index: int) -> Optional[int]:
+        """播放列表索引对应的显示行号，被过滤掉时返回None"""
+        rows = np.flatnonzero(self.order == index)
+        return int(rows[0]) if len(rows) else None
+
+
+class PlaylistView(VirtualFileList):
+    """播放列表内容的虚拟列表控件
+    
+    点击列标题排序，点击#列恢复播放列表顺序；当前播放的曲目加粗并在#列显示标记
+    """
+    
+    columns = PLAYLIST_COLUMNS
+    default_sort = None
+    
+    def __init__(self, parent):
+        """初始化播放列表视图
+        
+        Args:
+            parent: 父窗口
+        """
+        super().__init__(parent, PlaylistModel())
+        
+        # 正在显示的播放列表名称
+        self.playlist_name: Optional[str] = None
+        
+        # 当前曲目的显示样式
+        self._current_attr = wx.ListItemAttr()
+        font = self.GetFont()
+        font.SetWeight(wx.FONTWEIGHT_BOLD)
+        self._current_attr.SetFont(font)
+        
+    def OnGetItemAttr(self, item):
+        """虚拟列表回调：当前曲目所在行加粗"""
+        current = self.model.current
+        if current is not None and 0 <= item < len(self.model) and self.model.order[item] == current:
+            return self._current_attr
+        return None
+        
+    def set_playlist(self, name: str, files: List[Dict], current: Optional[Dict] = None) -> None:
+        """显示播放列表
+        
+        Args:
+            name: 播放列表名称
+            files: 播放列表内容（按播放列表顺序）
+            current: 当前播放的曲目
+        """
+        self.playlist_name = name
+        self.set_files(files)
+        self.set_current(current)
+        
+    def set_current(self, track: Optional[Dict]) -> None:
+        """设置当前播放的曲目（可直接订阅播放器的当前曲目主题）
+        
+        Args:
+            track: 文件信息，不在播放列表中或为None时不标记任何曲目
+        """
+        index = self.model.index_of(track['path']) if track else None
+        if index != self.model.current:
+            self.model.current = index
+            self.Refresh()
+            
+    def scroll_to_current(self) -> bool:
+        """滚动到当前曲目并选中它
+        
+        Returns:
+            当前曲目是否在列表中显示
+        """
+        if self.model.current is None:
+            return False
+        row = self.model.row_of(self.model.current)
+        if row is None:
+            return False
+        self._clear_selection()
+        self.Select(row)
+        self.Focus(row)
+        self.EnsureVisible(row)
+        return True
+        
+    def playlist_index(self, row: int) -> int:
+        """显示行对应的播放列表索引"""
+        return int(self.model.order[row])
+        
+    def get_selected_indices(self) -> List[int]:
+        """选中曲目的播放列表索引"""
+        indices = []
+        item = -1
+        while True:
+            item = self.GetNextItem(item, wx.LIST_NEXT_ALL, wx.LIST_STATE_SELECTED)
+            if item == -1:
+                break
+            indices.append(self.playlist_index(item))
+        return indices
+        
+    def remove_tracks(self, indices: List[int]) -> None:
+        """应用播放列表中曲目的删除"""
+        self._clear_selection()
+        self.model.remove(indices)
+        self.refresh()
+        
+    def move_track(self, from_index: int, to_index: int) -> None:
+        """应用播放列表中曲目的移动，移动的曲目原来被选中时保持选中"""
+        selected = from_index in self.get_selected_indices()
+        self._clear_selection()
+        self.model.move(from_index, to_index)
+        self.refresh()
+        if selected:
+            row = self.model.row_of(to_index)
+            if row is not None:
+                self.Select(row)
+                self.Focus(row)
+                self.EnsureVisible(row)
+                
+    def update_tracks(self, indices: List[int], files: List[Dict]) -> None:
+        """应用播放列表中曲目信息的替换"""
+        self._clear_selection()
+        self.model.update(indices, files)
+        self.refresh()
@@ -1,6 +1,7 @@
 import wx
 import numpy as np
 from math import pi, sin, cos
+from src.analyzer import get_band_starts, map_bands
 from .visualizer_base import VisualizerBase
 
 class CircularVisualizer(VisualizerBase):
@@ -20,144 +21,265 @@ class CircularVisualizer(VisualizerBase):
             'inner_radius': 50,  # 内圆半径
             'bar_width': 5,  # 频谱柱宽度（角度）
             'rotation_speed': 0.5,  # 旋转速度
+            'beat_pulse': 4.0,  # 节拍时旋转速度的最大附加倍数
+            'pulse_decay': 0.85,  # 节拍脉动每帧的衰减系数
             'smoothing': 0.8,  # 平滑系数
             'fft_size': 1024,  # FFT大小
             'min_db': -70,  # 最小分贝值
             'max_db': 0,  # 最大分贝值
+            'band_scale': 'log',  # 频率刻度（log或mel）
         })
         
         # 初始化频谱数据和旋转角度
         self.fft_data = np.zeros(self.config['fft_size'] // 2)
         self.rotation = 0.0
         
-    def process_audio_data(self, data):
-        """处理音频数据，计算频谱
+        # 节拍脉动强度，由on_beat()设置，每帧衰减
+        self._pulse = 0.0
+        
+        # 频谱柱映射（在配置变化时重新计算）
+        self.num_bars = 0
+        self.band_starts = None
+        self.display_data = np.zeros(0)
+        
+        # 几何缓存：每根柱四个顶点的单位方向向量和半径，以及顶点输出缓冲区
+        self._unit_vectors = np.zeros((0, 2))
+        self._rotated = np.zeros((0, 2))
+        self._radii = np.zeros((0, 1))
+        self._vertices = np.zeros((0, 2))
+        
+        # 光栅化（threaded模式）用的极坐标查找表和缓冲区
+        self._region = (slice(0, 0), slice(0, 0))
+        self._pixel_radius = np.zeros((0, 0), dtype=np.float32)
+        self._pixel_angle = np.zeros((0, 0), dtype=np.float32)
+        self._pixel_bar = np.zeros((0, 0), dtype=np.intp)
+        self._pixel_outer = np.zeros((0, 0), dtype=np.float32)
+        self._bar_mask = np.zeros((0, 0), dtype=bool)
+        self._inner_mask = np.zeros((0, 0), dtype=bool)
+        self._outer_radii = np.zeros(1)
+        self._radial_rgba = np.zeros((0, 0), dtype=np.uint32)
+        self._inner_rgba = None
+        self._background_rgba = None
+        
+        # 跨帧复用的画笔和画刷
+        self._brush_key = None
+        self._bar_brush = None
+        self._inner_brush = None
+        self._pen = None
+        
+    def update_layout(self, width, height):
+        """根据柱宽重新计算频谱柱数量和频带映射
         
         Args:
-            data: 原始音频数据
-            
-        Returns:
-            numpy.ndarray: 处理后的频谱数据
+            width: 绘制区域宽度
+            height: 绘制区域高度
         """
-        # 应用汉宁窗
-        windowed_data = data * np.hanning(len(data))
+        self.num_bars = int(360 / self.config['bar_width'])
+        self.band_starts = get_band_starts(
+            len(self.fft_data) * 2, self.num_bars,
+            self.get_sample_rate(), self.config['band_scale']
+        )
+        self.display_data = np.zeros(self.num_bars)
         
-        # 执行FFT
-        fft = np.fft.fft(windowed_data)[:len(data)//2]
+        # 每根柱的四个顶点依次为：内圆起点、外圆起点、外圆终点、内圆终点，
+        # 所有柱首尾相连构成一个星形多边形，内圆部分最终被内圆覆盖
+        angles = np.arange(self.num_bars) * self.config['bar_width'] * pi / 180
+        half_width = self.config['bar_width'] * pi / 360
+        vertex_angles = np.repeat(angles, 4) + np.tile(
+            [-half_width, -half_width, half_width, half_width], self.num_bars)
+        self._unit_vectors = np.column_stack((np.cos(vertex_angles), np.sin(vertex_angles)))
+        self._rotated = np.empty_like(self._unit_vectors)
+        self._radii = np.full((self.num_bars * 4, 1), float(self.config['inner_radius']))
+        self._vertices = np.empty_like(self._unit_vectors)
         
-        # 计算频谱幅度（分贝）
-        magnitude = np.abs(fft)
-        magnitude = 20 * np.log10(magnitude)
+        self._update_raster_tables(width, height)
         
-        # 归一化到配置的分贝范围
-        magnitude = np.clip(magnitude, self.config['min_db'], self.config['max_db'])
-        magnitude = (magnitude - self.config['min_db']) / (self.config['max_db'] - self.config['min_db'])
+    def _update_raster_tables(self, width, height):
+        """计算每个像素的极坐标和径向渐变颜色
         
-        return magnitude
+        Args:
+            width: 绘制区域宽度
+            height: 绘制区域高度
+        """
+        center_x = width / 2
+        center_y = height / 2
+        max_radius = min(width, height) / 2 - 10
+        inner_radius = self.config['inner_radius']
         
-    def draw(self, gc, width, height):
-        """绘制环形频谱
+        # 只处理环形所在的正方形区域
+        extent = max(max_radius, inner_radius) + 1
+        x0 = int(max(0, np.floor(center_x - extent)))
+        x1 = int(min(width, np.ceil(center_x + extent)))
+        y0 = int(max(0, np.floor(center_y - extent)))
+        y1 = int(min(height, np.ceil(center_y + extent)))
+        self._region = (slice(y0, max(y0, y1)), slice(x0, max(x0, x1)))
+        
+        ys, xs = np.mgrid[y0:max(y0, y1), x0:max(x0, x1)].astype(np.float32)
+        xs -= center_x - 0.5
+        ys -= center_y - 0.5
+        self._pixel_radius = np.hypot(xs, ys)
+        self._pixel_angle = np.degrees(np.arctan2(ys, xs)) % 360
+        self._pixel_bar = np.zeros(xs.shape, dtype=np.intp)
+        self._pixel_outer = np.zeros(xs.shape, dtype=np.float32)
+        self._bar_mask = np.zeros(xs.shape, dtype=bool)
+        self._inner_mask = self._pixel_radius <= inner_radius
+        
+        # 多出的一项对应不足一根柱宽的剩余角度，半径为负即不绘制
+        self._outer_radii = np.full(self.num_bars + 1, -1.0, dtype=np.float32)
+        
+        # 径向渐变：内圆处为内侧颜色，最大半径处为外侧颜色
+        inner_color = self.color_rgb(self.config['color'], 120).astype(np.float32)
+        outer_color = self.color_rgb(self.config['color'], 50).astype(np.float32)
+        span = max(max_radius - inner_radius, 1)
+        t = np.clip((self._pixel_radius - inner_radius) / span, 0, 1)[..., None]
+        self._radial_rgba = self.pack_rgba((inner_color * (1 - t) + outer_color * t).astype(np.uint8))
+        self._inner_rgba = self.pack_rgba(self.color_rgb(self.config['color'], 140))
+        self._background_rgba = self.pack_rgba(self.color_rgb(self.config['background']))
+        
+    def _get_brushes(self, gc, center_x, center_y, max_radius):
+        """获取缓存的画笔和画刷，仅在尺寸或颜色变化时重建
         
         Args:
             gc: 图形上下文
+            center_x: 中心点x坐标
+            center_y: 中心点y坐标
+            max_radius: 最大半径
+            
+        Returns:
+            tuple: (画笔, 频谱柱径向渐变画刷, 内圆画刷)
+        """
+        key = (center_x, center_y, max_radius, self.config['color'], self.config['inner_radius'])
+        if key != self._brush_key:
+            color = wx.Colour(self.config['color'])
+            
+            # 径向渐变：内圆处为内侧颜色，最大半径处为外侧颜色
+            stops = wx.GraphicsGradientStops(
+                color.ChangeLightness(120),  # 内侧颜色
+                color.ChangeLightness(50)    # 外侧颜色
+            )
+            if max_radius > 0:
+                stops.Add(color.ChangeLightness(120),
+                          min(1.0, self.config['inner_radius'] / max_radius))
+            self._bar_brush = gc.CreateRadialGradientBrush(
+                center_x, center_y, center_x, center_y, max(max_radius, 1), stops)
+            self._inner_brush = gc.CreateBrush(wx.Brush(color.ChangeLightness(140)))
+            self._pen = gc.CreatePen(wx.Pen(color))
+            self._brush_key = key
+        return self._pen, self._bar_brush, self._inner_brush
+        
+    def on_beat(self, strength, tempo):
+        """节拍时让旋转速度脉动
+        
+        Args:
+            strength: 节拍强度（0-1）
+            tempo: 当前节拍速度（BPM）
+        """
+        self._pulse = max(self._pulse, strength)
+        
+    def update_frame(self, width, height):
+        """平滑频谱、聚合到频谱柱并推进旋转角度
+        
+        Args:
             width: 绘制区域宽度
             height: 绘制区域高度
         """
-        # 获取并处理音频数据
-        raw_data = self.get_audio_data()
-        current_fft = self.process_audio_data(raw_data)
+        # 获取共享分析器计算的频谱
+        current_fft = self.get_spectrum_data()
+        if len(self.fft_data) != len(current_fft):
+            self.fft_data = np.zeros(len(current_fft))
+            self.update_layout(width, height)
         
         # 平滑处理
-        self.fft_data = self.config['smoothing'] * self.fft_data + \
-                       (1 - self.config['smoothing']) * current_fft
+        self.fft_data *= self.config['smoothing']
+        self.fft_data += (1 - self.config['smoothing']) * current_fft
+        
+        # 按预计算的频带映射聚合频谱
+        map_bands(self.fft_data, self.band_starts, out=self.display_data)
         
-        # 更新旋转角度
-        self.rotation += self.config['rotation_speed']
+        # 更新旋转角度，节拍时加速并逐帧回落
+        speed = self.config['rotation_speed'] * (1 + self.config['beat_pulse'] * self._pulse)
+        self._pulse *= self.config['pulse_decay']
+        self.rotation += speed
         if self.rotation >= 360:
-            self.rotation = 0
+            self.rotation -= 360
             
+    def draw(self, gc, width, height):
+        """绘制环形频谱
+        
+        Args:
+            gc: 图形上下文
+            width: 绘制区域宽度
+            height: 绘制区域高度
+        """
         # 计算中心点和最大半径
         center_x = width / 2
         center_y = height / 2
         max_radius = min(width, height) / 2 - 10
+        inner_radius = self.config['inner_radius']
         
-        # 设置画笔
-        color = wx.Colour(self.config['color'])
-        gc.SetPen(wx.Pen(color))
+        # 外圆顶点的半径（内圆顶点保持为内圆半径）
+        radii = self._radii.reshape(self.num_bars, 4)
+        outer = radii[:, 1]
+        np.multiply(self.display_data, max_radius - inner_radius, out=outer)
+        outer += inner_radius
+        radii[:, 2] = outer
         
-        # 计算可显示的频谱柱数量
-        num_bars = int(360 / self.config['bar_width'])
+        # 用一次矩阵乘法把缓存的方向向量旋转到当前角度
+        angle = self.rotation * pi / 180
+        rotation = np.array([[cos(angle), sin(angle)], [-sin(angle), cos(angle)]])
+        np.matmul(self._unit_vectors, rotation, out=self._rotated)
+        np.multiply(self._rotated, self._radii, out=self._vertices)
+        self._vertices += (center_x, center_y)
         
-        # 重采样频谱数据以匹配显示的柱数
-        display_data = np.interp(
-            np.linspace(0, len(self.fft_data), num_bars),
-            np.arange(len(self.fft_data)),
-            self.fft_data
-        )
+        # 所有频谱柱合并为一个多边形，一次填充
+        pen, bar_brush, inner_brush = self._get_brushes(gc, center_x, center_y, max_radius)
+        gc.SetPen(pen)
+        gc.SetBrush(bar_brush)
+        gc.DrawLines(self.to_points(self._vertices))
         
-        # 绘制环形频谱
-        for i in range(num_bars):
-            # 计算角度
-            angle = (i * self.config['bar_width'] + self.rotation) * pi / 180
-            
-            # 计算频谱柱高度
-            bar_height = display_data[i] * (max_radius - self.config['inner_radius'])
-            
-            # 计算起点和终点
-            start_x = center_x + self.config['inner_radius'] * cos(angle)
-            start_y = center_y + self.config['inner_radius'] * sin(angle)
-            end_x = center_x + (self.config['inner_radius'] + bar_height) * cos(angle)
-            end_y = center_y + (self.config['inner_radius'] + bar_height) * sin(angle)
-            
-            # 创建渐变画刷
-            gradient = gc.CreateLinearGradientBrush(
-                start_x, start_y,
-                end_x, end_y,
-                color.ChangeLightness(120),  # 内侧颜色
-                color.ChangeLightness(50)    # 外侧颜色
-            )
-            gc.SetBrush(gradient)
-            
-            # 计算频谱柱的四个角点
-            half_width = self.config['bar_width'] * pi / 360
-            points = []
-            
-            # 内圆上的两个点
-            angle1 = angle - half_width
-            angle2 = angle + half_width
-            points.append((
-                center_x + self.config['inner_radius'] * cos(angle1),
-                center_y + self.config['inner_radius'] * sin(angle1)
-            ))
-            points.append((
-                center_x + self.config['inner_radius'] * cos(angle2),
-                center_y + self.config['inner_radius'] * sin(angle2)
-            ))
-            
-            # 外圆上的两个点
-            outer_radius = self.config['inner_radius'] + bar_height
-            points.append((
-                center_x + outer_radius * cos(angle2),
-                center_y + outer_radius * sin(angle2)
-            ))
-            points.append((
-                center_x + outer_radius * cos(angle1),
-                center_y + outer_radius * sin(angle1)
-            ))
-            
-            # 绘制频谱柱
-            path = gc.CreatePath()
-            path.MoveToPoint(points[0][0], points[0][1])
-            for x, y in points[1:]:
-                path.AddLineToPoint(x, y)
-            path.CloseSubpath()
-            gc.DrawPath(path)
-            
         # 绘制内圆
-        gc.SetBrush(wx.Brush(color.ChangeLightness(140)))
+        gc.SetBrush(inner_brush)
         gc.DrawEllipse(
-            center_x - self.config['inner_radius'],
-            center_y - self.config['inner_radius'],
-            self.config['inner_radius'] * 2,
-            self.config['inner_radius'] * 2
+            center_x - inner_radius,
+            center_y - inner_radius,
+            inner_radius * 2,
+            inner_radius * 2
         )
+        
+    def rasterize(self, rgba, width, height):
+        """将环形频谱光栅化到RGBA缓冲区
+        
+        Args:
+            rgba: 形状为(height, width, 4)的uint8缓冲区
+            width: 绘制区域宽度
+            height: 绘制区域高度
+        """
+        max_radius = min(width, height) / 2 - 10
+        inner_radius = self.config['inner_radius']
+        bar_width = self.config['bar_width']
+        
+        pixels = self.pack_rgba(rgba)
+        pixels.fill(self._background_rgba)
+        pixels = pixels[self._region]
+        
+        # 每根柱的外半径
+        outer = self._outer_radii
+        np.multiply(self.display_data, max_radius - inner_radius, out=outer[:-1])
+        outer[:-1] += inner_radius
+        
+        # 按当前旋转角度计算每个像素所属的频谱柱
+        bar_index = self._pixel_bar
+        np.subtract(self._pixel_angle, self.rotation - bar_width / 2, out=self._pixel_outer)
+        self._pixel_outer %= 360
+        self._pixel_outer /= bar_width
+        np.floor(self._pixel_outer, out=self._pixel_outer)
+        bar_index[:] = self._pixel_outer
+        np.minimum(bar_index, self.num_bars, out=bar_index)
+        
+        # 半径落在内圆和该柱外半径之间的像素被点亮
+        np.take(outer, bar_index, out=self._pixel_outer)
+        np.less_equal(self._pixel_radius, self._pixel_outer, out=self._bar_mask)
+        np.copyto(pixels, self._radial_rgba, where=self._bar_mask)
+        
+        # 内圆
+        np.copyto(pixels, self._inner_rgba, where=self._inner_mask)
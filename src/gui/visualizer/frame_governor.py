@@ -0,0 +1,102 @@
+class FrameGovernor:
+    """自适应帧率调节器
+    
+    按每帧耗时的滑动平均估算可视化占用的CPU时间，超出预算时降低帧率，
+    有余量时逐步恢复到最大帧率
+    """
+    
+    # 每隔多少帧评估一次，避免帧率来回抖动
+    ADJUST_INTERVAL = 15
+    
+    # 预算利用率低于该比例时才提高帧率
+    HEADROOM = 0.6
+    
+    def __init__(self, max_fps=30, min_fps=5, cpu_budget=0.15, smoothing=0.9):
+        """初始化帧率调节器
+        
+        Args:
+            max_fps: 最大帧率
+            min_fps: 最小帧率
+            cpu_budget: CPU预算，可视化占用单个核心时间的比例（0-1）
+            smoothing: 帧耗时滑动平均的平滑系数
+        """
+        self.max_fps = max_fps
+        self.min_fps = min_fps
+        self.cpu_budget = cpu_budget
+        self.smoothing = smoothing
+        self.fps = float(max_fps)
+        self.configure()
+        self.reset()
+        
+    def configure(self, max_fps=None, min_fps=None, cpu_budget=None):
+        """更新调节参数
+        
+        Args:
+            max_fps: 最大帧率
+            min_fps: 最小帧率
+            cpu_budget: CPU预算（0-1）
+        """
+        if max_fps is not None:
+            self.max_fps = max_fps
+        if min_fps is not None:
+            self.min_fps = min_fps
+        if cpu_budget is not None:
+            self.cpu_budget = cpu_budget
+            
+        self.max_fps = max(float(self.max_fps), 1.0)
+        self.min_fps = min(max(float(self.min_fps), 1.0), self.max_fps)
+        self.cpu_budget = max(float(self.cpu_budget), 1e-3)
+        self.fps = min(max(self.fps, self.min_fps), self.max_fps)
+        
+    def reset(self):
+        """重置统计，从最大帧率重新开始"""
+        self.fps = self.max_fps
+        self.frame_time = 0.0
+        self._frames = 0
+        self._last_adjust = 0
+        
+    @property
+    def interval(self):
+        """当前帧间隔（秒）"""
+        return 1.0 / self.fps
+        
+    @property
+    def load(self):
+        """当前帧率下估算的CPU占用比例"""
+        return self.frame_time * self.fps
+        
+    def record(self, cost):
+        """记录一帧的耗时并在需要时调整帧率
+        
+        Args:
+            cost: 本帧耗时（秒）
+            
+        Returns:
+            float: 调整后的帧率
+        """
+        if self._frames == 0:
+            self.frame_time = cost
+        else:
+            self.frame_time = self.smoothing * self.frame_time + (1 - self.smoothing) * cost
+        self._frames += 1
+        
+        if self._frames - self._last_adjust >= self.ADJUST_INTERVAL:
+            self._last_adjust = self._frames
+            self._adjust()
+        return self.fps
+        
+    def _adjust(self):
+        """根据平均帧耗时调整帧率"""
+        if self.frame_time <= 0:
+            self.fps = self.max_fps
+            return
+            
+        # 预算内可承受的最高帧率
+        affordable = self.cpu_budget / self.frame_time
+        if affordable < self.fps:
+            # 超出预算：降到可承受帧率以下留出余量
+            self.fps = max(self.min_fps, affordable * 0.9)
+        elif self.load < self.cpu_budget * self.HEADROOM:
+            # 有余量：逐步提高，不超过可承受帧率
+            self.fps = min(self.max_fps, self.fps * 1.25, affordable * 0.9)
+            self.fps = max(self.fps, self.min_fps)
@@ -0,0 +1,267 @@
+import wx
+import numpy as np
+from src.analyzer import get_band_starts, map_bands
+from .visualizer_base import VisualizerBase
+
+# 色图控制点：(位置, (R, G, B))，位置范围0-1
+COLORMAPS = {
+    'inferno': [
+        (0.0, (0, 0, 4)),
+        (0.25, (87, 16, 110)),
+        (0.5, (188, 55, 84)),
+        (0.75, (249, 142, 9)),
+        (1.0, (252, 255, 164)),
+    ],
+    'viridis': [
+        (0.0, (68, 1, 84)),
+        (0.25, (59, 82, 139)),
+        (0.5, (33, 145, 140)),
+        (0.75, (94, 201, 98)),
+        (1.0, (253, 231, 37)),
+    ],
+    'gray': [
+        (0.0, (0, 0, 0)),
+        (1.0, (255, 255, 255)),
+    ],
+}
+
+class SpectrogramVisualizer(VisualizerBase):
+    """频谱图（滚动时频图）可视化器
+    
+    每帧向环形uint8图像缓冲区写入一列频谱，显示时从写入位置处分成两段绘制，
+    不需要整体平移图像
+    """
+    
+    def __init__(self, parent, player):
+        """初始化频谱图可视化器
+        
+        Args:
+            parent: 父窗口
+            player: 播放器实例
+        """
+        super().__init__(parent, player)
+        
+        # 频谱图特定配置
+        self.config.update({
+            'fft_size': 1024,  # FFT大小
+            'min_db': -80,  # 最小分贝值
+            'max_db': 0,  # 最大分贝值
+            'band_scale': 'log',  # 频率刻度（log或mel）
+            'colormap': 'inferno',  # 色图：inferno、viridis、gray，或color（背景色到前景色）
+        })
+        
+        # 频带映射：每个像素行对应一个频带，高频在上
+        self.band_starts = None
+        self._spectrum_bins = 0
+        self._bands = np.zeros(0)
+        self._band_index = np.zeros(0, dtype=np.uint8)
+        self._row_band = np.zeros(0, dtype=np.intp)
+        
+        # 环形图像缓冲区：每列一帧的色图索引，_write_pos为下一列的写入位置（即最旧的一列）
+        self._image = np.zeros((0, 0), dtype=np.uint8)
+        self._write_pos = 0
+        self._written = 0
+        self._generation = 0
+        
+        # 色图查找表（打包的RGBA）
+        self._lut = np.zeros(256, dtype=np.uint32)
+        
+        # 显示用位图，只增量同步新写入的列
+        self._bitmap = None
+        self._bitmap_generation = -1
+        self._synced = 0
+        
+    def build_lut(self):
+        """按配置生成256项色图查找表
+        
+        Returns:
+            numpy.ndarray: 打包为uint32的RGBA颜色，长度256
+        """
+        name = self.config['colormap']
+        if name in COLORMAPS:
+            stops = COLORMAPS[name]
+        else:
+            # 从背景色过渡到前景色，最高处提亮
+            stops = [
+                (0.0, tuple(self.color_rgb(self.config['background'])[:3])),
+                (0.7, tuple(self.color_rgb(self.config['color'])[:3])),
+                (1.0, tuple(self.color_rgb(self.config['color'], 160)[:3])),
+            ]
+            
+        positions = np.array([position for position, _ in stops])
+        colors = np.array([color for _, color in stops], dtype=np.float64)
+        t = np.linspace(0, 1, 256)
+        lut = np.empty((256, 4), dtype=np.uint8)
+        for channel in range(3):
+            lut[:, channel] = np.interp(t, positions, colors[:, channel])
+        lut[:, 3] = 255
+        return self.pack_rgba(lut)
+        
+    def _update_bands(self, bins):
+        """按频谱长度重新计算频带映射
+        
+        Args:
+            bins: 频谱频点数
+        """
+        num_bands = len(self._bands)
+        self.band_starts = get_band_starts(
+            bins * 2, num_bands, self.get_sample_rate(), self.config['band_scale'])
+        self._spectrum_bins = bins
+        
+    def update_layout(self, width, height):
+        """按尺寸重新分配环形图像缓冲区和频带映射
+        
+        Args:
+            width: 绘制区域宽度（即保留的历史帧数）
+            height: 绘制区域高度
+        """
+        width = max(int(width), 0)
+        height = max(int(height), 0)
+        
+        # 频带数不超过频点数，多出的像素行共享频带
+        num_bands = max(1, min(height, self.config['fft_size'] // 2))
+        self._bands = np.zeros(num_bands)
+        self._band_index = np.zeros(num_bands, dtype=np.uint8)
+        self._update_bands(self.config['fft_size'] // 2)
+        self._row_band = ((height - 1 - np.arange(height)) * num_bands) // max(height, 1)
+        lut = self.build_lut()
+        
+        with self._frame_lock:
+            self._image = np.zeros((height, width), dtype=np.uint8)
+            self._write_pos = 0
+            self._written = 0
+            self._lut = lut
+            self._generation += 1
+            
+    def update_frame(self, width, height):
+        """计算当前频谱并写入环形缓冲区的一列
+        
+        Args:
+            width: 绘制区域宽度
+            height: 绘制区域高度
+        """
+        image_height, image_width = self._image.shape
+        if image_width == 0 or image_height == 0:
+            return
+            
+        # 获取共享分析器计算的频谱
+        levels = self.get_spectrum_data()
+        if len(levels) != self._spectrum_bins:
+            self._update_bands(len(levels))
+            
+        # 聚合到频带并量化为色图索引
+        map_bands(levels, self.band_starts, out=self._bands)
+        self._bands *= 255
+        np.copyto(self._band_index, self._bands, casting='unsafe')
+        
+        with self._frame_lock:
+            pos = self._write_pos
+            self._image[:, pos] = self._band_index[self._row_band]
+            self._write_pos = (pos + 1) % image_width
+            self._written += 1
+            
+    def render_frame(self, width, height):
+        """新列已在update_frame()中写入环形缓冲区，无需整帧光栅化
+        
+        Args:
+            width: 绘制区域宽度
+            height: 绘制区域高度
+        """
+        pass
+        
+    def rasterize(self, rgba, width, height):
+        """按时间顺序将环形缓冲区展开到RGBA缓冲区
+        
+        Args:
+            rgba: 形状为(height, width, 4)的uint8缓冲区
+            width: 绘制区域宽度
+            height: 绘制区域高度
+        """
+        pixels = self.pack_rgba(rgba)
+        with self._frame_lock:
+            if self._image.shape != (height, width):
+                pixels.fill(self.pack_rgba(self.color_rgb(self.config['background'])))
+                return
+                
+            # 最旧的一列在写入位置处
+            pos = self._write_pos
+            pixels[:, :width - pos] = self._lut[self._image[:, pos:]]
+            pixels[:, width - pos:] = self._lut[self._image[:, :pos]]
+            
+    def _sync_bitmap(self):
+        """将新写入的列增量同步到显示位图（主线程中调用）
+        
+        Returns:
+            int: 当前写入位置，即显示时两段图像的分界列
+        """
+        with self._frame_lock:
+            height, width = self._image.shape
+            pos = self._write_pos
+            if width == 0 or height == 0:
+                self._bitmap = None
+                return 0
+                
+            if self._bitmap is None or self._bitmap_generation != self._generation:
+                # 尺寸或色图变化：整幅重建位图
+                colors = np.take(self._lut, self._image)
+                self._bitmap = wx.Bitmap.FromBufferRGBA(width, height, colors)
+                self._bitmap_generation = self._generation
+                self._synced = self._written
+                return pos
+                
+            # 自上次同步以来新写入的列，跨越缓冲区末尾时分成两段
+            pending = min(self._written - self._synced, width)
+            self._synced = self._written
+            start = (pos - pending) % width
+            if start + pending <= width:
+                segments = [(start, start + pending)]
+            else:
+                segments = [(start, width), (0, pos)]
+            columns = [(first, np.take(self._lut, self._image[:, first:last]))
+                       for first, last in segments if last > first]
+                       
+        if columns:
+            dc = wx.MemoryDC(self._bitmap)
+            for first, colors in columns:
+                dc.DrawBitmap(wx.Bitmap.FromBufferRGBA(colors.shape[1], height, colors), first, 0)
+            dc.SelectObject(wx.NullBitmap)
+        return pos
+        
+    def draw(self, gc, width, height):
+        """绘制频谱图（direct模式）
+        
+        Args:
+            gc: 图形上下文
+            width: 绘制区域宽度
+            height: 绘制区域高度
+        """
+        pos = self._sync_bitmap()
+        if self._bitmap is None:
+            return
+            
+        # 写入位置右侧为较早的帧，左侧为较新的帧，分两次绘制
+        bitmap_width, bitmap_height = self._bitmap.GetSize()
+        gc.DrawBitmap(self._bitmap, -pos, 0, bitmap_width, bitmap_height)
+        gc.DrawBitmap(self._bitmap, bitmap_width - pos, 0, bitmap_width, bitmap_height)
+        
+    def paint_frame(self, dc, width, height):
+        """同步新列并分两段绘制环形图像（threaded模式）
+        
+        Args:
+            dc: 设备上下文
+            width: 绘制区域宽度
+            height: 绘制区域高度
+        """
+        pos = self._sync_bitmap()
+        
+        # 尺寸变化后新的缓冲区尚未生成时先清空背景
+        if self._bitmap is None or self._bitmap.GetSize() != (width, height):
+            dc.SetBackground(wx.Brush(self.config['background']))
+            dc.Clear()
+        if self._bitmap is None:
+            return
+            
+        # 写入位置右侧为较早的帧，左侧为较新的帧，分两次绘制
+        bitmap_width = self._bitmap.GetWidth()
+        dc.DrawBitmap(self._bitmap, -pos, 0)
+        dc.DrawBitmap(self._bitmap, bitmap_width - pos, 0)
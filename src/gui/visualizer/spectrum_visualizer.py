@@ -1,5 +1,6 @@
 import wx
 import numpy as np
+from src.analyzer import get_band_starts, map_bands
 from .visualizer_base import VisualizerBase
 
 class SpectrumVisualizer(VisualizerBase):
@@ -22,36 +23,121 @@ class SpectrumVisualizer(VisualizerBase):
             'fft_size': 1024,  # FFT大小
             'min_db': -70,  # 最小分贝值
             'max_db': 0,  # 最大分贝值
+            'band_scale': 'log',  # 频率刻度（log或mel）
         })
         
         # 初始化频谱数据
         self.fft_data = np.zeros(self.config['fft_size'] // 2)
         
-    def process_audio_data(self, data):
-        """处理音频数据，计算频谱
+        # 频谱柱映射（在尺寸变化时重新计算）
+        self.num_bars = 0
+        self.band_starts = None
+        self.display_data = np.zeros(0)
+        self.bar_x = np.zeros(0)
+        
+        # 光栅化（threaded模式）用的查找表和掩码缓冲区
+        self._column_bar = np.zeros(0, dtype=np.intp)
+        self._tops = np.zeros(1)
+        self._column_tops = np.zeros(0)
+        self._rows = np.zeros((0, 1))
+        self._bar_mask = np.zeros((0, 0), dtype=bool)
+        self._cap_mask = np.zeros((0, 0), dtype=bool)
+        self._ramp = np.zeros((0, 1), dtype=np.uint32)
+        self._cap_rgba = None
+        self._background_rgba = None
+        
+        # 跨帧复用的画笔和画刷，尺寸或颜色变化时重建
+        self._brush_key = None
+        self._bar_brush = None
+        self._cap_brush = None
+        self._pen = None
+        
+    def update_layout(self, width, height):
+        """根据宽度重新计算频谱柱数量和频带映射
         
         Args:
-            data: 原始音频数据
+            width: 绘制区域宽度
+            height: 绘制区域高度
+        """
+        self.num_bars = max(0, min(
+            len(self.fft_data),
+            int(width / (self.config['bar_width'] + self.config['bar_spacing']))
+        ))
+        self.band_starts = None
+        if self.num_bars:
+            self.band_starts = get_band_starts(
+                len(self.fft_data) * 2, self.num_bars,
+                self.get_sample_rate(), self.config['band_scale']
+            )
+        self.display_data = np.zeros(self.num_bars)
+        self.bar_x = np.arange(self.num_bars) * float(
+            self.config['bar_width'] + self.config['bar_spacing'])
+        
+        # 每个像素列所属的频谱柱，柱间空隙映射到额外的最后一项
+        bar_step = self.config['bar_width'] + self.config['bar_spacing']
+        columns = np.arange(width)
+        self._column_bar = np.minimum(columns // bar_step, self.num_bars)
+        self._column_bar[columns % bar_step >= self.config['bar_width']] = self.num_bars
+        self._tops = np.full(self.num_bars + 1, height + 2.0)
+        self._column_tops = np.zeros(width)
+        self._rows = np.arange(height, dtype=np.float64)[:, None]
+        self._bar_mask = np.zeros((height, width), dtype=bool)
+        self._cap_mask = np.zeros((height, width), dtype=bool)
+        
+        # 与绘制模式一致的颜色：自下而上由亮到暗的渐变
+        top_color = self.color_rgb(self.config['color'], 50).astype(np.float64)
+        bottom_color = self.color_rgb(self.config['color'], 120).astype(np.float64)
+        t = np.linspace(0, 1, max(height, 1))[:, None]
+        self._ramp = self.pack_rgba((top_color * (1 - t) + bottom_color * t).astype(np.uint8))[:, None]
+        self._cap_rgba = self.pack_rgba(self.color_rgb(self.config['color'], 140))
+        self._background_rgba = self.pack_rgba(self.color_rgb(self.config['background']))
+        
+    def _get_brushes(self, gc, height):
+        """获取缓存的画笔和画刷，仅在高度或颜色变化时重建
+        
+        Args:
+            gc: 图形上下文
+            height: 绘制区域高度
             
         Returns:
-            numpy.ndarray: 处理后的频谱数据
+            tuple: (画笔, 频谱柱渐变画刷, 柱顶画刷)
         """
-        # 应用汉宁窗
-        windowed_data = data * np.hanning(len(data))
-        
-        # 执行FFT
-        fft = np.fft.fft(windowed_data)[:len(data)//2]
+        key = (height, self.config['color'])
+        if key != self._brush_key:
+            color = wx.Colour(self.config['color'])
+            # 整个面板高度共用一个渐变，所有频谱柱一次填充
+            self._bar_brush = gc.CreateLinearGradientBrush(
+                0, height,
+                0, 0,
+                color.ChangeLightness(120),  # 底部颜色
+                color.ChangeLightness(50)    # 顶部颜色
+            )
+            self._cap_brush = gc.CreateBrush(wx.Brush(color.ChangeLightness(140)))
+            self._pen = gc.CreatePen(wx.Pen(color))
+            self._brush_key = key
+        return self._pen, self._bar_brush, self._cap_brush
         
-        # 计算频谱幅度（分贝）
-        magnitude = np.abs(fft)
-        magnitude = 20 * np.log10(magnitude)
+    def update_frame(self, width, height):
+        """平滑频谱并聚合到频谱柱
         
-        # 归一化到配置的分贝范围
-        magnitude = np.clip(magnitude, self.config['min_db'], self.config['max_db'])
-        magnitude = (magnitude - self.config['min_db']) / (self.config['max_db'] - self.config['min_db'])
+        Args:
+            width: 绘制区域宽度
+            height: 绘制区域高度
+        """
+        # 获取共享分析器计算的频谱
+        current_fft = self.get_spectrum_data()
+        if len(self.fft_data) != len(current_fft):
+            self.fft_data = np.zeros(len(current_fft))
+            self.update_layout(width, height)
         
-        return magnitude
+        # 平滑处理
+        self.fft_data *= self.config['smoothing']
+        self.fft_data += (1 - self.config['smoothing']) * current_fft
         
+        # 按预计算的频带映射聚合频谱
+        if self.num_bars:
+            map_bands(self.fft_data, self.band_starts, out=self.display_data)
+            
     def draw(self, gc, width, height):
         """绘制频谱
         
@@ -60,51 +146,52 @@ class SpectrumVisualizer(VisualizerBase):
             width: 绘制区域宽度
             height: 绘制区域高度
         """
-        # 获取并处理音频数据
-        raw_data = self.get_audio_data()
-        current_fft = self.process_audio_data(raw_data)
-        
-        # 平滑处理
-        self.fft_data = self.config['smoothing'] * self.fft_data + \
-                       (1 - self.config['smoothing']) * current_fft
-        
-        # 计算可以显示的频谱柱数量
-        bar_width = self.config['bar_width']
-        bar_spacing = self.config['bar_spacing']
-        num_bars = min(
-            len(self.fft_data),
-            int(width / (bar_width + bar_spacing))
-        )
-        
-        # 重采样频谱数据以匹配显示的柱数
-        display_data = np.interp(
-            np.linspace(0, len(self.fft_data), num_bars),
-            np.arange(len(self.fft_data)),
-            self.fft_data
-        )
-        
-        # 设置画笔和画刷
-        color = wx.Colour(self.config['color'])
-        gc.SetPen(wx.Pen(color))
-        
-        # 绘制频谱柱
-        for i in range(num_bars):
-            # 计算柱子位置和高度
-            x = i * (bar_width + bar_spacing)
-            bar_height = display_data[i] * height
+        if not self.num_bars:
+            return
             
-            # 创建渐变画刷
-            gradient = gc.CreateLinearGradientBrush(
-                x, height,
-                x, height - bar_height,
-                color.ChangeLightness(120),  # 顶部颜色
-                color.ChangeLightness(50)    # 底部颜色
-            )
-            gc.SetBrush(gradient)
+        # 向量化计算所有频谱柱的顶部位置
+        bar_width = self.config['bar_width']
+        tops = (height - self.display_data * height).tolist()
+        xs = self.bar_x.tolist()
+        
+        # 所有频谱柱和柱顶小方块各合并为一条路径
+        bar_path = gc.CreatePath()
+        cap_path = gc.CreatePath()
+        for x, top in zip(xs, tops):
+            bar_path.AddRectangle(x, top, bar_width, height - top)
+            cap_path.AddRectangle(x, top - 2, bar_width, 2)
             
-            # 绘制频谱柱
-            gc.DrawRectangle(x, height - bar_height, bar_width, bar_height)
+        pen, bar_brush, cap_brush = self._get_brushes(gc, height)
+        gc.SetPen(pen)
+        gc.SetBrush(bar_brush)
+        gc.DrawPath(bar_path)
+        gc.SetBrush(cap_brush)
+        gc.DrawPath(cap_path)
+        
+    def rasterize(self, rgba, width, height):
+        """将频谱柱光栅化到RGBA缓冲区
+        
+        Args:
+            rgba: 形状为(height, width, 4)的uint8缓冲区
+            width: 绘制区域宽度
+            height: 绘制区域高度
+        """
+        pixels = self.pack_rgba(rgba)
+        pixels.fill(self._background_rgba)
+        if not self.num_bars:
+            return
             
-            # 绘制柱顶小方块
-            gc.SetBrush(wx.Brush(color.ChangeLightness(140)))
-            gc.DrawRectangle(x, height - bar_height - 2, bar_width, 2)
+        # 每列的柱顶位置（空隙列保持在画布之外）
+        tops = self._tops
+        np.multiply(self.display_data, -height, out=tops[:-1])
+        tops[:-1] += height
+        np.take(tops, self._column_bar, out=self._column_tops)
+        
+        # 频谱柱：柱顶以下的像素使用渐变色
+        np.greater_equal(self._rows, self._column_tops, out=self._bar_mask)
+        np.copyto(pixels, self._ramp, where=self._bar_mask)
+        
+        # 柱顶小方块：柱顶上方两个像素
+        np.greater_equal(self._rows + 2, self._column_tops, out=self._cap_mask)
+        np.logical_xor(self._cap_mask, self._bar_mask, out=self._cap_mask)
+        np.copyto(pixels, self._cap_rgba, where=self._cap_mask)
@@ -1,10 +1,18 @@
 import wx
+import time
+import threading
 import numpy as np
 from abc import abstractmethod
+from src.analyzer import SpectrumAnalyzer
+from src.scheduler import get_scheduler, TOPIC_PLAYER_STATE
+from .frame_governor import FrameGovernor
 
 class VisualizerBase(wx.Panel):
     """可视化器基类"""
     
+    # 播放中但静音而暂停渲染时，检查声音是否恢复的间隔（秒）
+    IDLE_POLL_INTERVAL = 0.25
+    
     def __init__(self, parent, player):
         """初始化可视化器
         
@@ -19,103 +27,617 @@ class VisualizerBase(wx.Panel):
         
         # 设置默认配置
         self.config = {
-            'fps': 30,  # 刷新率
+            'fps': 30,  # 最大刷新率
+            'min_fps': 5,  # 超出CPU预算时允许降到的最低刷新率
+            'cpu_budget': 0.15,  # CPU预算，可视化占用单个核心时间的比例
+            'idle_timeout': 1.0,  # 暂停或静音多少秒后停止渲染（留出画面衰减的时间）
+            'silence_threshold': 1e-3,  # 低于该峰值的音频视为静音
             'color': '#00ff00',  # 默认颜色
             'background': '#000000',  # 背景色
             'sensitivity': 1.0,  # 灵敏度
+            'render_mode': 'threaded',  # 渲染模式：threaded（后台线程光栅化）或direct（绘制事件中直接绘制）
         }
         
-        # 创建定时器用于刷新显示
-        self.timer = wx.Timer(self)
-        self.Bind(wx.EVT_TIMER, self.on_timer)
+        # 静音时返回的只读数据和归一化频谱缓冲区（按需分配）
+        self._silence = np.zeros(1024)
+        self._silence.flags.writeable = False
+        self._levels = None
+        
+        # 本可视化器自己的音频采样缓冲区：渲染帧和静音检测各用一个，
+        # 不与其他可视化器共用（按需分配）
+        self._samples = None
+        self._signal_samples = None
+        
+        # 上一次计算布局时的尺寸
+        self._layout_size = None
+        
+        # 帧率调节：按帧耗时在CPU预算内调整帧率，不可见或静音时暂停渲染
+        self.governor = FrameGovernor(
+            self.config['fps'], self.config['min_fps'], self.config['cpu_budget'])
+        self._visible = True
+        self._suspended = False
+        self._last_signal = time.perf_counter()
+        self._blit_time = 0.0
+        
+        # 后台渲染相关：前后台RGBA缓冲区、显示用位图和渲染线程
+        self._render_size = tuple(self.GetClientSize())
+        self._front_buffer = None
+        self._back_buffer = None
+        self._frame_bitmap = None
+        self._frame_ready = False
+        self._refresh_pending = False
+        self._frame_lock = threading.Lock()
+        self._render_stop = threading.Event()
+        self._render_thread = None
+        
+        # 渲染线程运行时set_config()的修改先放在这里，由渲染线程在帧开始前应用
+        self._pending_config = {}
+        self._config_lock = threading.Lock()
+        
+        # 刷新调度：direct模式由调度器的周期任务驱动刷新；可见性和播放状态的
+        # 变化由调度器通知，暂停渲染时不再轮询
+        self.scheduler = get_scheduler()
+        self._task = None
+        self._state_subscription = None
+        self._wake = threading.Event()
         
         # 绑定绘制事件
         self.Bind(wx.EVT_PAINT, self.on_paint)
         self.Bind(wx.EVT_SIZE, self.on_size)
+        self.Bind(wx.EVT_WINDOW_DESTROY, self.on_destroy)
         
         # 双缓冲绘制
         self.SetDoubleBuffered(True)
         
-        # 启动定时器
-        self.timer.Start(1000 // self.config['fps'])
-        
     def get_audio_data(self):
         """从播放器获取音频数据
         
+        Returns:
+            numpy.ndarray: 音频数据数组，缓冲区在帧间复用
+        """
+        return self._read_audio('_samples')
+        
+    def _read_audio(self, buffer_name):
+        """从播放器读取音频数据到本可视化器名为buffer_name的缓冲区并应用灵敏度
+        
+        Args:
+            buffer_name: 保存缓冲区的属性名
+            
         Returns:
             numpy.ndarray: 音频数据数组
         """
         if not self.player or not self.player.is_playing():
-            return np.zeros(1024)
+            return self._silence
             
         try:
-            # 获取原始音频数据
-            data = self.player.get_audio_data()
+            # 获取原始音频数据（写入自己的缓冲区）
+            data = self.player.get_audio_data(out=getattr(self, buffer_name))
             if data is None:
-                return np.zeros(1024)
-                
-            # 应用灵敏度
-            data = data * self.config['sensitivity']
+                return self._silence
+            setattr(self, buffer_name, data)
             
+            # 应用灵敏度
+            if self.config['sensitivity'] != 1.0:
+                data *= self.config['sensitivity']
+                
             return data
             
         except Exception as e:
             print(f"获取音频数据失败: {e}")
-            return np.zeros(1024)
+            return self._silence
+            
+    def get_spectrum_data(self):
+        """从播放器的共享分析器获取归一化频谱
+        
+        Returns:
+            numpy.ndarray: 0-1范围的频谱数据，缓冲区在帧间复用
+        """
+        spectrum = None
+        if self.player and self.player.is_playing():
+            try:
+                spectrum = self.player.get_spectrum_data()
+            except Exception as e:
+                print(f"获取频谱数据失败: {e}")
+                
+        if spectrum is None or len(spectrum) == 0:
+            if self._levels is None:
+                self._levels = np.zeros(self.config.get('fft_size', 1024) // 2)
+            self._levels[:] = 0
+            return self._levels
+            
+        if self._levels is None or len(self._levels) != len(spectrum):
+            self._levels = np.zeros(len(spectrum))
+            
+        # 灵敏度作用于原始信号，在分贝域中等价于附加增益
+        sensitivity = max(self.config['sensitivity'], 1e-6)
+        return SpectrumAnalyzer.normalize(
+            spectrum,
+            self.config.get('min_db', -70),
+            self.config.get('max_db', 0),
+            gain_db=20 * np.log10(sensitivity),
+            out=self._levels
+        )
+        
+    def get_sample_rate(self):
+        """获取播放器分析器的采样率
+        
+        Returns:
+            int: 采样率
+        """
+        analyzer = getattr(self.player, 'analyzer', None)
+        return analyzer.sample_rate if analyzer else 44100
+        
+    def get_tempo(self):
+        """获取播放器节拍检测器估计的节拍速度
+        
+        Returns:
+            float: 每分钟节拍数，未知时返回None
+        """
+        detector = getattr(self.player, 'onset_detector', None)
+        return detector.tempo if detector else None
+        
+    def on_beat(self, strength, tempo):
+        """节拍事件，子类可重写（如按节拍脉动）
+        
+        在推入音频的线程中调用，实现只应更新状态，由下一帧的update_frame()使用
+        
+        Args:
+            strength: 节拍强度（0-1）
+            tempo: 当前节拍速度（BPM），未知时为None
+        """
+        pass
+        
+    def _subscribe_beats(self, subscribe):
+        """订阅或取消订阅播放器的节拍事件"""
+        detector = getattr(self.player, 'onset_detector', None)
+        if detector is None:
+            return
+        if subscribe:
+            detector.subscribe(self.on_beat)
+        else:
+            detector.unsubscribe(self.on_beat)
+            
+    def get_fps(self):
+        """获取当前帧率
+        
+        Returns:
+            float: 调节后的帧率，暂停渲染时为0
+        """
+        if self._suspended or not self.is_running():
+            return 0.0
+        return self.governor.fps
+        
+    def get_frame_time(self):
+        """获取平均每帧耗时
+        
+        Returns:
+            float: 每帧耗时（秒）
+        """
+        return self.governor.frame_time
+        
+    def is_suspended(self):
+        """是否因不可见、暂停或静音而暂停渲染"""
+        return self._suspended
+        
+    def _has_signal(self):
+        """播放器是否正在播放且有声音"""
+        if not self.player or not self.player.is_playing():
+            return False
+            
+        # 没有PCM数据来源时无法判断是否静音，播放中一律按有声音处理
+        if not self.player.has_audio_data():
+            return True
+            
+        data = self._read_audio('_signal_samples')
+        if len(data) == 0:
+            return False
+        return max(data.max(), -data.min()) >= self.config['silence_threshold']
+        
+    def _is_active(self):
+        """是否需要继续渲染
+        
+        面板不可见时立即暂停；暂停播放或静音时再渲染idle_timeout秒，
+        让平滑后的画面衰减到静止后再停止
+        
+        Returns:
+            bool: 是否继续渲染
+        """
+        if not self._visible:
+            return False
+            
+        now = time.perf_counter()
+        if self._has_signal():
+            self._last_signal = now
+            return True
+        return now - self._last_signal < self.config['idle_timeout']
+        
+    def _update_visibility(self):
+        """在主线程中刷新面板可见状态（含最小化到托盘时隐藏的主窗口）"""
+        visible = self.IsShownOnScreen()
+        if visible:
+            top = wx.GetTopLevelParent(self)
+            visible = top is None or not top.IsIconized()
+        self._visible = visible
+        
+    def _on_visibility(self, visible):
+        """调度器通知的可见性变化"""
+        self._visible = visible
+        self._on_activity_changed()
+        
+    def _on_player_state(self, state):
+        """调度器通知的播放状态变化"""
+        self._on_activity_changed()
+        
+    def _on_activity_changed(self):
+        """可见性或播放状态变化时唤醒渲染线程，或立即执行一次direct模式刷新"""
+        self._wake.set()
+        if self._task is not None:
+            self.on_timer()
+            
+    @staticmethod
+    def color_rgb(value, lightness=100):
+        """解析颜色并按wx.Colour.ChangeLightness的规则调整亮度
+        
+        不依赖GUI对象，可在渲染线程中调用
+        
+        Args:
+            value: 颜色值（'#rrggbb'或wx支持的颜色名）
+            lightness: 亮度（0-200，100为不变）
+            
+        Returns:
+            numpy.ndarray: RGBA颜色，uint8
+        """
+        if isinstance(value, str) and value.startswith('#') and len(value) == 7:
+            rgb = np.array([int(value[i:i + 2], 16) for i in (1, 3, 5)], dtype=np.float64)
+        else:
+            rgb = np.array(wx.Colour(value).Get(False), dtype=np.float64)
+            
+        if lightness < 100:
+            rgb *= lightness / 100.0
+        elif lightness > 100:
+            alpha = (200 - lightness) / 100.0
+            rgb = rgb * alpha + 255 * (1 - alpha)
+        return np.append(np.clip(rgb, 0, 255), 255).astype(np.uint8)
+        
+    @staticmethod
+    def pack_rgba(colors):
+        """将RGBA颜色（最后一维为4个uint8）打包为uint32，便于按像素整体写入
+        
+        Args:
+            colors: uint8颜色数组，形状为(..., 4)
+            
+        Returns:
+            numpy.ndarray: uint32数组，形状为(...)
+        """
+        colors = np.ascontiguousarray(colors, dtype=np.uint8)
+        return colors.view(np.uint32)[..., 0]
+        
+    @staticmethod
+    def to_points(vertices):
+        """将(N, 2)顶点数组转换为GraphicsContext.DrawLines可用的点列表
+        
+        Args:
+            vertices: 顶点数组
+            
+        Returns:
+            list: wx.Point2D列表
+        """
+        return [wx.Point2D(x, y) for x, y in vertices.tolist()]
+        
+    def update_layout(self, width, height):
+        """尺寸或配置变化时重新计算布局相关的缓存，子类可重写
+        
+        Args:
+            width: 绘制区域宽度
+            height: 绘制区域高度
+        """
+        pass
+        
+    def ensure_layout(self, width, height):
+        """仅在尺寸或配置变化时调用update_layout
+        
+        Args:
+            width: 绘制区域宽度
+            height: 绘制区域高度
+        """
+        if self._layout_size != (width, height):
+            self._layout_size = (width, height)
+            self.update_layout(width, height)
             
+    def update_frame(self, width, height):
+        """推进一帧的分析和状态（平滑、旋转等），子类可重写
+        
+        在direct模式下于绘制事件中调用，在threaded模式下于渲染线程中调用
+        
+        Args:
+            width: 绘制区域宽度
+            height: 绘制区域高度
+        """
+        pass
+        
+    def rasterize(self, rgba, width, height):
+        """将当前帧光栅化到RGBA缓冲区（threaded模式），子类可重写
+        
+        默认只填充背景色
+        
+        Args:
+            rgba: 形状为(height, width, 4)的uint8缓冲区，可通过pack_rgba()
+                  取得的uint32视图按像素写入
+            width: 绘制区域宽度
+            height: 绘制区域高度
+        """
+        rgba[:] = self.color_rgb(self.config['background'])
+        
     def set_config(self, **kwargs):
         """更新配置
         
+        渲染线程运行时只记录修改，由渲染线程在下一帧开始前应用，
+        避免一帧中途配置、布局和缓冲区不一致
+        
         Args:
             **kwargs: 配置参数，可包含fps、color、background、sensitivity等
         """
-        self.config.update(kwargs)
-        
-        # 更新定时器
-        if 'fps' in kwargs:
-            self.timer.Stop()
-            self.timer.Start(1000 // self.config['fps'])
+        with self._config_lock:
+            self._pending_config.update(kwargs)
+            
+        if 'fps' in kwargs or 'render_mode' in kwargs:
+            # 停止渲染线程后直接应用，再按新配置重启定时器或渲染线程
+            running = self.is_running()
+            self.stop()
+            self._apply_pending_config()
+            if running:
+                self.start()
+        elif self._render_thread is not None and self._render_thread.is_alive():
+            # 唤醒暂停中的渲染线程以应用修改
+            self._wake.set()
+        else:
+            self._apply_pending_config()
             
         # 重绘
         self.Refresh()
         
+    def _apply_pending_config(self):
+        """应用set_config()记录的修改（在渲染所在的线程中调用）"""
+        with self._config_lock:
+            pending, self._pending_config = self._pending_config, {}
+        if not pending:
+            return
+        self.config.update(pending)
+        
+        # 配置可能影响布局，下次绘制时重新计算
+        self._layout_size = None
+        
+        # 更新帧率调节参数
+        self.governor.configure(
+            self.config['fps'], self.config['min_fps'], self.config['cpu_budget'])
+        
+    def is_running(self):
+        """可视化是否在运行"""
+        thread = self._render_thread
+        return self._task is not None or (thread is not None and thread.is_alive())
+        
     def start(self):
         """启动可视化"""
-        if not self.timer.IsRunning():
-            self.timer.Start(1000 // self.config['fps'])
+        self.governor.reset()
+        self._suspended = False
+        self._last_signal = time.perf_counter()
+        self._update_visibility()
+        self._subscribe_beats(True)
+        
+        # 监听可见性和播放状态
+        self.scheduler.remove_visibility_listener(self, self._on_visibility)
+        self.scheduler.add_visibility_listener(self, self._on_visibility)
+        if self._state_subscription is None:
+            self._state_subscription = self.scheduler.subscribe(
+                TOPIC_PLAYER_STATE, self._on_player_state)
+                
+        if self.config['render_mode'] == 'threaded':
+            if self._render_thread is None or not self._render_thread.is_alive():
+                self._render_stop.clear()
+                self._wake.clear()
+                self._render_thread = threading.Thread(target=self._render_loop, daemon=True)
+                self._render_thread.start()
+        elif self._task is None:
+            self._task = self.scheduler.add_task(self.on_timer, self._task_interval())
             
+    def _task_interval(self):
+        """计算direct模式刷新任务的间隔（秒）
+        
+        渲染时按调节后的帧率刷新；播放中但静音时低频检查声音是否恢复；
+        不可见或未播放时暂停任务，等待调度器通知
+        
+        Returns:
+            float: 间隔（秒），None为暂停
+        """
+        if not self._suspended:
+            return self.governor.interval
+        if self._visible and self.player and self.player.is_playing():
+            return self.IDLE_POLL_INTERVAL
+        return None
+        
     def stop(self):
         """停止可视化"""
-        if self.timer.IsRunning():
-            self.timer.Stop()
+        self._detach()
+        
+        if self._render_thread is not None:
+            self._render_stop.set()
+            self._wake.set()
+            self._render_thread.join()
+            self._render_thread = None
             
-    def on_timer(self, event):
-        """定时器事件处理"""
-        self.Refresh()
+    def _detach(self):
+        """取消节拍、播放状态、可见性订阅和刷新任务"""
+        self._subscribe_beats(False)
+        self.scheduler.remove_visibility_listener(self, self._on_visibility)
+        self.scheduler.unsubscribe(self._state_subscription)
+        self._state_subscription = None
+        self.scheduler.remove_task(self._task)
+        self._task = None
+        
+    def _render_loop(self):
+        """渲染线程：按固定节奏生成帧并交换前后台缓冲区
+        
+        界面来不及显示时直接丢弃旧帧，只保留最新完成的一帧
+        """
+        next_frame = time.perf_counter()
+        while not self._render_stop.is_set():
+            self._apply_pending_config()
+            
+            # 不可见或未播放时暂停并等待调度器通知，播放中静音时低频检查是否恢复
+            if not self._is_active():
+                self._suspended = True
+                playing = self.player is not None and self.player.is_playing()
+                self._wake.wait(self.IDLE_POLL_INTERVAL if self._visible and playing else None)
+                self._wake.clear()
+                continue
+            if self._suspended:
+                self._suspended = False
+                next_frame = time.perf_counter()
+                
+            interval = self.governor.interval
+            now = time.perf_counter()
+            if now < next_frame:
+                self._render_stop.wait(next_frame - now)
+                continue
+                
+            # 落后超过一帧时跳过错过的帧，不补画
+            next_frame += interval
+            if next_frame < now:
+                next_frame = now + interval
+                
+            width, height = self._render_size
+            if width <= 0 or height <= 0:
+                continue
+                
+            try:
+                start = time.perf_counter()
+                self.ensure_layout(width, height)
+                self.update_frame(width, height)
+                self.render_frame(width, height)
+                
+                # 帧耗时包括主线程上一次绘制的时间
+                self.governor.record(time.perf_counter() - start + self._blit_time)
+            except Exception as e:
+                print(f"渲染可视化帧失败: {e}")
+                continue
+                
+            with self._frame_lock:
+                # 已有待处理的重绘请求时不再排队
+                if self._refresh_pending:
+                    continue
+                self._refresh_pending = True
+                
+            wx.CallAfter(self._request_paint)
+            
+    def render_frame(self, width, height):
+        """在渲染线程中生成一帧（threaded模式）
+        
+        默认光栅化到后台缓冲区并与前台缓冲区交换；子类可重写为增量更新
+        自己的显示数据，并配合paint_frame()显示
+        
+        Args:
+            width: 绘制区域宽度
+            height: 绘制区域高度
+        """
+        back = self._back_buffer
+        if back is None or back.shape[:2] != (height, width):
+            back = np.zeros((height, width, 4), dtype=np.uint8)
+            
+        self.rasterize(back, width, height)
+        
+        with self._frame_lock:
+            self._back_buffer = self._front_buffer
+            self._front_buffer = back
+            self._frame_ready = True
+            
+    def _request_paint(self):
+        """在主线程中请求重绘最新完成的帧"""
+        if self:
+            self.Refresh(False)
+            
+    def on_timer(self):
+        """direct模式的刷新任务"""
+        self._suspended = not self._is_active()
+        if not self._suspended:
+            self.Refresh()
+            
+        # 帧率变化或暂停状态切换时调整任务间隔
+        self.scheduler.set_task_interval(self._task, self._task_interval())
         
     def on_size(self, event):
         """大小变更事件处理"""
+        self._render_size = tuple(self.GetClientSize())
         self.Refresh()
         event.Skip()
         
+    def on_destroy(self, event):
+        """窗口销毁时停止渲染线程"""
+        if event.GetEventObject() is self:
+            self._render_stop.set()
+            self._wake.set()
+            self._detach()
+        event.Skip()
+        
     def on_paint(self, event):
         """绘制事件处理"""
         dc = wx.BufferedPaintDC(self)
+        
+        # 获取窗口大小
+        width, height = self.GetSize()
+        
+        if self.config['render_mode'] == 'threaded':
+            with self._frame_lock:
+                self._refresh_pending = False
+            start = time.perf_counter()
+            self.paint_frame(dc, width, height)
+            self._blit_time = time.perf_counter() - start
+            return
+            
         gc = wx.GraphicsContext.Create(dc)
         
         if not gc:
             return
             
-        # 获取窗口大小
-        width, height = self.GetSize()
+        # 仅在尺寸变化时重新计算布局
+        self.ensure_layout(width, height)
         
         # 清空背景
         gc.SetBrush(wx.Brush(self.config['background']))
         gc.DrawRectangle(0, 0, width, height)
         
-        # 调用具体实现的绘制方法
+        # 推进一帧并调用具体实现的绘制方法
+        start = time.perf_counter()
+        self.update_frame(width, height)
         self.draw(gc, width, height)
+        gc.Flush()
+        self.governor.record(time.perf_counter() - start)
+        
+    def paint_frame(self, dc, width, height):
+        """在绘制事件中显示渲染线程最新完成的帧（threaded模式）
         
+        默认将前台RGBA缓冲区复制到位图并绘制，子类可配合render_frame()重写
+        
+        Args:
+            dc: 设备上下文
+            width: 绘制区域宽度
+            height: 绘制区域高度
+        """
+        with self._frame_lock:
+            front = self._front_buffer
+            if self._frame_ready and front is not None:
+                frame_height, frame_width = front.shape[:2]
+                bitmap = self._frame_bitmap
+                if bitmap is None or bitmap.GetSize() != (frame_width, frame_height):
+                    bitmap = wx.Bitmap(frame_width, frame_height, 32)
+                    self._frame_bitmap = bitmap
+                bitmap.CopyFromBuffer(front, wx.BitmapBufferFormat_RGBA)
+                self._frame_ready = False
+                
+        dc.SetBackground(wx.Brush(self.config['background']))
+        dc.Clear()
+        if self._frame_bitmap is not None:
+            dc.DrawBitmap(self._frame_bitmap, 0, 0)
+            
     @abstractmethod
     def draw(self, gc, width, height):
         """绘制可视化效果
@@ -17,74 +17,220 @@ class WaveformVisualizer(VisualizerBase):
         # 波形特定配置
         self.config.update({
             'line_width': 2,  # 线条宽度
-            'interpolation': True,  # 是否使用插值平滑
+            'interpolation': True,  # 采样数少于像素宽度时是否插值平滑
             'mirror': True,  # 是否镜像显示
         })
         
-        # 历史数据缓存，用于平滑过渡
+        # 历史数据缓存，用于平滑过渡（原地更新）
         self.history = np.zeros(1024)
+        self._blend = np.zeros(1024)
         
-    def draw(self, gc, width, height):
-        """绘制波形
+        # 按像素列抽取后的缓冲区，在尺寸或采样数变化时重建
+        self._buffer_key = None
+        self._column_starts = None
+        self._sample_x = None
+        self._column_x = None
+        self._col_max = np.zeros(0)
+        self._col_min = np.zeros(0)
+        self._points = np.zeros((0, 2))
+        
+        # 光栅化（threaded模式）用的缓冲区
+        self._pixel_column = np.zeros(0, dtype=np.intp)
+        self._pixel_top = np.zeros(0)
+        self._pixel_bottom = np.zeros(0)
+        self._rows = np.zeros((0, 1))
+        self._fill_mask = np.zeros((0, 0), dtype=bool)
+        self._edge_mask = np.zeros((0, 0), dtype=bool)
+        self._fill_rgba = None
+        self._line_rgba = None
+        self._background_rgba = None
+        
+        # 跨帧复用的画笔和画刷
+        self._brush_key = None
+        self._pen = None
+        self._brush = None
+        
+    def _ensure_buffers(self, samples, width):
+        """按采样数、像素宽度和插值设置准备抽取索引与顶点缓冲区
+        
+        Args:
+            samples: 每帧采样数
+            width: 绘制区域宽度
+        """
+        key = (samples, width, self.config['interpolation'])
+        if key == self._buffer_key:
+            return
+            
+        # 每个像素列一个点；采样数不足时按采样数输出
+        columns = max(2, min(samples, int(width)))
+        if self.config['interpolation'] and samples < width:
+            columns = max(2, int(width))
+            
+        if columns < samples:
+            # 每列覆盖[starts[i], starts[i+1])范围的采样，用于min/max抽取
+            self._column_starts = (np.arange(columns) * samples) // columns
+        else:
+            self._column_starts = None
+        self._sample_x = np.linspace(0, width, samples)
+        self._column_x = np.linspace(0, width, columns)
+        
+        self._col_max = np.zeros(columns)
+        self._col_min = np.zeros(columns)
+        
+        # 上半部分从左到右，下半部分从右到左，构成闭合多边形
+        self._points = np.empty((columns * 2, 2))
+        self._points[:columns, 0] = self._column_x
+        self._points[columns:, 0] = self._column_x[::-1]
+        
+        # 每个像素列对应的抽取列
+        pixels = max(int(width), 0)
+        self._pixel_column = (np.arange(pixels) * columns) // max(pixels, 1)
+        self._pixel_top = np.zeros(pixels)
+        self._pixel_bottom = np.zeros(pixels)
+        self._buffer_key = key
+        
+    def update_layout(self, width, height):
+        """按尺寸准备光栅化用的行坐标、掩码和颜色
+        
+        Args:
+            width: 绘制区域宽度
+            height: 绘制区域高度
+        """
+        self._rows = np.arange(height, dtype=np.float64)[:, None]
+        self._fill_mask = np.zeros((height, width), dtype=bool)
+        self._edge_mask = np.zeros((height, width), dtype=bool)
+        self._fill_rgba = self.pack_rgba(self.color_rgb(self.config['color'], 80))
+        self._line_rgba = self.pack_rgba(self.color_rgb(self.config['color']))
+        self._background_rgba = self.pack_rgba(self.color_rgb(self.config['background']))
+        self._buffer_key = None
+        
+    def _get_brushes(self, gc):
+        """获取缓存的画笔和画刷，仅在颜色或线宽变化时重建"""
+        key = (self.config['color'], self.config['line_width'])
+        if key != self._brush_key:
+            self._pen = gc.CreatePen(wx.Pen(self.config['color'], self.config['line_width']))
+            self._brush = gc.CreateBrush(
+                wx.Brush(wx.Colour(self.config['color']).ChangeLightness(80)))
+            self._brush_key = key
+        return self._pen, self._brush
+        
+    def update_frame(self, width, height):
+        """平滑音频数据并抽取到像素宽度
         
         Args:
-            gc: 图形上下文
             width: 绘制区域宽度
             height: 绘制区域高度
         """
         # 获取音频数据
         data = self.get_audio_data()
+        samples = len(data)
+        if samples < 2:
+            return
+        if len(self.history) != samples:
+            self.history = np.zeros(samples)
+            self._blend = np.zeros(samples)
         
         # 平滑过渡
         alpha = 0.3  # 平滑系数
-        self.history = alpha * data + (1 - alpha) * self.history
+        np.multiply(data, alpha, out=self._blend)
+        self.history *= 1 - alpha
+        self.history += self._blend
         
-        # 准备绘制
-        gc.SetPen(wx.Pen(self.config['color'], self.config['line_width']))
+        self._ensure_buffers(samples, width)
+        col_max = self._col_max
+        col_min = self._col_min
         
+        # 抽取到像素宽度：每列取最大值和最小值
+        if self._column_starts is not None:
+            np.maximum.reduceat(self.history, self._column_starts, out=col_max)
+            np.minimum.reduceat(self.history, self._column_starts, out=col_min)
+        elif len(col_max) != samples:
+            # 采样数少于像素宽度时线性插值到每个像素列
+            col_max[:] = np.interp(self._column_x, self._sample_x, self.history)
+            col_min[:] = col_max
+        else:
+            col_max[:] = self.history
+            col_min[:] = self.history
+            
+    def draw(self, gc, width, height):
+        """绘制波形
+        
+        Args:
+            gc: 图形上下文
+            width: 绘制区域宽度
+            height: 绘制区域高度
+        """
+        col_max = self._col_max
+        col_min = self._col_min
+        columns = len(col_max)
+        if columns < 2:
+            return
+            
         # 计算缩放比例
         scale_y = height / 4  # 留出上下边距
-        samples = len(self.history)
-        scale_x = width / (samples - 1)
+        y_center = height / 2
+        points = self._points
         
-        # 创建路径
-        path = gc.CreatePath()
+        # 上下边缘：镜像时上边缘为幅度（最大值的绝对值），下边缘为其反射；
+        # 否则分别为最大值和最小值包络
+        if self.config['mirror']:
+            np.abs(col_max, out=points[:columns, 1])
+            points[:columns, 1] *= -scale_y
+            np.negative(points[columns - 1::-1, 1], out=points[columns:, 1])
+        else:
+            np.multiply(col_max, -scale_y, out=points[:columns, 1])
+            np.multiply(col_min[::-1], -scale_y, out=points[columns:, 1])
+        points[:, 1] += y_center
         
-        # 绘制上半部分波形
-        y_center = height / 2
-        path.MoveToPoint(0, y_center - self.history[0] * scale_y)
+        # 一次绘制并填充闭合的波形多边形
+        pen, brush = self._get_brushes(gc)
+        gc.SetPen(pen)
+        gc.SetBrush(brush)
+        gc.DrawLines(self.to_points(points))
+        
+    def rasterize(self, rgba, width, height):
+        """将波形光栅化到RGBA缓冲区
         
-        for i in range(1, samples):
-            x = i * scale_x
-            y = y_center - self.history[i] * scale_y
+        Args:
+            rgba: 形状为(height, width, 4)的uint8缓冲区
+            width: 绘制区域宽度
+            height: 绘制区域高度
+        """
+        pixels = self.pack_rgba(rgba)
+        pixels.fill(self._background_rgba)
+        if len(self._pixel_column) != width or len(self._col_max) < 2:
+            return
             
-            if self.config['interpolation'] and i > 1:
-                # 使用贝塞尔曲线进行平滑
-                x_prev = (i - 1) * scale_x
-                y_prev = y_center - self.history[i - 1] * scale_y
-                cx = (x + x_prev) / 2
-                path.AddQuadCurveToPoint(cx, y_prev, x, y)
-            else:
-                path.AddLineToPoint(x, y)
-                
-        # 如果启用镜像显示，绘制下半部分
+        scale_y = height / 4
+        y_center = height / 2
+        top = self._pixel_top
+        bottom = self._pixel_bottom
+        
+        # 每个像素列的上下边缘（与draw()一致：镜像时按幅度对称）
+        np.take(self._col_max, self._pixel_column, out=top)
+        line_width = self.config['line_width']
         if self.config['mirror']:
-            # 从右到左绘制镜像波形
-            for i in range(samples - 1, -1, -1):
-                x = i * scale_x
-                y = y_center + self.history[i] * scale_y
-                
-                if self.config['interpolation'] and i < samples - 1:
-                    x_next = (i + 1) * scale_x
-                    y_next = y_center + self.history[i + 1] * scale_y
-                    cx = (x + x_next) / 2
-                    path.AddQuadCurveToPoint(cx, y_next, x, y)
-                else:
-                    path.AddLineToPoint(x, y)
-                    
-        # 闭合路径
-        path.CloseSubpath()
-        
-        # 填充波形
-        gc.SetBrush(wx.Brush(wx.Colour(self.config['color']).ChangeLightness(80)))
-        gc.DrawPath(path)
+            np.abs(top, out=top)
+            np.multiply(top, scale_y, out=bottom)
+        else:
+            np.take(self._col_min, self._pixel_column, out=bottom)
+            bottom *= -scale_y
+        top *= -scale_y
+        
+        # 上下边缘重合（如插值得到的列）时至少保留线宽，否则该列什么也不画
+        bottom -= top
+        np.maximum(bottom, line_width, out=bottom)
+        bottom += top
+        top += y_center
+        bottom += y_center
+        
+        # 上下边缘之间填充，边缘附近line_width个像素使用线条颜色
+        np.greater_equal(self._rows, top, out=self._fill_mask)
+        np.less_equal(self._rows, bottom, out=self._edge_mask)
+        self._fill_mask &= self._edge_mask
+        np.copyto(pixels, self._fill_rgba, where=self._fill_mask)
+        
+        np.less(self._rows, top + line_width, out=self._edge_mask)
+        self._edge_mask |= self._rows > bottom - line_width
+        self._edge_mask &= self._fill_mask
+        np.copyto(pixels, self._line_rgba, where=self._edge_mask)
@@ -0,0 +1,88 @@
+"""
+曲库元数据模块
+按fs_id保存播放时分析得到的曲目信息（如节拍速度）
+"""
+
+import os
+import json
+import threading
+from typing import Dict, Optional
+from src.persister import write_json_atomic
+
+
+class LibraryMetadata:
+    """曲库元数据存储，保存在~/.dupan/library.json"""
+    
+    def __init__(self, data_dir: Optional[str] = None):
+        """初始化曲库元数据存储
+        
+        Args:
+            data_dir: 数据目录，默认为~/.dupan
+        """
+        self.data_dir = data_dir or os.path.join(os.path.expanduser("~"), ".dupan")
+        os.makedirs(self.data_dir, exist_ok=True)
+        self.metadata_file = os.path.join(self.data_dir, "library.json")
+        
+        # fs_id（字符串）到元数据字典的映射
+        self.entries: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+        
+        # 保存时共用同一个临时文件，同一时间只允许一次保存
+        self._save_lock = threading.Lock()
+        
+        self._load()
+        
+    def get(self, fs_id) -> Optional[Dict]:
+        """获取曲目元数据
+        
+        Args:
+            fs_id: 文件ID
+            
+        Returns:
+            元数据字典的副本，不存在时返回None
+        """
+        with self._lock:
+            entry = self.entries.get(str(fs_id))
+            return dict(entry) if entry is not None else None
+            
+    def get_tempo(self, fs_id) -> Optional[float]:
+        """获取曲目的节拍速度
+        
+        Args:
+            fs_id: 文件ID
+            
+        Returns:
+            每分钟节拍数，未分析时返回None
+        """
+        entry = self.get(fs_id)
+        return entry.get('tempo') if entry else None
+        
+    def update(self, fs_id, **fields) -> None:
+        """更新曲目元数据（需调用save()写入文件）
+        
+        Args:
+            fs_id: 文件ID
+            **fields: 要更新的字段
+        """
+        with self._lock:
+            self.entries.setdefault(str(fs_id), {}).update(fields)
+            
+    def save(self) -> None:
+        """原子地保存元数据到文件（中途崩溃时原文件保持完整）"""
+        try:
+            with self._save_lock:
+                with self._lock:
+                    data = {fs_id: dict(entry) for fs_id, entry in self.entries.items()}
+                write_json_atomic(self.metadata_file, data)
+        except Exception as e:
+            print(f"保存曲库元数据失败: {str(e)}")
+            
+    def _load(self) -> None:
+        """从文件加载元数据"""
+        try:
+            if os.path.exists(self.metadata_file):
+                with open(self.metadata_file, 'r', encoding='utf-8') as f:
+                    self.entries = json.load(f)
+        except Exception as e:
+            print(f"加载曲库元数据失败: {str(e)}")
+            self.entries = {}
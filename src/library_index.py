@@ -0,0 +1,444 @@
+"""
+曲库搜索索引模块
+把浏览过的目录中的音频文件保存在SQLite（~/.dupan/library.db）中，
+用FTS5全文索引支持在整个网盘曲库中即时搜索：
+文件名、标签（所在目录名）和拼音首字母都拆成重叠的双字片段建立索引，
+任意长度的子串（包括两个字的中文词）都能通过片段短语查询命中，
+结果按匹配位置和播放次数排序
+"""
+
+import os
+import re
+import math
+import time
+import queue
+import sqlite3
+import threading
+from typing import Dict, List, Optional
+
+# 拼音首字母为可选功能，未安装pypinyin时只索引英文单词首字母
+try:
+    from pypinyin import lazy_pinyin, Style
+except ImportError:
+    lazy_pinyin = None
+
+# 音频文件扩展名
+AUDIO_EXTENSIONS = {'.mp3', '.wav', '.flac', '.m4a', '.ogg', '.wma'}
+
+# 单词（字母、数字、汉字的连续串，与FTS5 unicode61分词规则一致）
+WORD_PATTERN = re.compile(r'[^\W_]+')
+
+# 汉字
+HAN_PATTERN = re.compile(r'[\u3400-\u9fff]')
+
+# 数据库结构版本
+SCHEMA_VERSION = 2
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tracks (
+    fs_id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    dir TEXT NOT NULL,
+    name TEXT NOT NULL,
+    name_key TEXT NOT NULL,
+    initials TEXT NOT NULL,
+    size INTEGER NOT NULL DEFAULT 0,
+    server_mtime INTEGER NOT NULL DEFAULT 0,
+    md5 TEXT
+);
+CREATE INDEX IF NOT EXISTS tracks_dir ON tracks(dir);
+CREATE INDEX IF NOT EXISTS tracks_name_key ON tracks(name_key);
+CREATE INDEX IF NOT EXISTS tracks_initials ON tracks(initials);
+CREATE INDEX IF NOT EXISTS tracks_content ON tracks(md5, size);
+CREATE VIRTUAL TABLE IF NOT EXISTS tracks_fts USING fts5(name, tags, initials, prefix='1');
+CREATE TABLE IF NOT EXISTS plays (
+    fs_id INTEGER PRIMARY KEY,
+    count INTEGER NOT NULL DEFAULT 0,
+    last_played REAL NOT NULL DEFAULT 0
+);
+"""
+
+# 读取曲目记录的列（顺序与_file_info对应）
+SELECT_TRACKS = ("SELECT fs_id, path, dir, name, name_key, initials, size, server_mtime, md5 "
+                 "FROM tracks")
+
+
+def is_audio_file(file: Dict) -> bool:
+    """是否为音频文件"""
+    if file.get('isdir') == 1:
+        return False
+    return os.path.splitext(file['server_filename'])[1].lower() in AUDIO_EXTENSIONS
+
+
+def name_key(filename: str) -> str:
+    """文件名去掉扩展名后的小写形式"""
+    return os.path.splitext(filename)[0].lower()
+
+
+def initials_of(text: str) -> str:
+    """取文本中每个单词的首字母，汉字取拼音首字母（需要pypinyin）
+    
+    如"七里香 Taylor Swift"得到"qlxts"
+    """
+    letters = []
+    for word in WORD_PATTERN.findall(text.lower()):
+        if HAN_PATTERN.search(word):
+            if lazy_pinyin is not None:
+                letters.extend(item[:1] for item in lazy_pinyin(word, style=Style.FIRST_LETTER))
+        else:
+            letters.append(word[0])
+    return "".join(letters)
+
+
+def bigrams(text: str) -> str:
+    """把文本拆成重叠的双字片段，每个单词最后再加上末尾的单字
+    
+    如"love song"得到"lo ov ve e so on ng g"，子串"ove"即片段短语"ov ve"
+    """
+    grams = []
+    for word in WORD_PATTERN.findall(text.lower()):
+        grams.extend(word[i:i + 2] for i in range(len(word) - 1))
+        grams.append(word[-1])
+    return " ".join(grams)
+
+
+def match_expression(query: str) -> Optional[str]:
+    """把搜索文本转换为FTS5查询：每个单词都要出现（子串匹配）
+    
+    Args:
+        query: 搜索文本
+        
+    Returns:
+        FTS5查询表达式，没有可搜索的单词时返回None
+    """
+    phrases = []
+    for word in WORD_PATTERN.findall(query.lower()):
+        if len(word) == 1:
+            # 单字匹配以它开头的片段
+            phrases.append(f'"{word}"*')
+        else:
+            phrases.append('"' + " ".join(word[i:i + 2] for i in range(len(word) - 1)) + '"')
+    return " AND ".join(phrases) if phrases else None
+
+
+def tags_of(dir_path: str) -> str:
+    """文件所在的上两级目录名（通常为歌手和专辑）作为标签"""
+    parts = [part for part in dir_path.split('/') if part]
+    return " ".join(parts[-2:])
+
+
+class LibraryIndex:
+    """曲库搜索索引
+    
+    写入（目录列表、播放记录）放入队列由后台线程批量提交，不阻塞加载目录的线程；
+    搜索在调用线程中使用单独的只读连接（WAL模式下读写互不阻塞）
+    """
+    
+    # 子串匹配最多取多少个候选再排序（匹配过多时查询本身已不够具体）
+    CANDIDATE_LIMIT = 1000
+    
+    # 播放次数最多的曲目总是参与排序，不受候选数量限制
+    FAVORITE_LIMIT = 200
+    
+    # 排序加分
+    PREFIX_BONUS = 100.0    # 文件名以搜索文本开头
+    INITIALS_BONUS = 80.0   # 拼音首字母以搜索文本开头
+    NAME_BONUS = 20.0       # 每个单词出现在文件名中（而不只是目录名中）
+    PLAY_BONUS = 10.0       # 乘以log2(1+播放次数)
+    
+    def __init__(self, data_dir: Optional[str] = None):
+        """初始化曲库搜索索引
+        
+        Args:
+            data_dir: 数据目录，默认为~/.dupan
+        """
+        self.data_dir = data_dir or os.path.join(os.path.expanduser("~"), ".dupan")
+        os.makedirs(self.data_dir, exist_ok=True)
+        self.db_file = os.path.join(self.data_dir, "library.db")
+        
+        # 写连接只在后台线程中使用，读连接由锁保护
+        self._writes: queue.Queue = queue.Queue()
+        self._reader = self._connect()
+        self._read_lock = threading.Lock()
+        
+        # 播放次数（fs_id到次数），用于排序
+        self.play_counts: Dict[int, int] = {
+            fs_id: count for fs_id, count in self._reader.execute("SELECT fs_id, count FROM plays")
+        }
+        self._favorites: Optional[List[int]] = None
+        
+        self._writer = threading.Thread(target=self._write_loop, daemon=True)
+        self._writer.start()
+        
+    def _connect(self) -> sqlite3.Connection:
+        """打开数据库连接，需要时创建表"""
+        conn = sqlite3.connect(self.db_file, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        # 20万首曲目的索引约几十MB，读连接缓存整个热点部分
+        conn.execute("PRAGMA cache_size=-32768")
+        if conn.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+            conn.executescript(SCHEMA)
+            conn.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+        return conn
+        
+    def __len__(self) -> int:
+        with self._read_lock:
+            return self._reader.execute("SELECT COUNT(*) FROM tracks").fetchone()[0]
+            
+    def index_listing(self, path: str, files: List[Dict]) -> None:
+        """更新一个目录的索引（可作为ListingCache的写入回调，在任意线程调用）
+        
+        目录中的音频文件被加入或更新，不再存在的文件和子目录从索引中移除
+        
+        Args:
+            path: 目录路径
+            files: 目录的完整文件列表
+        """
+        self._writes.put(('listing', path, files))
+        
+    def record_play(self, file_info: Optional[Dict]) -> None:
+        """记录一次播放（可直接订阅播放器的当前曲目主题）
+        
+        Args:
+            file_info: 文件信息字典
+        """
+        if not file_info or 'fs_id' not in file_info:
+            return
+        fs_id = int(file_info['fs_id'])
+        self.play_counts[fs_id] = self.play_counts.get(fs_id, 0) + 1
+        self._favorites = None
+        self._writes.put(('play', fs_id, time.time()))
+        
+    def flush(self) -> None:
+        """等待已提交的写入完成"""
+        self._writes.join()
+        
+    def close(self) -> None:
+        """完成剩余写入并停止后台线程"""
+        self._writes.put(None)
+        self._writer.join(timeout=5)
+        
+    def _write_loop(self) -> None:
+        """后台写入线程：把队列中已有的写入合并为一个事务提交"""
+        conn = self._connect()
+        while True:
+            batch = [self._writes.get()]
+            while True:
+                try:
+                    batch.append(self._writes.get_nowait())
+                except queue.Empty:
+                    break
+                    
+            stop = None in batch
+            try:
+                with conn:
+                    for item in batch:
+                        if item is None:
+                            continue
+                        if item[0] == 'listing':
+                            self._write_listing(conn, item[1], item[2])
+                        else:
+                            self._write_play(conn, item[1], item[2])
+            except Exception as e:
+                print(f"更新曲库索引失败: {e}")
+            finally:
+                for _ in batch:
+                    self._writes.task_done()
+                    
+            if stop:
+                conn.close()
+                return
+                
+    def _write_listing(self, conn: sqlite3.Connection, path: str, files: List[Dict]) -> None:
+        """在写事务中用目录列表更新索引
+        
+        只读取本目录的曲目和直接子目录名：未变化（路径、大小、修改时间、md5相同）的曲目不重写，
+        只有已不存在的子目录才删除其下的全部曲目
+        """
+        prefix = path.rstrip('/') + '/'
+        tags = tags_of(path)
+        tracks = {int(file['fs_id']): file for file in files if is_audio_file(file)}
+        folders = {file['server_filename'] for file in files if file.get('isdir') == 1}
+        
+        # 删除已不存在的子目录下的全部文件：按目录索引跳跃扫描，每个子目录只查询一次
+        cursor = prefix
+        while True:
+            row = conn.execute(
+                "SELECT dir FROM tracks WHERE dir > ? AND dir < ? ORDER BY dir LIMIT 1",
+                (cursor, prefix + '\U0010ffff')).fetchone()
+            if row is None:
+                break
+            child = row[0][len(prefix):].split('/', 1)[0]
+            folder = prefix + child
+            if child not in folders:
+                where = "dir = ? OR (dir > ? AND dir < ?)"
+                params = (folder, folder + '/', folder + '/\U0010ffff')
+                conn.execute("DELETE FROM tracks_fts WHERE rowid IN "
+                             f"(SELECT fs_id FROM tracks WHERE {where})", params)
+                conn.execute(f"DELETE FROM tracks WHERE {where}", params)
+            # 名称排在子目录和其下级目录之间的同级目录（如"a b"在"a"和"a/b"之间）此前已经扫描过
+            cursor = row[0] if row[0] == folder else folder + '/\U0010ffff'
+            
+        # 本目录中已索引的曲目
+        indexed = {row[0]: row[1:] for row in conn.execute(
+            "SELECT fs_id, path, size, server_mtime, md5 FROM tracks WHERE dir = ?", (path,))}
+            
+        # 删除目录中已不存在的文件
+        self._delete(conn, [fs_id for fs_id in indexed if fs_id not in tracks])
+        
+        # 新增或变化的文件（删除同一fs_id的旧记录，包括从其他目录移动过来的文件）
+        changed = {fs_id: file for fs_id, file in tracks.items()
+                   if indexed.get(fs_id) != (file['path'], file.get('size', 0),
+                                             file.get('server_mtime', 0), file.get('md5'))}
+        self._delete(conn, list(changed))
+        
+        rows = []
+        fts_rows = []
+        for fs_id, file in changed.items():
+            key = name_key(file['server_filename'])
+            initials = initials_of(key)
+            rows.append((fs_id, file['path'], path, file['server_filename'], key, initials,
+                         file.get('size', 0), file.get('server_mtime', 0), file.get('md5')))
+            fts_rows.append((fs_id, bigrams(key), bigrams(tags), bigrams(initials)))
+        conn.executemany("INSERT INTO tracks VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+        conn.executemany(
+            "INSERT INTO tracks_fts(rowid, name, tags, initials) VALUES (?, ?, ?, ?)", fts_rows)
+            
+    @staticmethod
+    def _delete(conn: sqlite3.Connection, fs_ids: List[int]) -> None:
+        """从曲目表和全文索引中删除"""
+        if fs_ids:
+            params = [(fs_id,) for fs_id in fs_ids]
+            conn.executemany("DELETE FROM tracks WHERE fs_id = ?", params)
+            conn.executemany("DELETE FROM tracks_fts WHERE rowid = ?", params)
+            
+    @staticmethod
+    def _write_play(conn: sqlite3.Connection, fs_id: int, played_at: float) -> None:
+        """在写事务中增加播放次数"""
+        conn.execute(
+            "INSERT INTO plays(fs_id, count, last_played) VALUES (?, 1, ?) "
+            "ON CONFLICT(fs_id) DO UPDATE SET count = count + 1, last_played = excluded.last_played",
+            (fs_id, played_at))
+            
+    def _favorite_ids(self) -> List[int]:
+        """播放次数最多的曲目（播放记录变化后重新计算）"""
+        favorites = self._favorites
+        if favorites is None:
+            favorites = sorted(self.play_counts, key=self.play_counts.get,
+                               reverse=True)[:self.FAVORITE_LIMIT]
+            self._favorites = favorites
+        return favorites
+        
+    def search(self, query: str, limit: int = 200) -> List[Dict]:
+        """在整个曲库中搜索
+        
+        每个单词都要作为子串出现在文件名、标签或拼音首字母中；
+        文件名或拼音首字母以搜索文本开头的排在前面，其次按播放次数
+        
+        Args:
+            query: 搜索文本
+            limit: 最多返回的结果数
+            
+        Returns:
+            文件信息字典列表（按相关度排序）
+        """
+        expression = match_expression(query)
+        if expression is None:
+            return []
+        key = query.strip().lower()
+        words = WORD_PATTERN.findall(key)
+        favorites = self._favorite_ids()
+        
+        with self._read_lock:
+            conn = self._reader
+            rows = conn.execute(
+                f"{SELECT_TRACKS} WHERE fs_id IN "
+                "(SELECT rowid FROM tracks_fts WHERE tracks_fts MATCH ? LIMIT ?)",
+                (expression, self.CANDIDATE_LIMIT)).fetchall()
+                
+            # 候选数量受限时，前缀匹配和常播放的曲目仍要参与排序
+            if len(rows) >= self.CANDIDATE_LIMIT:
+                seen = {row[0] for row in rows}
+                extra = []
+                for column in ('name_key', 'initials'):
+                    extra.extend(conn.execute(
+                        f"{SELECT_TRACKS} WHERE {column} >= ? AND {column} < ? LIMIT ?",
+                        (key, key + '\uffff', limit)))
+                # 常播放的曲目数量少，直接逐个检查（FTS5对rowid IN条件没有优化）
+                for row in self._fetch(conn, favorites):
+                    text = " ".join((row[4], tags_of(row[2]), row[5]))
+                    if all(word in text for word in words):
+                        extra.append(row)
+                for row in extra:
+                    if row[0] not in seen:
+                        seen.add(row[0])
+                        rows.append(row)
+                        
+        plays = self.play_counts
+        
+        def rank(row):
+            name, initials = row[4], row[5]
+            score = self.NAME_BONUS * sum(word in name for word in words)
+            if name.startswith(key):
+                score += self.PREFIX_BONUS
+            if initials.startswith(key):
+                score += self.INITIALS_BONUS
+            count = plays.get(row[0])
+            if count:
+                score += self.PLAY_BONUS * math.log2(1 + count)
+            return -score, len(name), name
+            
+        rows.sort(key=rank)
+        return [self._file_info(row) for row in rows[:limit]]
+        
+    def locate(self, files: List[Dict]) -> List[Optional[Dict]]:
+        """在曲库中查找文件的当前位置（用于修复移动或重命名后失效的路径）
+        
+        先按fs_id查找（网盘内移动、重命名不改变fs_id），
+        找不到时按内容（md5和大小）查找，如重新上传的同一文件
+        
+        Args:
+            files: 文件信息字典列表
+            
+        Returns:
+            与files一一对应的当前文件信息，曲库中没有时为None
+        """
+        with self._read_lock:
+            conn = self._reader
+            by_id = {row[0]: row for row in self._fetch(conn, [int(f['fs_id']) for f in files])}
+            results = []
+            for file in files:
+                row = by_id.get(int(file['fs_id']))
+                if row is None and file.get('md5'):
+                    row = conn.execute(f"{SELECT_TRACKS} WHERE md5 = ? AND size = ? LIMIT 1",
+                                       (file['md5'], file.get('size', 0))).fetchone()
+                results.append(self._file_info(row) if row is not None else None)
+        return results
+        
+    @staticmethod
+    def _fetch(conn: sqlite3.Connection, fs_ids: List[int]) -> List[tuple]:
+        """按fs_id读取曲目记录"""
+        rows = []
+        # SQLite限制每条语句的参数个数
+        for start in range(0, len(fs_ids), 500):
+            chunk = fs_ids[start:start + 500]
+            marks = ",".join("?" * len(chunk))
+            rows.extend(conn.execute(f"{SELECT_TRACKS} WHERE fs_id IN ({marks})", chunk))
+        return rows
+        
+    @staticmethod
+    def _file_info(row: tuple) -> Dict:
+        """把曲目记录转换为与接口返回格式一致的文件信息字典"""
+        fs_id, path, _, name, _, _, size, server_mtime, md5 = row
+        info = {
+            'fs_id': fs_id,
+            'path': path,
+            'server_filename': name,
+            'isdir': 0,
+            'size': size,
+            'server_mtime': server_mtime,
+        }
+        if md5:
+            info['md5'] = md5
+        return info
@@ -0,0 +1,102 @@
+"""
+目录列表缓存模块
+在内存中按路径缓存完整的目录列表，供文件浏览器、预取和递归遍历共用
+"""
+
+import time
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional
+
+
+class ListingCache:
+    """目录列表缓存（LRU，带过期时间）"""
+    
+    def __init__(self, ttl: float = 300.0, max_entries: int = 500):
+        """初始化目录列表缓存
+        
+        Args:
+            ttl: 缓存有效期（秒）
+            max_entries: 最多缓存的目录数
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+        
+        # 路径到(写入时间, 文件列表)的映射，按最近使用排序
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        
+        # 写入新列表时的回调，参数为(路径, 文件列表)
+        self._listeners: List[Callable[[str, List[Dict]], None]] = []
+        
+    def get(self, path: str) -> Optional[List[Dict]]:
+        """获取未过期的目录列表
+        
+        Args:
+            path: 目录路径
+            
+        Returns:
+            文件列表，未缓存或已过期时返回None
+        """
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is None:
+                return None
+            stored_at, files = entry
+            if time.monotonic() - stored_at > self.ttl:
+                del self._entries[path]
+                return None
+            self._entries.move_to_end(path)
+            return files
+            
+    def contains(self, path: str) -> bool:
+        """是否有未过期的缓存"""
+        return self.get(path) is not None
+        
+    def put(self, path: str, files: List[Dict]) -> None:
+        """写入目录列表
+        
+        Args:
+            path: 目录路径
+            files: 完整的文件列表
+        """
+        with self._lock:
+            self._entries[path] = (time.monotonic(), files)
+            self._entries.move_to_end(path)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            listeners = self._listeners
+            
+        for listener in listeners:
+            try:
+                listener(path, files)
+            except Exception as e:
+                print(f"目录列表缓存回调出错: {e}")
+                
+    def invalidate(self, path: str) -> None:
+        """使目录的缓存失效
+        
+        Args:
+            path: 目录路径
+        """
+        with self._lock:
+            self._entries.pop(path, None)
+            
+    def clear(self) -> None:
+        """清空缓存"""
+        with self._lock:
+            self._entries.clear()
+            
+    def add_listener(self, listener: Callable[[str, List[Dict]], None]) -> None:
+        """添加写入回调（在写入的线程中调用）
+        
+        Args:
+            listener: 回调函数，参数为(路径, 文件列表)
+        """
+        with self._lock:
+            self._listeners = self._listeners + [listener]
+            
+    def remove_listener(self, listener: Callable[[str, List[Dict]], None]) -> None:
+        """移除写入回调"""
+        with self._lock:
+            self._listeners = [item for item in self._listeners if item != listener]
@@ -0,0 +1,223 @@
+"""
+起音与节拍检测模块
+基于频谱通量的流式起音检测和节拍速度估计
+"""
+
+import threading
+import numpy as np
+from typing import Callable, List, Optional, Tuple
+
+
+class OnsetDetector:
+    """流式起音/节拍检测器
+    
+    每帧计算对数幅度谱正向差分的均值（频谱通量），以最近一段通量的中位数
+    作为自适应阈值挑选峰值作为节拍；定期对起音强度包络做自相关估计节拍速度。
+    所有状态保存在固定长度的缓冲区中，每帧内存开销恒定。
+    """
+    
+    def __init__(self, num_bins: int = 512, frame_rate: float = 44100 / 512,
+                 floor_db: float = -80.0, threshold_seconds: float = 1.0,
+                 multiplier: float = 1.5, delta: float = 0.1, min_interval: float = 0.1,
+                 tempo_seconds: float = 6.0, tempo_interval: float = 0.5,
+                 min_bpm: float = 60.0, max_bpm: float = 200.0):
+        """初始化起音检测器
+        
+        Args:
+            num_bins: 每帧频谱的频点数
+            frame_rate: 每秒频谱帧数（采样率 / STFT跳步）
+            floor_db: 低于该值的频谱按该值计算，避免噪声底噪产生通量
+            threshold_seconds: 自适应阈值的窗口长度（秒）
+            multiplier: 阈值相对中位数的倍数
+            delta: 阈值的固定偏移（分贝）
+            min_interval: 两次起音之间的最小间隔（秒）
+            tempo_seconds: 估计节拍速度使用的包络长度（秒）
+            tempo_interval: 重新估计节拍速度的间隔（秒）
+            min_bpm: 最小节拍速度
+            max_bpm: 最大节拍速度
+        """
+        self.num_bins = num_bins
+        self.frame_rate = frame_rate
+        self.floor_db = floor_db
+        self.multiplier = multiplier
+        self.delta = delta
+        self.min_interval_frames = max(1, int(round(min_interval * frame_rate)))
+        
+        # 频谱通量计算缓冲区：上一帧频谱和差分暂存区，每帧交换
+        self._previous = np.empty(num_bins)
+        self._scratch = np.empty(num_bins)
+        
+        # 自适应阈值窗口（环形）及求中位数用的副本
+        self._flux_window = np.zeros(max(3, int(threshold_seconds * frame_rate)))
+        self._sorted = np.empty_like(self._flux_window)
+        
+        # 节拍速度估计用的起音强度包络（环形）及按时间顺序展开的副本
+        self._envelope = np.zeros(max(4, int(tempo_seconds * frame_rate)))
+        self._ordered = np.empty_like(self._envelope)
+        self._tempo_interval = max(1, int(tempo_interval * frame_rate))
+        
+        # 候选节拍周期（帧数）及以120BPM为中心的对数高斯先验权重
+        min_lag = max(1, int(np.floor(60.0 * frame_rate / max_bpm)))
+        max_lag = max(min_lag + 1, int(np.ceil(60.0 * frame_rate / min_bpm)))
+        self._lags = np.arange(min_lag, max_lag + 1)
+        self._prior = np.exp(-0.5 * np.log2(60.0 * frame_rate / self._lags / 120.0) ** 2)
+        
+        # 节拍事件订阅者
+        self._subscribers: List[Callable[[float, Optional[float]], None]] = []
+        self._lock = threading.Lock()
+        
+        self.reset()
+        
+    def reset(self, tempo: Optional[float] = None) -> None:
+        """清空检测状态（切换曲目时调用）
+        
+        Args:
+            tempo: 已知的节拍速度（如曲库中保存的上次播放时的估计），作为初始估计
+        """
+        self._previous[:] = self.floor_db
+        self._flux_window[:] = 0
+        self._envelope[:] = 0
+        self.frame_count = 0
+        
+        # 峰值检测需要前后各一帧，检测结果延迟一帧
+        self._flux_before = 0.0
+        self._candidate_flux = 0.0
+        self._candidate_threshold = np.inf
+        self._last_onset = -self.min_interval_frames
+        
+        self.tempo = tempo
+        self.tempo_confidence = 1.0 if tempo else 0.0
+        
+        # 本曲目从音频中估计节拍速度的次数（不含初始估计）
+        self.estimates = 0
+        self.last_strength = 0.0
+        
+    def subscribe(self, callback: Callable[[float, Optional[float]], None]) -> None:
+        """订阅节拍事件
+        
+        回调在推入音频的线程中调用，应只更新状态并尽快返回
+        
+        Args:
+            callback: 回调函数，参数为节拍强度（0-1）和当前节拍速度（BPM，未知时为None）
+        """
+        with self._lock:
+            if callback not in self._subscribers:
+                self._subscribers = self._subscribers + [callback]
+                
+    def unsubscribe(self, callback: Callable[[float, Optional[float]], None]) -> None:
+        """取消订阅节拍事件
+        
+        Args:
+            callback: subscribe()订阅的回调函数
+        """
+        with self._lock:
+            self._subscribers = [subscriber for subscriber in self._subscribers
+                                 if subscriber != callback]
+                                 
+    def process(self, spectrum: np.ndarray) -> bool:
+        """处理一帧频谱（可直接作为SpectrumAnalyzer的帧监听器）
+        
+        Args:
+            spectrum: 分贝频谱
+            
+        Returns:
+            上一帧是否被检测为节拍
+        """
+        # 频谱通量：限幅后与上一帧的正向差分均值
+        current = self._scratch
+        np.maximum(spectrum, self.floor_db, out=current)
+        np.subtract(current, self._previous, out=self._previous)
+        np.maximum(self._previous, 0, out=self._previous)
+        flux = float(self._previous.mean()) if self.frame_count else 0.0
+        self._previous, self._scratch = current, self._previous
+        
+        # 自适应阈值：最近一段通量的中位数
+        window = self._flux_window
+        window[self.frame_count % len(window)] = flux
+        np.copyto(self._sorted, window)
+        middle = len(window) // 2
+        self._sorted.partition(middle)
+        median = self._sorted[middle]
+        threshold = self.multiplier * median + self.delta
+        
+        # 起音强度包络
+        self._envelope[self.frame_count % len(self._envelope)] = max(flux - median, 0.0)
+        
+        # 上一帧是局部峰值且超过阈值时判定为节拍
+        candidate = self._candidate_flux
+        onset = (candidate > self._flux_before and candidate >= flux
+                 and candidate > self._candidate_threshold
+                 and self.frame_count - 1 - self._last_onset >= self.min_interval_frames)
+        if onset:
+            self._last_onset = self.frame_count - 1
+            self.last_strength = min(1.0, (candidate - self._candidate_threshold)
+                                     / max(self._candidate_threshold, 1e-9))
+                                     
+        self._flux_before = candidate
+        self._candidate_flux = flux
+        self._candidate_threshold = threshold
+        self.frame_count += 1
+        
+        # 包络填满一半后定期更新节拍速度
+        if (self.frame_count >= len(self._envelope) // 2
+                and self.frame_count % self._tempo_interval == 0):
+            self._update_tempo()
+            
+        if onset:
+            for callback in self._subscribers:
+                try:
+                    callback(self.last_strength, self.tempo)
+                except Exception as e:
+                    print(f"节拍事件回调出错: {e}")
+        return onset
+        
+    def _update_tempo(self) -> None:
+        """用最近的起音强度包络更新节拍速度估计"""
+        position = self.frame_count % len(self._envelope)
+        tail = len(self._envelope) - position
+        self._ordered[:tail] = self._envelope[position:]
+        self._ordered[tail:] = self._envelope[:position]
+        
+        tempo, confidence = self.estimate_tempo(self._ordered)
+        if tempo is None:
+            return
+        if self.tempo is None:
+            self.tempo = tempo
+        else:
+            self.tempo += 0.3 * (tempo - self.tempo)
+        self.tempo_confidence = confidence
+        self.estimates += 1
+        
+    def estimate_tempo(self, envelope: np.ndarray) -> Tuple[Optional[float], float]:
+        """用起音强度包络的自相关估计节拍速度
+        
+        Args:
+            envelope: 按时间顺序排列的起音强度包络
+            
+        Returns:
+            (每分钟节拍数, 置信度0-1)，无法估计时节拍速度为None
+        """
+        n = len(envelope)
+        lags = self._lags[self._lags < n - 1]
+        if len(lags) == 0:
+            return None, 0.0
+            
+        # 补零到2n以上，用FFT计算线性自相关
+        centered = envelope - envelope.mean()
+        size = 1 << (2 * n - 1).bit_length()
+        power = np.fft.rfft(centered, size)
+        power *= power.conj()
+        autocorr = np.fft.irfft(power, size)[:n]
+        if autocorr[0] <= 0:
+            return None, 0.0
+            
+        best = int(lags[np.argmax(autocorr[lags] * self._prior[:len(lags)])])
+        
+        # 抛物线插值得到亚帧精度的周期
+        before, peak, after = autocorr[best - 1], autocorr[best], autocorr[best + 1]
+        curvature = before - 2 * peak + after
+        offset = 0.5 * (before - after) / curvature if curvature < 0 else 0.0
+        period = best + float(np.clip(offset, -0.5, 0.5))
+        
+        confidence = float(np.clip(peak / autocorr[0], 0.0, 1.0))
+        return 60.0 * self.frame_rate / period, confidence
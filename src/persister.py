@@ -0,0 +1,110 @@
+"""
+后台持久化模块
+修改只标记为待保存，由后台线程合并后按最小间隔写入磁盘，
+写入时先写临时文件并fsync，再原子地替换原文件，UI线程不等待磁盘
+"""
+
+import os
+import json
+import threading
+from typing import Any, Dict
+
+
+def write_json_atomic(file: str, data: Any) -> None:
+    """原子地写入JSON文件：中途崩溃时原文件保持完整
+    
+    Args:
+        file: 文件路径
+        data: 可序列化为JSON的数据
+    """
+    tmp_file = file + ".tmp"
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_file, file)
+    
+    # 同步目录项，确保改名本身落盘（Windows不支持打开目录）
+    if hasattr(os, 'O_DIRECTORY'):
+        fd = os.open(os.path.dirname(os.path.abspath(file)), os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+
+class JsonPersister:
+    """JSON文件的后台写入器（线程安全）
+    
+    save()只记录最新快照；同一文件在FLUSH_INTERVAL秒内的多次保存只写最后一次
+    """
+    
+    # 两次写入之间的最短间隔（秒）
+    FLUSH_INTERVAL = 2.0
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending: Dict[str, Any] = {}
+        self._dirty = threading.Event()
+        self._wake = threading.Event()
+        self._idle = threading.Condition(self._lock)
+        self._writing = False
+        self._closed = False
+        
+        # 统计：请求保存次数、实际写文件次数
+        self.saves = 0
+        self.writes = 0
+        
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        
+    def save(self, file: str, data: Any) -> None:
+        """标记文件待保存（立即返回）
+        
+        Args:
+            file: 文件路径
+            data: 文件内容的快照，调用后不应再修改
+        """
+        with self._lock:
+            self._pending[file] = data
+            self.saves += 1
+        self._dirty.set()
+        
+    def flush(self) -> None:
+        """立即写入所有待保存的文件并等待完成"""
+        self._wake.set()
+        self._dirty.set()
+        with self._idle:
+            while self._pending or self._writing:
+                self._idle.wait()
+                
+    def close(self) -> None:
+        """写入剩余内容并停止后台线程"""
+        self._closed = True
+        self.flush()
+        self._thread.join(timeout=5)
+        
+    def _run(self) -> None:
+        """写入线程"""
+        while True:
+            self._dirty.wait()
+            # 等待一个间隔，合并这段时间内的后续修改（flush或close时提前结束）
+            self._wake.wait(self.FLUSH_INTERVAL)
+            with self._lock:
+                self._dirty.clear()
+                self._wake.clear()
+                pending, self._pending = self._pending, {}
+                self._writing = True
+                
+            for file, data in pending.items():
+                try:
+                    write_json_atomic(file, data)
+                    self.writes += 1
+                except Exception as e:
+                    print(f"保存 {file} 失败: {e}")
+                    
+            with self._idle:
+                self._writing = False
+                self._idle.notify_all()
+                if self._closed and not self._pending:
+                    return
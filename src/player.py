@@ -1,12 +1,15 @@
 import os
 import vlc
-import time
 import threading
 import numpy as np
 from typing import Optional, Callable, List, Dict
 from enum import Enum
-import wx
 from mutagen import File as MutagenFile
+from src.analyzer import SpectrumAnalyzer
+from src.audio_tap import AudioTap
+from src.onset import OnsetDetector
+from src.scheduler import (get_scheduler, TOPIC_PLAYER_POSITION,
+                           TOPIC_PLAYER_STATE, TOPIC_PLAYER_TRACK)
 
 class PlayMode(Enum):
     """播放模式枚举"""
@@ -21,13 +24,15 @@ class PlayState(Enum):
     PAUSED = 2    # 暂停
 
 class AudioPlayer:
-    def __init__(self, api_client):
+    def __init__(self, api_client, library=None):
         """初始化音频播放器
         
         Args:
             api_client: 百度网盘API客户端实例
+            library: 曲库元数据（LibraryMetadata），保存每首曲目播放时估计的节拍速度
         """
         self.api_client = api_client
+        self.library = library
         
         # 初始化VLC实例和播放器
         self.instance = vlc.Instance()
@@ -51,9 +56,31 @@ class AudioPlayer:
         self.on_track_changed: Optional[Callable[[Dict], None]] = None
         self.on_error: Optional[Callable[[str], None]] = None
         
-        # 音频分析相关
-        self.audio_data = np.array([])
-        self.spectrum_data = np.array([])
+        # 音频分析相关（所有可视化器共享同一个分析器）
+        self.analyzer = SpectrumAnalyzer(fft_size=1024)
+        
+        # 是否接入了PCM数据来源（调用过feed_audio()）；没有时分析器中只有静音
+        self._audio_source = False
+        
+        # 节拍检测：订阅分析器的每一帧频谱
+        self.onset_detector = OnsetDetector(
+            num_bins=self.analyzer.num_bins,
+            frame_rate=self.analyzer.sample_rate / self.analyzer.hop_size
+        )
+        self.analyzer.add_listener(self.onset_detector.process)
+        
+        # 通过VLC音频回调采集解码后的PCM；不可用时VLC自己输出声音，分析器中只有静音
+        self.audio_tap = AudioTap.attach(self.player, self.feed_audio,
+                                         sample_rate=self.analyzer.sample_rate)
+        
+        # 状态变化通过调度器发布；播放结束由VLC事件通知，不再轮询
+        self.scheduler = get_scheduler()
+        self.player.event_manager().event_attach(
+            vlc.EventType.MediaPlayerEndReached, self._on_end_reached)
+            
+        # 更新线程空闲（未播放或无人订阅位置）时阻塞在该事件上
+        self._wake = threading.Event()
+        self.scheduler.watch(TOPIC_PLAYER_POSITION, self._wake.set)
         
         # 启动更新线程
         self.update_thread = threading.Thread(target=self._update_loop, daemon=True)
@@ -76,13 +103,22 @@ class AudioPlayer:
             self.media = self.instance.media_new(download_url)
             self.player.set_media(self.media)
             
+            # 记下上一首曲目播放中估计的节拍速度
+            self._store_tempo()
+            
             # 更新当前文件信息
             self.current_file = file_info
+            self.analyzer.reset()
+            
+            # 播放过的曲目直接使用曲库中的节拍速度作为初始估计
+            tempo = self.library.get_tempo(file_info['fs_id']) if self.library else None
+            self.onset_detector.reset(tempo)
             
             # 触发轨道改变事件
             if self.on_track_changed:
                 self.on_track_changed(file_info)
-                
+            self.scheduler.publish(TOPIC_PLAYER_TRACK, file_info)
+            
             return True
             
         except Exception as e:
@@ -94,30 +130,34 @@ class AudioPlayer:
         """开始播放"""
         if self.state == PlayState.STOPPED and self.current_file:
             self.player.play()
-            self.state = PlayState.PLAYING
-            if self.on_state_changed:
-                self.on_state_changed(self.state)
+            self._set_state(PlayState.PLAYING)
         elif self.state == PlayState.PAUSED:
             self.player.set_pause(0)
-            self.state = PlayState.PLAYING
-            if self.on_state_changed:
-                self.on_state_changed(self.state)
-                
+            self._set_state(PlayState.PLAYING)
+            
     def pause(self) -> None:
         """暂停播放"""
         if self.state == PlayState.PLAYING:
             self.player.set_pause(1)
-            self.state = PlayState.PAUSED
-            if self.on_state_changed:
-                self.on_state_changed(self.state)
-                
+            self._set_state(PlayState.PAUSED)
+            
     def stop(self) -> None:
         """停止播放"""
         self.player.stop()
-        self.state = PlayState.STOPPED
+        self._set_state(PlayState.STOPPED)
+        
+    def _set_state(self, state: PlayState) -> None:
+        """切换播放状态并通知回调、订阅者和更新线程
+        
+        Args:
+            state: 新的播放状态
+        """
+        self.state = state
         if self.on_state_changed:
-            self.on_state_changed(self.state)
-            
+            self.on_state_changed(state)
+        self.scheduler.publish(TOPIC_PLAYER_STATE, state)
+        self._wake.set()
+        
     def set_position(self, position: float) -> None:
         """设置播放位置
         
@@ -129,7 +169,8 @@ class AudioPlayer:
             self._position = position
             if self.on_position_changed:
                 self.on_position_changed(position)
-                
+            self.scheduler.publish(TOPIC_PLAYER_POSITION, position)
+            
     def set_volume(self, volume: int) -> None:
         """设置音量
         
@@ -229,6 +270,41 @@ class AudioPlayer:
         self.playlist = playlist
         return self._play_index(start_index)
         
+    def playlist_track_moved(self, from_index: int, to_index: int) -> None:
+        """播放列表对象中一首曲目被移动后调整当前索引
+        
+        Args:
+            from_index: 原索引
+            to_index: 新索引
+        """
+        current = self.current_index
+        if current < 0:
+            return
+        if current == from_index:
+            self.current_index = to_index
+        elif from_index < current <= to_index:
+            self.current_index = current - 1
+        elif to_index <= current < from_index:
+            self.current_index = current + 1
+            
+    def playlist_tracks_removed(self, indices: List[int]) -> None:
+        """播放列表对象中的曲目被移除后调整当前索引
+        
+        当前曲目被移除时，下一曲为原来排在它后面的曲目
+        
+        Args:
+            indices: 移除前的索引列表
+        """
+        current = self.current_index
+        if current < 0:
+            return
+        position = current - sum(1 for index in indices if index < current)
+        if current in indices:
+            # 指向后一首的前一个位置，next_track()从后一首继续（后一首在开头时回绕）
+            self.current_index = position - 1 if position > 0 else len(self.playlist) - 1
+        else:
+            self.current_index = position
+            
     def _play_index(self, index: int) -> bool:
         """播放指定索引的音频
         
@@ -246,26 +322,45 @@ class AudioPlayer:
         return False
         
     def _update_loop(self) -> None:
-        """更新循环，用于更新播放状态和触发回调"""
+        """更新循环，按订阅者要求的频率发布播放位置
+        
+        未播放或没有人关心播放位置（如窗口隐藏到托盘）时阻塞等待，
+        直到播放状态或订阅者变化时被唤醒
+        """
         while True:
-            if self.state == PlayState.PLAYING:
-                # 更新播放位置
-                position = self.get_position()
-                if position != self._position:
-                    self._position = position
-                    if self.on_position_changed:
-                        wx.CallAfter(self.on_position_changed, position)
-                        
-                # 检查是否播放完成
-                if position >= 0.99:
-                    if self.play_mode == PlayMode.SINGLE:
-                        # 单曲循环：重新播放当前曲目
-                        wx.CallAfter(self._play_index, self.current_index)
-                    else:
-                        # 其他模式：播放下一曲
-                        wx.CallAfter(self.next_track)
-                        
-            time.sleep(0.1)  # 降低CPU使用率
+            rate = self.scheduler.get_rate(TOPIC_PLAYER_POSITION)
+            if self.on_position_changed:
+                rate = max(rate, 10.0)
+                
+            if self.state != PlayState.PLAYING or rate <= 0:
+                self._wake.wait()
+                self._wake.clear()
+                continue
+                
+            # 更新播放位置
+            position = self.get_position()
+            if position != self._position:
+                self._position = position
+                if self.on_position_changed:
+                    self.scheduler.post(self.on_position_changed, position)
+                self.scheduler.publish(TOPIC_PLAYER_POSITION, position)
+                
+            self._wake.wait(1.0 / rate)
+            self._wake.clear()
+            
+    def _on_end_reached(self, event) -> None:
+        """VLC播放结束事件（在VLC线程中调用，不能在此调用VLC接口）"""
+        self.scheduler.post(self._on_track_finished)
+        
+    def _on_track_finished(self) -> None:
+        """当前曲目播放完成，按播放模式继续播放"""
+        self._set_state(PlayState.STOPPED)
+        if self.play_mode == PlayMode.SINGLE:
+            # 单曲循环：重新播放当前曲目
+            self._play_index(self.current_index)
+        else:
+            # 其他模式：播放下一曲
+            self.next_track()
             
     def get_metadata(self) -> Dict:
         """获取当前音频的元数据
@@ -297,23 +392,76 @@ class AudioPlayer:
             'duration': 0
         }
         
-    def get_audio_data(self) -> np.ndarray:
+    def _store_tempo(self) -> None:
+        """把当前曲目播放中估计出的节拍速度写入曲库元数据"""
+        detector = self.onset_detector
+        if not self.library or not self.current_file or not detector.estimates:
+            return
+        self.library.update(
+            self.current_file['fs_id'],
+            tempo=round(detector.tempo, 2),
+            tempo_confidence=round(detector.tempo_confidence, 3)
+        )
+        
+    def close(self) -> None:
+        """停止播放，释放音频输出并保存曲库元数据（退出程序时调用）"""
+        self.stop()
+        if self.audio_tap:
+            self.audio_tap.close()
+        self._store_tempo()
+        if self.library:
+            self.library.save()
+            
+    def feed_audio(self, samples: np.ndarray) -> None:
+        """推入解码后的PCM数据（由音频采集回调调用）
+        
+        Args:
+            samples: 单声道PCM采样
+        """
+        self._audio_source = True
+        self.analyzer.push(samples)
+        
+    def has_audio_data(self) -> bool:
+        """是否有PCM数据来源
+        
+        没有时get_audio_data()和频谱都是静音，不能据此判断曲目是否静音
+        
+        Returns:
+            是否调用过feed_audio()
+        """
+        return self._audio_source
+        
+    def get_audio_data(self, out: Optional[np.ndarray] = None) -> np.ndarray:
         """获取当前音频数据用于可视化
         
+        Args:
+            out: 调用方自己的输出缓冲区（多个线程同时读取时不能共用），
+                为None或长度不符时分配新数组
+                
         Returns:
-            音频数据数组
+            最近一帧的音频数据数组
         """
-        # TODO: 实现音频数据获取
-        return self.audio_data
+        if out is not None and len(out) != self.analyzer.fft_size:
+            out = None
+        return self.analyzer.get_samples(out=out)
         
     def get_spectrum_data(self) -> np.ndarray:
         """获取频谱数据用于可视化
         
+        每个STFT帧只计算一次，所有可视化器共享同一结果
+        
+        Returns:
+            频谱数据数组（分贝），调用方不应修改
+        """
+        return self.analyzer.spectrum
+        
+    def get_tempo(self) -> Optional[float]:
+        """获取当前曲目的节拍速度估计
+        
         Returns:
-            频谱数据数组
+            每分钟节拍数，未知时返回None
         """
-        # TODO: 实现频谱数据获取
-        return self.spectrum_data
+        return self.onset_detector.tempo
         
     def is_playing(self) -> bool:
         """检查是否正在播放
@@ -1,35 +1,60 @@
 import os
 import json
-import time
-from typing import List, Dict, Optional
+from typing import Callable, List, Dict, Optional, Set
 from collections import deque
-import threading
+from src.persister import JsonPersister
+from src.playlist_store import PlaylistStore, migrate_json
+from src.validity import ValidityChecker
+
+# 变化通知的事件类型及回调参数
+PLAYLIST_CREATED = 'playlist_created'  # (名称)
+PLAYLIST_DELETED = 'playlist_deleted'  # (名称)
+PLAYLIST_RENAMED = 'playlist_renamed'  # (原名称, 新名称)
+TRACKS_ADDED = 'tracks_added'  # (名称, 追加到末尾的文件列表)
+TRACKS_REMOVED = 'tracks_removed'  # (名称, 移除的索引列表，从大到小)
+TRACK_MOVED = 'track_moved'  # (名称, 原索引, 新索引)
+TRACKS_UPDATED = 'tracks_updated'  # (名称, 信息被替换的索引列表)
+RECENT_PLAYED = 'recent_played'  # (移到最前的文件信息, 原来的索引或None, 是否挤掉了最后一首)
+WRITE_FAILED = 'write_failed'  # (涉及的播放列表名称列表, 异常)，在数据库写入线程中通知
 
 class PlaylistManager:
-    def __init__(self, api_client):
+    def __init__(self, api_client, data_dir: Optional[str] = None):
         """初始化播放列表管理器
         
         Args:
             api_client: 百度网盘API客户端实例
+            data_dir: 数据目录，默认为~/.dupan/playlists
         """
         self.api_client = api_client
-        self.data_dir = os.path.join(os.path.expanduser("~"), ".dupan", "playlists")
+        self.data_dir = data_dir or os.path.join(os.path.expanduser("~"), ".dupan", "playlists")
         os.makedirs(self.data_dir, exist_ok=True)
         
-        # 播放列表数据
+        # 播放列表保存在SQLite数据库中（后台线程写入），旧版的playlists.json在首次启动时导入
+        self.store = PlaylistStore(os.path.join(self.data_dir, "playlists.db"))
+        self.store.add_listener(self._on_store_failed)
+        migrate_json(self.store, os.path.join(self.data_dir, "playlists.json"))
+        self._names: List[str] = self.store.playlist_names()
+        
+        # 已加载的播放列表（打开时才从数据库读取）
         self.playlists: Dict[str, List[Dict]] = {}
         self.recent_played = deque(maxlen=30)  # 最近播放列表，最大30首
+        self.recent_file = os.path.join(self.data_dir, "recent.json")
+        self.persister = JsonPersister()
         
-        # URL有效性检查
-        self.url_cache: Dict[str, Dict] = {}
-        self.url_check_interval = 3600  # URL有效性检查间隔（秒）
+        # 已加载播放列表中每首曲目在数据库中的位置值
+        self._positions: Dict[str, List[int]] = {}
         
-        # 加载保存的播放列表
-        self._load_playlists()
+        # 每个播放列表中已有文件路径的索引，添加文件时用于去重
+        self._path_index: Dict[str, Set[str]] = {}
         
-        # 启动URL检查线程
-        self.url_check_thread = threading.Thread(target=self._url_check_loop, daemon=True)
-        self.url_check_thread.start()
+        # 变化通知回调
+        self._listeners: List[Callable] = []
+        
+        # 曲目有效性检查（打开播放列表或播放到附近时按需进行）
+        self.validator = ValidityChecker(api_client)
+        
+        # 加载最近播放列表
+        self._load_playlists()
         
     def create_playlist(self, name: str) -> bool:
         """创建新的播放列表
@@ -40,11 +65,16 @@ class PlaylistManager:
         Returns:
             是否创建成功
         """
-        if name in self.playlists:
+        if name in self._names:
             return False
             
+        self.store.create(name)
+        
+        self._names.append(name)
         self.playlists[name] = []
-        self._save_playlists()
+        self._positions[name] = []
+        self._path_index[name] = set()
+        self._notify(PLAYLIST_CREATED, name)
         return True
         
     def delete_playlist(self, name: str) -> bool:
@@ -56,11 +86,16 @@ class PlaylistManager:
         Returns:
             是否删除成功
         """
-        if name not in self.playlists:
+        if name not in self._names:
             return False
             
-        del self.playlists[name]
-        self._save_playlists()
+        self.store.delete(name)
+        
+        self._names.remove(name)
+        self.playlists.pop(name, None)
+        self._positions.pop(name, None)
+        self._path_index.pop(name, None)
+        self._notify(PLAYLIST_DELETED, name)
         return True
         
     def rename_playlist(self, old_name: str, new_name: str) -> bool:
@@ -73,11 +108,16 @@ class PlaylistManager:
         Returns:
             是否重命名成功
         """
-        if old_name not in self.playlists or new_name in self.playlists:
+        if old_name not in self._names or new_name in self._names:
             return False
             
-        self.playlists[new_name] = self.playlists.pop(old_name)
-        self._save_playlists()
+        self.store.rename(old_name, new_name)
+        
+        self._names[self._names.index(old_name)] = new_name
+        for cache in (self.playlists, self._positions, self._path_index):
+            if old_name in cache:
+                cache[new_name] = cache.pop(old_name)
+        self._notify(PLAYLIST_RENAMED, old_name, new_name)
         return True
         
     def add_to_playlist(self, playlist_name: str, files: List[Dict]) -> bool:
@@ -90,18 +130,42 @@ class PlaylistManager:
         Returns:
             是否添加成功
         """
-        if playlist_name not in self.playlists:
-            return False
-            
-        # 检查文件是否已存在
-        existing_paths = {f['path'] for f in self.playlists[playlist_name]}
-        new_files = [f for f in files if f['path'] not in existing_paths]
+        return self.add_files(playlist_name, files) is not None
+        
+    def add_files(self, playlist_name: str, files: List[Dict]) -> Optional[List[Dict]]:
+        """向播放列表批量添加文件：一次去重，在一个事务中写入新增的曲目
+        
+        已在播放列表中的文件（按路径）和本批中重复的文件被跳过
         
+        Args:
+            playlist_name: 播放列表名称
+            files: 要添加的文件列表
+            
+        Returns:
+            实际添加的文件列表，播放列表不存在时返回None
+        """
+        if not self._ensure_loaded(playlist_name):
+            return None
+            
+        # 用维护的路径索引去重，不必每次扫描整个播放列表
+        existing_paths = self._path_index[playlist_name]
+        new_files = []
+        for file in files:
+            if file['path'] not in existing_paths:
+                existing_paths.add(file['path'])
+                new_files.append(file)
+                
         if new_files:
+            # 追加到末尾：位置值接着最后一首按间隔递增
+            positions = self._positions[playlist_name]
+            last = positions[-1] if positions else 0
+            new_positions = [last + PlaylistStore.POSITION_GAP * (i + 1) for i in range(len(new_files))]
+            self.store.insert(playlist_name, new_files, new_positions)
             self.playlists[playlist_name].extend(new_files)
-            self._save_playlists()
+            positions.extend(new_positions)
+            self._notify(TRACKS_ADDED, playlist_name, new_files)
             
-        return True
+        return new_files
         
     def remove_from_playlist(self, playlist_name: str, indices: List[int]) -> bool:
         """从播放列表移除文件
@@ -113,17 +177,22 @@ class PlaylistManager:
         Returns:
             是否移除成功
         """
-        if playlist_name not in self.playlists:
+        if not self._ensure_loaded(playlist_name):
             return False
             
         # 按索引从大到小排序，以避免删除时影响其他索引
-        indices.sort(reverse=True)
+        playlist = self.playlists[playlist_name]
+        positions = self._positions[playlist_name]
+        indices = sorted({index for index in indices if 0 <= index < len(playlist)}, reverse=True)
         
+        self.store.remove(playlist_name, [positions[index] for index in indices])
         for index in indices:
-            if 0 <= index < len(self.playlists[playlist_name]):
-                self.playlists[playlist_name].pop(index)
-                
-        self._save_playlists()
+            removed = playlist.pop(index)
+            positions.pop(index)
+            self._path_index[playlist_name].discard(removed['path'])
+            
+        if indices:
+            self._notify(TRACKS_REMOVED, playlist_name, indices)
         return True
         
     def reorder_playlist(self, playlist_name: str, from_index: int, to_index: int) -> bool:
@@ -137,19 +206,91 @@ class PlaylistManager:
         Returns:
             是否重排成功
         """
-        if playlist_name not in self.playlists:
+        if not self._ensure_loaded(playlist_name):
             return False
             
         playlist = self.playlists[playlist_name]
+        positions = self._positions[playlist_name]
         if not (0 <= from_index < len(playlist) and 0 <= to_index < len(playlist)):
             return False
+        if from_index == to_index:
+            return True
             
         item = playlist.pop(from_index)
+        old_position = positions.pop(from_index)
         playlist.insert(to_index, item)
         
-        self._save_playlists()
+        # 新位置值取前后两首的中间值，只改这一行；没有间隔时重新编号整个播放列表
+        before = positions[to_index - 1] if to_index > 0 else 0
+        after = positions[to_index] if to_index < len(positions) else before + 2 * PlaylistStore.POSITION_GAP
+        new_position = (before + after) // 2
+        if before < new_position < after:
+            self.store.move(playlist_name, old_position, new_position)
+            positions.insert(to_index, new_position)
+        else:
+            self._positions[playlist_name] = self.store.renumber(playlist_name, playlist)
+        self._notify(TRACK_MOVED, playlist_name, from_index, to_index)
         return True
         
+    def relink_playlist(self, playlist_name: str, library_index) -> Optional[Dict]:
+        """修复播放列表中被移动或重命名的曲目（一次批量查询，一次写入）
+        
+        在曲库索引中先按fs_id、再按内容（md5和大小）查找每首曲目的当前位置，
+        路径变化的改为新路径；新位置已在播放列表中的重复项被移除
+        
+        Args:
+            playlist_name: 播放列表名称
+            library_index: LibraryIndex实例
+            
+        Returns:
+            dict: relinked（(原路径, 新路径)列表）、removed（移除的重复项路径列表）、
+                  unresolved（(文件信息, 原因)列表）；播放列表不存在时返回None
+        """
+        if not self._ensure_loaded(playlist_name):
+            return None
+            
+        playlist = self.playlists[playlist_name]
+        positions = self._positions[playlist_name]
+        paths = self._path_index[playlist_name]
+        report = {'relinked': [], 'removed': [], 'unresolved': []}
+        updated = []
+        duplicates = []
+        
+        unknown = []
+        for index, (file, found) in enumerate(zip(playlist, library_index.locate(playlist))):
+            if found is None:
+                # 曲库中没有记录：确认仍存在的不算失效，尚未确认的提交检查
+                valid = self.validator.status(file)
+                if valid is None:
+                    unknown.append(file)
+                    report['unresolved'].append((file, "曲库中没有记录，正在检查是否存在"))
+                elif not valid:
+                    report['unresolved'].append((file, "文件已不存在"))
+                continue
+            if found['path'] == file['path'] and found['fs_id'] == file['fs_id']:
+                continue
+            if found['path'] != file['path'] and found['path'] in paths:
+                duplicates.append(index)
+                continue
+                
+            # 保留曲库记录中没有的字段（如category）
+            new_file = dict(file)
+            new_file.update(found)
+            paths.discard(file['path'])
+            paths.add(new_file['path'])
+            playlist[index] = new_file
+            updated.append(index)
+            report['relinked'].append((file['path'], new_file['path']))
+            
+        self.validator.check(unknown)
+        self.store.update(playlist_name, [positions[i] for i in updated], [playlist[i] for i in updated])
+        if updated:
+            self._notify(TRACKS_UPDATED, playlist_name, updated)
+        if duplicates:
+            report['removed'] = [playlist[i]['path'] for i in duplicates]
+            self.remove_from_playlist(playlist_name, duplicates)
+        return report
+        
     def get_playlist(self, name: str) -> Optional[List[Dict]]:
         """获取播放列表
         
@@ -159,15 +300,41 @@ class PlaylistManager:
         Returns:
             播放列表内容，如果不存在返回None
         """
-        return self.playlists.get(name)
+        if not self._ensure_loaded(name):
+            return None
+        return self.playlists[name]
+        
+    def reload_playlists(self, names: List[str]) -> None:
+        """写入数据库失败后重新读取播放列表，使内存中的状态与数据库一致（主线程中调用）
+        
+        Args:
+            names: 需要重新读取的播放列表名称
+        """
+        self._names = self.store.playlist_names()
+        for name in names:
+            self.playlists.pop(name, None)
+            self._positions.pop(name, None)
+            self._path_index.pop(name, None)
+            
+    def _on_store_failed(self, names: List[str], error: Exception) -> None:
+        """数据库写入失败回调（在写入线程中调用）：通知监听者重新同步"""
+        self._notify(WRITE_FAILED, names, error)
+        
+    def get_playlist_names(self) -> List[str]:
+        """获取所有播放列表名称（不加载播放列表内容）
+        
+        Returns:
+            按创建顺序排列的播放列表名称
+        """
+        return list(self._names)
         
     def get_all_playlists(self) -> Dict[str, List[Dict]]:
-        """获取所有播放列表
+        """获取所有播放列表（会加载全部播放列表，只需要名称时用get_playlist_names）
         
         Returns:
             所有播放列表的字典
         """
-        return self.playlists.copy()
+        return {name: self.get_playlist(name) for name in self._names}
         
     def add_to_recent(self, file_info: Dict) -> None:
         """添加文件到最近播放列表
@@ -176,14 +343,18 @@ class PlaylistManager:
             file_info: 文件信息
         """
         # 如果文件已在最近播放列表中，先移除它
-        self.recent_played = deque(
-            [f for f in self.recent_played if f['path'] != file_info['path']],
-            maxlen=30
-        )
-        
-        # 添加到最近播放列表开头
+        old_index = None
+        for index, f in enumerate(self.recent_played):
+            if f['path'] == file_info['path']:
+                old_index = index
+                del self.recent_played[index]
+                break
+                
+        # 添加到最近播放列表开头（已满时挤掉最后一首），由后台线程保存
+        dropped = old_index is None and len(self.recent_played) == self.recent_played.maxlen
         self.recent_played.appendleft(file_info)
-        self._save_recent_played()
+        self.persister.save(self.recent_file, list(self.recent_played))
+        self._notify(RECENT_PLAYED, file_info, old_index, dropped)
         
     def get_recent_played(self) -> List[Dict]:
         """获取最近播放列表
@@ -194,85 +365,97 @@ class PlaylistManager:
         return list(self.recent_played)
         
     def check_file_validity(self, file_info: Dict) -> bool:
-        """检查文件是否有效
+        """检查文件是否有效（不等待网络）
         
         Args:
             file_info: 文件信息
             
         Returns:
-            文件是否有效
+            文件是否有效，尚未检查的文件视为有效并提交优先检查
+        """
+        valid = self.validator.status(file_info)
+        if valid is None:
+            self.validator.check([file_info], urgent=True)
+            return True
+        return valid
+        
+    def check_playlist(self, name: str) -> None:
+        """提交播放列表中所有曲目的检查（打开播放列表时调用）
+        
+        Args:
+            name: 播放列表名称
+        """
+        playlist = self.get_playlist(name)
+        if playlist:
+            self.validator.check(playlist)
+            
+    def check_upcoming(self, files: List[Dict], index: int, count: int = 20) -> None:
+        """优先检查播放位置附近（当前及之后）的曲目
+        
+        Args:
+            files: 正在播放的曲目列表
+            index: 当前曲目的索引
+            count: 检查的曲目数
         """
-        path = file_info['path']
-        
-        # 检查缓存
-        if path in self.url_cache:
-            cache_info = self.url_cache[path]
-            # 如果缓存未过期，直接返回
-            if time.time() - cache_info['timestamp'] < self.url_check_interval:
-                return cache_info['valid']
+        self.validator.check(files[max(index, 0):index + count], urgent=True)
+        
+    def add_listener(self, listener: Callable) -> None:
+        """添加变化通知回调（在修改播放列表的线程中调用，通常为主线程）
+        
+        Args:
+            listener: 回调函数，参数为(事件类型, *事件参数)，见模块开头的事件类型
+        """
+        self._listeners = self._listeners + [listener]
+        
+    def remove_listener(self, listener: Callable) -> None:
+        """移除变化通知回调"""
+        self._listeners = [item for item in self._listeners if item != listener]
+        
+    def _notify(self, event: str, *args) -> None:
+        """通知所有回调"""
+        for listener in self._listeners:
+            try:
+                listener(event, *args)
+            except Exception as e:
+                print(f"播放列表变化回调出错: {e}")
                 
-        try:
-            # 通过API验证文件
-            self.api_client.get_file_download_url(path)
-            self.url_cache[path] = {
-                'valid': True,
-                'timestamp': time.time()
-            }
+    def close(self) -> None:
+        """停止有效性检查，写入尚未保存的修改并关闭数据库（退出前调用）"""
+        self.validator.stop()
+        self.persister.close()
+        self.store.close()
+        
+    def _ensure_loaded(self, name: str) -> bool:
+        """确保播放列表已从数据库读入内存
+        
+        Args:
+            name: 播放列表名称
+            
+        Returns:
+            播放列表是否存在
+        """
+        if name in self.playlists:
             return True
-        except:
-            self.url_cache[path] = {
-                'valid': False,
-                'timestamp': time.time()
-            }
+        if name not in self._names:
             return False
             
+        try:
+            files, positions = self.store.load(name)
+        except Exception as e:
+            print(f"加载播放列表失败: {str(e)}")
+            return False
+        self.playlists[name] = files
+        self._positions[name] = positions
+        self._path_index[name] = {f['path'] for f in files}
+        return True
+        
     def _load_playlists(self) -> None:
-        """从文件加载播放列表"""
+        """从文件加载最近播放列表"""
         try:
-            playlist_file = os.path.join(self.data_dir, "playlists.json")
-            if os.path.exists(playlist_file):
-                with open(playlist_file, 'r', encoding='utf-8') as f:
-                    self.playlists = json.load(f)
-                    
-            recent_file = os.path.join(self.data_dir, "recent.json")
-            if os.path.exists(recent_file):
-                with open(recent_file, 'r', encoding='utf-8') as f:
+            if os.path.exists(self.recent_file):
+                with open(self.recent_file, 'r', encoding='utf-8') as f:
                     recent_list = json.load(f)
                     self.recent_played = deque(recent_list, maxlen=30)
         except Exception as e:
-            print(f"加载播放列表失败: {str(e)}")
-            self.playlists = {}
+            print(f"加载最近播放列表失败: {str(e)}")
             self.recent_played.clear()
-            
-    def _save_playlists(self) -> None:
-        """保存播放列表到文件"""
-        try:
-            playlist_file = os.path.join(self.data_dir, "playlists.json")
-            with open(playlist_file, 'w', encoding='utf-8') as f:
-                json.dump(self.playlists, f, ensure_ascii=False, indent=2)
-        except Exception as e:
-            print(f"保存播放列表失败: {str(e)}")
-            
-    def _save_recent_played(self) -> None:
-        """保存最近播放列表到文件"""
-        try:
-            recent_file = os.path.join(self.data_dir, "recent.json")
-            with open(recent_file, 'w', encoding='utf-8') as f:
-                json.dump(list(self.recent_played), f, ensure_ascii=False, indent=2)
-        except Exception as e:
-            print(f"保存最近播放列表失败: {str(e)}")
-            
-    def _url_check_loop(self) -> None:
-        """URL有效性检查循环"""
-        while True:
-            # 遍历所有播放列表中的文件
-            for playlist in self.playlists.values():
-                for file_info in playlist:
-                    self.check_file_validity(file_info)
-                    
-            # 检查最近播放列表
-            for file_info in self.recent_played:
-                self.check_file_validity(file_info)
-                
-            # 等待下一次检查
-            time.sleep(self.url_check_interval)
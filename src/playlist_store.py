@@ -0,0 +1,355 @@
+"""
+播放列表存储模块
+用SQLite保存播放列表，每首曲目一行，按带间隔的位置值排序：
+添加、删除、移动只写变化的行，由后台线程合并后在一个事务中提交
+（每次修改各自一个保存点，失败时只撤销该次修改并通知回调），
+打开播放列表时才在另一个只读连接上读取其中的曲目
+"""
+
+import os
+import json
+import queue
+import sqlite3
+import threading
+from collections import Counter
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS playlists (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS playlist_tracks (
+    playlist_id INTEGER NOT NULL REFERENCES playlists(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    path TEXT NOT NULL,
+    info TEXT NOT NULL,
+    PRIMARY KEY (playlist_id, position)
+) WITHOUT ROWID;
+"""
+
+# 插入曲目，参数为(位置值, 路径, 文件信息JSON, 播放列表名称)
+INSERT_TRACK = ("INSERT INTO playlist_tracks(playlist_id, position, path, info) "
+                "SELECT id, ?, ?, ? FROM playlists WHERE name = ?")
+
+
+class PlaylistStore:
+    """播放列表的SQLite存储（线程安全）
+    
+    曲目的位置值之间留有间隔，在两首之间插入或移动曲目时取中间值，
+    只有间隔用完时才重新编号整个播放列表。
+    修改立即返回，后台线程把FLUSH_INTERVAL秒内的修改合并为一个事务提交，
+    其中每次修改在自己的保存点中执行，一次修改失败不影响同一事务中的其他修改；
+    查询使用单独的只读连接（WAL模式下不会被写入阻塞），
+    只有涉及的播放列表还有未写完的修改时才先等待写入
+    """
+    
+    # 相邻曲目位置值的间隔
+    POSITION_GAP = 1024
+    
+    # 合并修改的时间窗口（秒）
+    FLUSH_INTERVAL = 1.0
+    
+    def __init__(self, db_file: str):
+        """打开播放列表数据库
+        
+        Args:
+            db_file: 数据库文件路径
+        """
+        self.db_file = db_file
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_file, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        self._conn.executescript(SCHEMA)
+        
+        # 查询专用的只读连接
+        self._read_lock = threading.Lock()
+        self._reader = sqlite3.connect(db_file, check_same_thread=False)
+        self._reader.execute("PRAGMA query_only=ON")
+        
+        # 每个播放列表已提交但尚未写入数据库的修改数
+        self._pending: Counter = Counter()
+        self._pending_lock = threading.Lock()
+        
+        # 统计：修改次数、已提交的事务数、写入失败被撤销的修改数
+        self.mutations = 0
+        self.commits = 0
+        self.failures = 0
+        
+        # 写入失败回调
+        self._listeners: List[Callable[[List[str], Exception], None]] = []
+        
+        self._writes: queue.Queue = queue.Queue()
+        self._wake = threading.Event()
+        self._writer = threading.Thread(target=self._write_loop, daemon=True)
+        self._writer.start()
+        
+    def add_listener(self, listener: Callable[[List[str], Exception], None]) -> None:
+        """添加写入失败回调（在写入线程中调用）
+        
+        Args:
+            listener: 回调函数，参数为失败的修改涉及的播放列表名称列表和异常
+        """
+        self._listeners = self._listeners + [listener]
+        
+    def remove_listener(self, listener: Callable[[List[str], Exception], None]) -> None:
+        """移除写入失败回调"""
+        self._listeners = [item for item in self._listeners if item != listener]
+        
+    def _execute(self, names: Sequence[str], statements: List[Tuple[str, List[tuple]]]) -> None:
+        """提交一次修改，由后台线程写入（立即返回）
+        
+        Args:
+            names: 修改涉及的播放列表名称（写入失败时通知回调）
+            statements: (SQL, 参数元组列表)的列表，每组参数执行一次
+        """
+        self.mutations += 1
+        with self._pending_lock:
+            self._pending.update(names)
+        self._writes.put((list(names), statements))
+        
+    def _query(self, sql: str, params: tuple = (), names: Optional[Sequence[str]] = None) -> list:
+        """在只读连接上执行查询
+        
+        Args:
+            sql: 查询语句
+            params: 查询参数
+            names: 查询涉及的播放列表名称，其中有未写完的修改时先等待写入；
+                为None时只要有未写完的修改就等待
+        """
+        with self._pending_lock:
+            if names is None:
+                pending = bool(self._pending)
+            else:
+                pending = any(self._pending[name] for name in names)
+        if pending:
+            self.flush()
+        with self._read_lock:
+            return self._reader.execute(sql, params).fetchall()
+            
+    def flush(self) -> None:
+        """立即写入已提交的修改并等待完成"""
+        if self._writes.unfinished_tasks:
+            self._wake.set()
+            self._writes.join()
+            
+    def _write_loop(self) -> None:
+        """后台写入线程：把一个时间窗口内的修改合并为一个事务提交"""
+        while True:
+            batch = [self._writes.get()]
+            if batch[0] is not None:
+                self._wake.wait(self.FLUSH_INTERVAL)
+            self._wake.clear()
+            while True:
+                try:
+                    batch.append(self._writes.get_nowait())
+                except queue.Empty:
+                    break
+                    
+            mutations = [item for item in batch if item is not None]
+            failed = []
+            try:
+                try:
+                    if mutations:
+                        failed = self._write_batch(mutations)
+                        self.commits += 1
+                except Exception as e:
+                    # 提交本身失败：整个事务被撤销
+                    failed = [(names, e) for names, _ in mutations]
+                    
+                # 先通知失败再标记完成，flush()返回时失败已经报告
+                for names, error in failed:
+                    print(f"保存播放列表失败: {error}")
+                    self.failures += 1
+                    for listener in self._listeners:
+                        try:
+                            listener(names, error)
+                        except Exception as e:
+                            print(f"播放列表写入失败回调出错: {e}")
+            finally:
+                # 事务结束后才减少未写完的修改数，查询不会读到修改之前的数据
+                with self._pending_lock:
+                    for names, _ in mutations:
+                        self._pending.subtract(names)
+                    self._pending = +self._pending
+                for _ in batch:
+                    self._writes.task_done()
+                    
+            if None in batch:
+                return
+                
+    def _write_batch(self, mutations: List[Tuple[List[str], list]]) -> List[Tuple[List[str], Exception]]:
+        """在一个事务中写入一批修改，每次修改在自己的保存点中执行
+        
+        Args:
+            mutations: (播放列表名称列表, 语句列表)的列表
+            
+        Returns:
+            失败并被撤销的修改的(播放列表名称列表, 异常)列表
+        """
+        failed = []
+        with self._lock, self._conn:
+            # 显式开始事务，否则释放最外层保存点时会单独提交
+            self._conn.execute("BEGIN")
+            for names, statements in mutations:
+                self._conn.execute("SAVEPOINT mutation")
+                try:
+                    for sql, rows in statements:
+                        self._conn.executemany(sql, rows)
+                except sqlite3.Error as e:
+                    self._conn.execute("ROLLBACK TO mutation")
+                    failed.append((names, e))
+                self._conn.execute("RELEASE mutation")
+        return failed
+        
+    def is_empty(self) -> bool:
+        """是否还没有任何播放列表"""
+        return not self._query("SELECT 1 FROM playlists LIMIT 1")
+        
+    def playlist_names(self) -> List[str]:
+        """所有播放列表名称（按创建顺序）"""
+        return [name for name, in self._query("SELECT name FROM playlists ORDER BY id")]
+        
+    def create(self, name: str) -> None:
+        """创建空播放列表"""
+        self._execute([name], [("INSERT INTO playlists(name) VALUES (?)", [(name,)])])
+        
+    def delete(self, name: str) -> None:
+        """删除播放列表及其曲目"""
+        self._execute([name], [("DELETE FROM playlists WHERE name = ?", [(name,)])])
+        
+    def rename(self, old_name: str, new_name: str) -> None:
+        """重命名播放列表"""
+        self._execute([old_name, new_name],
+                      [("UPDATE playlists SET name = ? WHERE name = ?", [(new_name, old_name)])])
+                      
+    def load(self, name: str) -> Tuple[List[Dict], List[int]]:
+        """读取播放列表的全部曲目
+        
+        Args:
+            name: 播放列表名称
+            
+        Returns:
+            (曲目列表, 对应的位置值列表)
+        """
+        rows = self._query(
+            "SELECT t.position, t.info FROM playlist_tracks t JOIN playlists p ON p.id = t.playlist_id "
+            "WHERE p.name = ? ORDER BY t.position", (name,), [name])
+        return [json.loads(info) for _, info in rows], [position for position, _ in rows]
+        
+    def insert(self, name: str, files: List[Dict], positions: List[int]) -> None:
+        """在指定位置插入曲目
+        
+        Args:
+            name: 播放列表名称
+            files: 曲目列表
+            positions: 每首曲目的位置值
+        """
+        self._execute([name], [(INSERT_TRACK, self._track_rows(name, files, positions))])
+        
+    def remove(self, name: str, positions: List[int]) -> None:
+        """删除指定位置的曲目"""
+        if positions:
+            self._execute([name], [(
+                "DELETE FROM playlist_tracks WHERE position = ? "
+                "AND playlist_id = (SELECT id FROM playlists WHERE name = ?)",
+                [(position, name) for position in positions]
+            )])
+            
+    def move(self, name: str, old_position: int, new_position: int) -> None:
+        """修改一首曲目的位置值"""
+        self._execute([name], [(
+            "UPDATE playlist_tracks SET position = ? WHERE position = ? "
+            "AND playlist_id = (SELECT id FROM playlists WHERE name = ?)",
+            [(new_position, old_position, name)]
+        )])
+        
+    def update(self, name: str, positions: List[int], files: List[Dict]) -> None:
+        """替换指定位置的曲目信息，位置不变
+        
+        Args:
+            name: 播放列表名称
+            positions: 位置值列表
+            files: 对应的新曲目信息
+        """
+        if positions:
+            self._execute([name], [(
+                "UPDATE playlist_tracks SET path = ?, info = ? WHERE position = ? "
+                "AND playlist_id = (SELECT id FROM playlists WHERE name = ?)",
+                [(file['path'], json.dumps(file, ensure_ascii=False), position, name)
+                 for file, position in zip(files, positions)]
+            )])
+            
+    def renumber(self, name: str, files: List[Dict]) -> List[int]:
+        """按给定顺序重写整个播放列表，位置值恢复为均匀间隔
+        
+        Args:
+            name: 播放列表名称
+            files: 按新顺序排列的全部曲目
+            
+        Returns:
+            新的位置值列表
+        """
+        positions = [(i + 1) * self.POSITION_GAP for i in range(len(files))]
+        self._execute([name], [
+            ("DELETE FROM playlist_tracks WHERE playlist_id = (SELECT id FROM playlists WHERE name = ?)",
+             [(name,)]),
+            (INSERT_TRACK, self._track_rows(name, files, positions)),
+        ])
+        return positions
+        
+    def import_playlists(self, playlists: Dict[str, List[Dict]]) -> None:
+        """在一个事务中导入多个播放列表（用于从JSON文件迁移）
+        
+        Args:
+            playlists: 播放列表名称到曲目列表的映射
+        """
+        statements = []
+        for name, files in playlists.items():
+            positions = [(i + 1) * self.POSITION_GAP for i in range(len(files))]
+            statements.append(("INSERT INTO playlists(name) VALUES (?)", [(name,)]))
+            statements.append((INSERT_TRACK, self._track_rows(name, files, positions)))
+        self._execute(list(playlists), statements)
+        
+    @staticmethod
+    def _track_rows(name: str, files: List[Dict], positions: List[int]) -> List[tuple]:
+        """生成INSERT_TRACK的参数"""
+        return [(position, file['path'], json.dumps(file, ensure_ascii=False), name)
+                for file, position in zip(files, positions)]
+                
+    def close(self) -> None:
+        """写入剩余修改并关闭数据库"""
+        self._writes.put(None)
+        self._wake.set()
+        self._writer.join(timeout=5)
+        with self._read_lock:
+            self._reader.close()
+        with self._lock:
+            self._conn.close()
+
+
+def migrate_json(store: PlaylistStore, json_file: str) -> bool:
+    """把旧版playlists.json导入空的数据库，成功后把JSON文件改名为.migrated保留备份
+    
+    Args:
+        store: 播放列表存储
+        json_file: 旧版JSON文件路径
+        
+    Returns:
+        是否进行了迁移
+    """
+    if not os.path.exists(json_file) or not store.is_empty():
+        return False
+    try:
+        with open(json_file, 'r', encoding='utf-8') as f:
+            playlists = json.load(f)
+        store.import_playlists(playlists)
+        # 导入失败（写入线程已撤销并打印错误）时保留JSON文件
+        if store.is_empty():
+            return False
+        os.replace(json_file, json_file + ".migrated")
+        return True
+    except Exception as e:
+        print(f"迁移播放列表失败: {str(e)}")
+        return False
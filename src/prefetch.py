@@ -0,0 +1,153 @@
+"""
+目录预取模块
+根据目录树的展开和选择，在后台以低优先级预取接下来可能打开的子目录列表，
+按历史访问次数排序，访问次数保存在~/.dupan/navigation.json
+"""
+
+import os
+import json
+import time
+import threading
+from typing import Dict, List, Optional
+
+
+class DirectoryPrefetcher:
+    """目录列表预取器"""
+    
+    # 每个区域最多预取的子目录数
+    MAX_CANDIDATES = 12
+    
+    # 用户多久没有展开或选择目录后停止预取（秒）
+    IDLE_TIMEOUT = 30.0
+    
+    # 速率预算不足时等待多久再试（秒）
+    RETRY_DELAY = 1.0
+    
+    # 最多保存的访问记录数
+    MAX_HISTORY = 2000
+    
+    def __init__(self, api, data_dir: Optional[str] = None):
+        """初始化目录预取器
+        
+        Args:
+            api: BaiduPanAPI实例，预取结果写入其目录列表缓存
+            data_dir: 数据目录，默认为~/.dupan
+        """
+        self.api = api
+        self.data_dir = data_dir or os.path.join(os.path.expanduser("~"), ".dupan")
+        os.makedirs(self.data_dir, exist_ok=True)
+        self.history_file = os.path.join(self.data_dir, "navigation.json")
+        
+        # 目录路径到访问次数的映射
+        self.frequencies: Dict[str, int] = {}
+        self._dirty = False
+        
+        # 待预取的目录（按优先级排列）和最近一次用户操作的时间
+        self._queue: List[str] = []
+        self._last_activity = time.monotonic()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = False
+        self._thread = None
+        
+        # 统计：已预取的目录数
+        self.prefetched = 0
+        
+        self._load()
+        
+    def record_visit(self, path: str) -> None:
+        """记录一次目录访问（展开或选择）
+        
+        Args:
+            path: 目录路径
+        """
+        with self._lock:
+            self.frequencies[path] = self.frequencies.get(path, 0) + 1
+            self._dirty = True
+            self._last_activity = time.monotonic()
+            
+    def prefetch(self, child_paths: List[str]) -> None:
+        """预取一组可见的子目录，替换之前的队列（离开原区域即放弃原来的预取）
+        
+        Args:
+            child_paths: 子目录路径列表（按显示顺序）
+        """
+        cache = self.api.listing_cache
+        with self._lock:
+            # 访问次数多的优先，次数相同时保持显示顺序
+            ranked = sorted(child_paths, key=lambda path: -self.frequencies.get(path, 0))
+            self._queue = [path for path in ranked if not cache.contains(path)][:self.MAX_CANDIDATES]
+            self._last_activity = time.monotonic()
+            if self._queue and (self._thread is None or not self._thread.is_alive()):
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+        self._wake.set()
+        
+    def cancel(self) -> None:
+        """放弃尚未开始的预取"""
+        with self._lock:
+            self._queue = []
+            
+    def stop(self) -> None:
+        """停止预取线程并保存访问记录"""
+        self._stopped = True
+        self.cancel()
+        self._wake.set()
+        self.save()
+        
+    def _next_path(self) -> Optional[str]:
+        """取得下一个要预取的目录，用户空闲时清空队列"""
+        with self._lock:
+            if time.monotonic() - self._last_activity > self.IDLE_TIMEOUT:
+                self._queue = []
+            return self._queue[0] if self._queue else None
+            
+    def _run(self) -> None:
+        """预取线程：依次预取队列中的目录，队列为空时等待"""
+        while not self._stopped:
+            path = self._next_path()
+            if path is None:
+                if self._dirty:
+                    self.save()
+                self._wake.wait()
+                self._wake.clear()
+                continue
+                
+            try:
+                done = self.api.prefetch_listing(path)
+            except Exception as e:
+                print(f"预取目录 {path} 失败: {e}")
+                done = True
+                
+            if not done:
+                # 速率预算不足，让出预算给前台请求
+                self._wake.wait(self.RETRY_DELAY)
+                self._wake.clear()
+                continue
+                
+            with self._lock:
+                if self._queue and self._queue[0] == path:
+                    self._queue.pop(0)
+            self.prefetched += 1
+            
+    def save(self) -> None:
+        """保存访问记录"""
+        try:
+            with self._lock:
+                items = sorted(self.frequencies.items(), key=lambda item: -item[1])
+                data = json.dumps(dict(items[:self.MAX_HISTORY]), ensure_ascii=False)
+                self._dirty = False
+            with open(self.history_file, 'w', encoding='utf-8') as f:
+                f.write(data)
+        except Exception as e:
+            print(f"保存目录访问记录失败: {str(e)}")
+            
+    def _load(self) -> None:
+        """加载访问记录"""
+        try:
+            if os.path.exists(self.history_file):
+                with open(self.history_file, 'r', encoding='utf-8') as f:
+                    self.frequencies = json.load(f)
+        except Exception as e:
+            print(f"加载目录访问记录失败: {str(e)}")
+            self.frequencies = {}
@@ -0,0 +1,393 @@
+"""
+界面刷新调度模块
+集中管理界面刷新：生产者发布状态变化，消费者按需要的频率订阅，
+同一界面时钟周期内的所有更新合并为一次wx.CallAfter批量投递，
+周期任务共用一个按最近截止时间设定的单次定时器
+"""
+
+import time
+import threading
+import wx
+from typing import Any, Callable, Dict, List, Optional
+
+# 播放器发布的主题
+TOPIC_PLAYER_POSITION = 'player.position'  # 播放位置（0-1）
+TOPIC_PLAYER_STATE = 'player.state'  # 播放状态（PlayState）
+TOPIC_PLAYER_TRACK = 'player.track'  # 当前曲目（文件信息字典）
+
+
+class Subscription:
+    """主题订阅"""
+    
+    def __init__(self, topic: str, callback: Callable[[Any], None],
+                 rate: Optional[float], window: Optional[wx.Window]):
+        self.topic = topic
+        self.callback = callback
+        self.rate = rate
+        self.min_interval = 1.0 / rate if rate else 0.0
+        self.window = window
+        self.active = True
+        self.value = None
+        self.dirty = False
+        self.last_delivery = float('-inf')
+        
+    @property
+    def due_time(self) -> float:
+        """最早可以投递的时间"""
+        return self.last_delivery + self.min_interval
+
+
+class Task:
+    """周期任务"""
+    
+    def __init__(self, callback: Callable[[], None], interval: Optional[float]):
+        self.callback = callback
+        self.interval = interval
+        self.next_run = time.monotonic() + interval if interval else None
+
+
+class _SchedulerTimer(wx.Timer):
+    """调度器使用的单次定时器"""
+    
+    def __init__(self, scheduler):
+        super().__init__()
+        self.scheduler = scheduler
+        
+    def Notify(self):
+        self.scheduler._on_timer()
+
+
+class RefreshScheduler:
+    """界面刷新调度器（事件总线）
+    
+    publish()和post()可在任意线程调用；订阅回调、周期任务和可见性回调
+    都在主线程中执行。没有订阅者的主题发布会被直接丢弃，生产者可先用
+    has_listeners()或get_rate()判断是否需要计算。
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        
+        # 主题到订阅列表的映射，以及订阅者变化时通知生产者的回调
+        self._subscriptions: Dict[str, List[Subscription]] = {}
+        self._watchers: Dict[str, List[Callable[[], None]]] = {}
+        
+        # 等待下一批投递的最新值和函数调用
+        self._pending: Dict[str, Any] = {}
+        self._calls: List[tuple] = []
+        self._flush_scheduled = False
+        
+        # 周期任务和可见性监听
+        self._tasks: List[Task] = []
+        self._visibility_listeners: List[tuple] = []
+        self._watched_windows: Dict[int, wx.Window] = {}
+        
+        # 单次定时器，在主线程中按需创建
+        self._timer = None
+        self._deadline = None
+        
+    def subscribe(self, topic: str, callback: Callable[[Any], None],
+                  rate: Optional[float] = None,
+                  window: Optional[wx.Window] = None) -> Subscription:
+        """订阅主题（主线程中调用）
+        
+        Args:
+            topic: 主题名
+            callback: 回调函数，参数为最新发布的值
+            rate: 最高投递频率（次/秒），None为每批都投递
+            window: 关联的窗口，窗口不可见时暂停投递且不计入监听者
+            
+        Returns:
+            Subscription: 订阅对象，用于unsubscribe()
+        """
+        subscription = Subscription(topic, callback, rate, window)
+        if window is not None:
+            subscription.active = self._is_window_visible(window)
+            self._watch_window(window)
+            
+        with self._lock:
+            self._subscriptions[topic] = self._subscriptions.get(topic, []) + [subscription]
+        self._notify_watchers(topic)
+        return subscription
+        
+    def unsubscribe(self, subscription: Optional[Subscription]) -> None:
+        """取消订阅
+        
+        Args:
+            subscription: subscribe()返回的订阅对象
+        """
+        if subscription is None:
+            return
+        with self._lock:
+            remaining = [item for item in self._subscriptions.get(subscription.topic, [])
+                         if item is not subscription]
+            if remaining:
+                self._subscriptions[subscription.topic] = remaining
+            else:
+                self._subscriptions.pop(subscription.topic, None)
+        self._notify_watchers(subscription.topic)
+        
+    def has_listeners(self, topic: str) -> bool:
+        """主题是否有活动的订阅者（可在任意线程调用）"""
+        return any(item.active for item in self._subscriptions.get(topic, ()))
+        
+    def get_rate(self, topic: str, default: float = 10.0) -> float:
+        """获取主题所有活动订阅者要求的最高频率（可在任意线程调用）
+        
+        Args:
+            topic: 主题名
+            default: 不限频率的订阅者按该频率计算
+            
+        Returns:
+            float: 次/秒，没有活动订阅者时为0
+        """
+        rate = 0.0
+        for item in self._subscriptions.get(topic, ()):
+            if item.active:
+                rate = max(rate, item.rate or default)
+        return rate
+        
+    def watch(self, topic: str, callback: Callable[[], None]) -> None:
+        """监听主题订阅者的变化（包括因窗口隐藏而失效），用于唤醒生产者
+        
+        回调可能在任意线程中调用，应只设置标志或事件
+        
+        Args:
+            topic: 主题名
+            callback: 无参数回调
+        """
+        with self._lock:
+            self._watchers[topic] = self._watchers.get(topic, []) + [callback]
+            
+    def publish(self, topic: str, value: Any = None) -> bool:
+        """发布主题的新值（可在任意线程调用）
+        
+        同一批中多次发布只投递最后一个值
+        
+        Args:
+            topic: 主题名
+            value: 新值
+            
+        Returns:
+            bool: 是否有订阅者接收
+        """
+        if not self.has_listeners(topic):
+            return False
+        with self._lock:
+            self._pending[topic] = value
+            schedule = not self._flush_scheduled
+            self._flush_scheduled = True
+        if schedule:
+            wx.CallAfter(self._flush)
+        return True
+        
+    def post(self, callback: Callable, *args) -> None:
+        """在下一批投递中于主线程调用函数（可在任意线程调用）
+        
+        Args:
+            callback: 要调用的函数
+            *args: 参数
+        """
+        with self._lock:
+            self._calls.append((callback, args))
+            schedule = not self._flush_scheduled
+            self._flush_scheduled = True
+        if schedule:
+            wx.CallAfter(self._flush)
+            
+    def add_task(self, callback: Callable[[], None], interval: Optional[float]) -> Task:
+        """添加周期任务（主线程中调用）
+        
+        Args:
+            callback: 无参数回调
+            interval: 间隔（秒），None为暂停
+            
+        Returns:
+            Task: 任务对象
+        """
+        task = Task(callback, interval)
+        self._tasks.append(task)
+        self._arm_timer()
+        return task
+        
+    def set_task_interval(self, task: Optional[Task], interval: Optional[float]) -> None:
+        """修改任务间隔（主线程中调用）
+        
+        Args:
+            task: add_task()返回的任务对象
+            interval: 新间隔（秒），None为暂停
+        """
+        if task is None or task.interval == interval:
+            return
+        task.interval = interval
+        task.next_run = time.monotonic() + interval if interval else None
+        self._arm_timer()
+        
+    def remove_task(self, task: Optional[Task]) -> None:
+        """移除周期任务（主线程中调用）"""
+        if task in self._tasks:
+            self._tasks.remove(task)
+            self._arm_timer()
+            
+    def add_visibility_listener(self, window: wx.Window,
+                                callback: Callable[[bool], None]) -> None:
+        """监听窗口可见性变化（包括所属主窗口隐藏到托盘），主线程中调用
+        
+        Args:
+            window: 窗口
+            callback: 回调函数，参数为是否可见
+        """
+        self._visibility_listeners.append((window, callback, self._is_window_visible(window)))
+        self._watch_window(window)
+        
+    def remove_visibility_listener(self, window: wx.Window,
+                                   callback: Callable[[bool], None]) -> None:
+        """移除可见性监听"""
+        self._visibility_listeners = [
+            item for item in self._visibility_listeners
+            if not (item[0] is window and item[1] == callback)
+        ]
+        
+    @staticmethod
+    def _is_window_visible(window: wx.Window) -> bool:
+        """窗口是否在屏幕上可见"""
+        if not window or not window.IsShownOnScreen():
+            return False
+        top = wx.GetTopLevelParent(window)
+        return top is None or not top.IsIconized()
+        
+    def _watch_window(self, window: wx.Window) -> None:
+        """绑定窗口及其顶层窗口的显示/最小化事件"""
+        for target in (window, wx.GetTopLevelParent(window)):
+            if target is None or id(target) in self._watched_windows:
+                continue
+            self._watched_windows[id(target)] = target
+            target.Bind(wx.EVT_SHOW, self._on_show)
+            if isinstance(target, wx.TopLevelWindow):
+                target.Bind(wx.EVT_ICONIZE, self._on_show)
+                
+    def _on_show(self, event):
+        """显示状态变化后在下一批中刷新可见性"""
+        event.Skip()
+        self.post(self._refresh_visibility)
+        
+    def _refresh_visibility(self) -> None:
+        """重新计算订阅和监听者的可见性，变化时通知相关方"""
+        changed_topics = set()
+        for subscriptions in list(self._subscriptions.values()):
+            for item in subscriptions:
+                if item.window is None:
+                    continue
+                active = self._is_window_visible(item.window)
+                if active != item.active:
+                    item.active = active
+                    changed_topics.add(item.topic)
+                    
+        listeners = []
+        for window, callback, visible in self._visibility_listeners:
+            now_visible = self._is_window_visible(window)
+            listeners.append((window, callback, now_visible))
+            if now_visible != visible:
+                self._safe_call(callback, now_visible)
+        self._visibility_listeners = listeners
+        
+        for topic in changed_topics:
+            self._notify_watchers(topic)
+            
+        # 重新可见的订阅可能有积压的值
+        self._deliver(time.monotonic())
+        self._arm_timer()
+        
+    def _notify_watchers(self, topic: str) -> None:
+        for callback in self._watchers.get(topic, ()):
+            self._safe_call(callback)
+            
+    @staticmethod
+    def _safe_call(callback: Callable, *args) -> None:
+        try:
+            callback(*args)
+        except Exception as e:
+            print(f"调度回调出错: {e}")
+            
+    def _flush(self) -> None:
+        """主线程中处理一批发布和调用"""
+        with self._lock:
+            pending = self._pending
+            calls = self._calls
+            self._pending = {}
+            self._calls = []
+            self._flush_scheduled = False
+            
+        for callback, args in calls:
+            self._safe_call(callback, *args)
+            
+        for topic, value in pending.items():
+            for item in self._subscriptions.get(topic, ()):
+                item.value = value
+                item.dirty = True
+                
+        self._deliver(time.monotonic())
+        self._arm_timer()
+        
+    def _deliver(self, now: float) -> None:
+        """投递已到期的订阅值，未到期的等待定时器"""
+        for subscriptions in list(self._subscriptions.values()):
+            for item in subscriptions:
+                if not item.dirty or not item.active:
+                    continue
+                if item.window is not None and not item.window:
+                    # 窗口已销毁
+                    self.unsubscribe(item)
+                    continue
+                if now >= item.due_time:
+                    item.dirty = False
+                    item.last_delivery = now
+                    self._safe_call(item.callback, item.value)
+                    
+    def _on_timer(self) -> None:
+        """定时器到期：执行到期的任务和限频订阅"""
+        self._deadline = None
+        now = time.monotonic()
+        for task in list(self._tasks):
+            if task.next_run is not None and task.next_run <= now + 0.001:
+                # 错过的周期直接跳过，不补执行
+                task.next_run = now + task.interval
+                self._safe_call(task.callback)
+        self._deliver(time.monotonic())
+        self._arm_timer()
+        
+    def _arm_timer(self) -> None:
+        """将单次定时器设定到最近的截止时间，没有待办事项时停止"""
+        deadlines = [task.next_run for task in self._tasks if task.next_run is not None]
+        for subscriptions in self._subscriptions.values():
+            deadlines.extend(item.due_time for item in subscriptions
+                             if item.dirty and item.active)
+                             
+        if self._timer is None:
+            self._timer = _SchedulerTimer(self)
+            
+        if not deadlines:
+            if self._timer.IsRunning():
+                self._timer.Stop()
+            self._deadline = None
+            return
+            
+        deadline = min(deadlines)
+        if self._deadline is not None and self._timer.IsRunning() and abs(deadline - self._deadline) < 0.001:
+            return
+        self._deadline = deadline
+        delay = max(1, int((deadline - time.monotonic()) * 1000))
+        self._timer.StartOnce(delay)
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> RefreshScheduler:
+    """获取全局刷新调度器"""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = RefreshScheduler()
+        return _scheduler
@@ -0,0 +1,217 @@
+"""
+曲目有效性检查模块
+按需检查曲目在网盘中是否仍然存在：打开播放列表或播放到附近时才提交检查，
+每次filemetas请求批量查询最多100个fs_id，在后台线程中按速率预算分散进行，
+结果缓存一段时间
+"""
+
+import time
+import threading
+from collections import deque
+from typing import Callable, Dict, List, Optional, Tuple
+from src.api import BaiduPanAPI, RateLimitedError
+
+
+class ValidityChecker:
+    """曲目有效性检查器（线程安全）"""
+    
+    # 每次请求查询的fs_id数（filemetas的上限）
+    BATCH_SIZE = BaiduPanAPI.FILEMETAS_LIMIT
+    
+    # 检查结果的有效期（秒）
+    CACHE_TTL = 3600.0
+    
+    # 两次请求之间的最短间隔（秒），避免集中占用请求预算
+    BATCH_INTERVAL = 1.0
+    
+    # 速率预算不足时等待多久再试（秒）
+    RETRY_DELAY = 1.0
+    
+    def __init__(self, api):
+        """初始化有效性检查器
+        
+        Args:
+            api: BaiduPanAPI实例
+        """
+        self.api = api
+        
+        # fs_id到(是否有效, 检查时间)的缓存
+        self._cache: Dict[int, Tuple[bool, float]] = {}
+        
+        # 待检查的fs_id：播放位置附近的优先
+        self._urgent: deque = deque()
+        self._queue: deque = deque()
+        self._queued = set()
+        
+        self._listeners: List[Callable[[Dict[int, bool]], None]] = []
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = False
+        self._thread = None
+        
+        # 统计：已检查的曲目数、当前已知失效的曲目数、请求次数、失败的请求次数
+        self.checked = 0
+        self.invalid = 0
+        self.requests = 0
+        self.failed = 0
+        
+    @property
+    def pending(self) -> int:
+        """等待检查的曲目数"""
+        with self._lock:
+            return len(self._queued)
+            
+    def status(self, file_info: Dict) -> Optional[bool]:
+        """查询缓存的检查结果
+        
+        Args:
+            file_info: 文件信息
+            
+        Returns:
+            是否有效，尚未检查或结果已过期时返回None
+        """
+        with self._lock:
+            entry = self._cache.get(int(file_info['fs_id']))
+        if entry is None or time.time() - entry[1] >= self.CACHE_TTL:
+            return None
+        return entry[0]
+        
+    def check(self, files: List[Dict], urgent: bool = False) -> None:
+        """提交检查（立即返回），结果未过期或已在排队的曲目被跳过
+        
+        Args:
+            files: 文件信息列表
+            urgent: 是否优先检查（如即将播放的曲目）
+        """
+        now = time.time()
+        with self._lock:
+            queue = self._urgent if urgent else self._queue
+            for file in files:
+                fs_id = int(file['fs_id'])
+                entry = self._cache.get(fs_id)
+                if entry is not None and now - entry[1] < self.CACHE_TTL:
+                    continue
+                if fs_id in self._queued:
+                    # 已在普通队列中的也放进优先队列，先检查到的那次生效
+                    if urgent:
+                        queue.append(fs_id)
+                    continue
+                self._queued.add(fs_id)
+                queue.append(fs_id)
+                
+            if self._queued and (self._thread is None or not self._thread.is_alive()):
+                self._stopped = False
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+        self._wake.set()
+        
+    def summarize(self, files: List[Dict]) -> Dict[str, int]:
+        """统计一组曲目的检查进度
+        
+        Args:
+            files: 文件信息列表
+            
+        Returns:
+            dict: total（总数）、checked（结果未过期的数目）、invalid（其中失效的数目）
+        """
+        now = time.time()
+        checked = invalid = 0
+        with self._lock:
+            for file in files:
+                entry = self._cache.get(int(file['fs_id']))
+                if entry is not None and now - entry[1] < self.CACHE_TTL:
+                    checked += 1
+                    invalid += not entry[0]
+        return {'total': len(files), 'checked': checked, 'invalid': invalid}
+        
+    def add_listener(self, listener: Callable[[Dict[int, bool]], None]) -> None:
+        """添加检查结果回调（在检查线程中调用）
+        
+        Args:
+            listener: 回调函数，参数为本批fs_id到是否有效的映射
+        """
+        with self._lock:
+            self._listeners = self._listeners + [listener]
+            
+    def remove_listener(self, listener: Callable[[Dict[int, bool]], None]) -> None:
+        """移除检查结果回调"""
+        with self._lock:
+            self._listeners = [item for item in self._listeners if item != listener]
+            
+    def stop(self) -> None:
+        """停止检查线程，放弃尚未检查的曲目"""
+        with self._lock:
+            self._stopped = True
+            self._urgent.clear()
+            self._queue.clear()
+            self._queued.clear()
+        self._wake.set()
+        
+    def _next_batch(self) -> List[int]:
+        """取出下一批要检查的fs_id（优先队列在前）"""
+        batch = []
+        with self._lock:
+            for queue in (self._urgent, self._queue):
+                while queue and len(batch) < self.BATCH_SIZE:
+                    fs_id = queue.popleft()
+                    if fs_id in self._queued:
+                        self._queued.discard(fs_id)
+                        batch.append(fs_id)
+        return batch
+        
+    def _requeue(self, batch: List[int]) -> None:
+        """把未能检查的一批放回优先队列最前面"""
+        with self._lock:
+            if self._stopped:
+                return
+            self._queued.update(batch)
+            self._urgent.extendleft(reversed(batch))
+            
+    def _record(self, batch: List[int], found: set) -> Dict[int, bool]:
+        """保存一批检查结果"""
+        now = time.time()
+        results = {fs_id: fs_id in found for fs_id in batch}
+        with self._lock:
+            for fs_id, valid in results.items():
+                old = self._cache.get(fs_id)
+                if old is None:
+                    self.checked += 1
+                elif not old[0]:
+                    self.invalid -= 1
+                self.invalid += not valid
+                self._cache[fs_id] = (valid, now)
+        return results
+        
+    def _run(self) -> None:
+        """检查线程：依次检查队列中的曲目，队列为空时等待"""
+        while not self._stopped:
+            batch = self._next_batch()
+            if not batch:
+                self._wake.wait()
+                self._wake.clear()
+                continue
+                
+            try:
+                self.requests += 1
+                metas = self.api.get_file_metas(batch, background=True)
+            except RateLimitedError:
+                self._requeue(batch)
+                time.sleep(self.RETRY_DELAY)
+                continue
+            except Exception as e:
+                print(f"检查曲目有效性失败: {e}")
+                self.failed += 1
+                time.sleep(self.BATCH_INTERVAL)
+                continue
+                
+            # filemetas只返回仍然存在的文件
+            results = self._record(batch, {int(meta['fs_id']) for meta in metas})
+            with self._lock:
+                listeners = self._listeners
+            for listener in listeners:
+                try:
+                    listener(results)
+                except Exception as e:
+                    print(f"有效性检查回调出错: {e}")
+                    
+            time.sleep(self.BATCH_INTERVAL)